@@ -9,54 +9,56 @@ import apiService from '../services/api'
 
 export default function Calendario() {
   const [currentDate, setCurrentDate] = useState(new Date())
-  const [transacoes, setTransacoes] = useState([])
+  const [resumoPorData, setResumoPorData] = useState({})
+  const [detalhesPorData, setDetalhesPorData] = useState({})
   const [selectedDay, setSelectedDay] = useState(null)
   const [loading, setLoading] = useState(false)
+  const [loadingDia, setLoadingDia] = useState(false)
 
   useEffect(() => {
-    loadTransacoes()
+    loadCalendario()
   }, [currentDate])
 
-  const loadTransacoes = async () => {
+  // Totais por dia calculados no servidor (uma consulta agrupada)
+  const loadCalendario = async () => {
     try {
       setLoading(true)
-      const transacoesData = await apiService.getTransacoes({
-        mes: currentDate.getMonth() + 1,
-        ano: currentDate.getFullYear()
-      })
-      setTransacoes(transacoesData)
+      const calendario = await apiService.getCalendario(
+        currentDate.getMonth() + 1,
+        currentDate.getFullYear()
+      )
+      setResumoPorData(Object.fromEntries(calendario.dias.map(dia => [dia.data, dia])))
+      setDetalhesPorData({})
     } catch (error) {
-      console.error('Erro ao carregar transações:', error)
+      console.error('Erro ao carregar calendário:', error)
     } finally {
       setLoading(false)
     }
   }
 
+  // Transações do dia carregadas só quando o dia é selecionado
+  const selectDay = async (day) => {
+    setSelectedDay(day)
+    const dateKey = format(day, 'yyyy-MM-dd')
+    if (!resumoPorData[dateKey] || detalhesPorData[dateKey]) return
+    try {
+      setLoadingDia(true)
+      const transacoesDoDia = await apiService.getCalendarioDia(dateKey)
+      setDetalhesPorData(prev => ({ ...prev, [dateKey]: transacoesDoDia }))
+    } catch (error) {
+      console.error('Erro ao carregar transações do dia:', error)
+    } finally {
+      setLoadingDia(false)
+    }
+  }
+
   const monthStart = startOfMonth(currentDate)
   const monthEnd = endOfMonth(currentDate)
   const calendarDays = eachDayOfInterval({ start: monthStart, end: monthEnd })
 
-  // Agrupar transações por data
-  const transacoesPorData = transacoes.reduce((acc, transacao) => {
-    const data = format(new Date(transacao.data_transacao), 'yyyy-MM-dd')
-    if (!acc[data]) {
-      acc[data] = []
-    }
-    acc[data].push(transacao)
-    return acc
-  }, {})
-
-  const getTransacoesDoDia = (day) => {
-    const dateKey = format(day, 'yyyy-MM-dd')
-    return transacoesPorData[dateKey] || []
-  }
+  const getResumoDoDia = (day) => resumoPorData[format(day, 'yyyy-MM-dd')]
 
-  const getSaldoDoDia = (day) => {
-    const transacoesDoDia = getTransacoesDoDia(day)
-    return transacoesDoDia.reduce((total, transacao) => {
-      return total + (transacao.tipo === 'entrada' ? transacao.valor : -transacao.valor)
-    }, 0)
-  }
+  const getTransacoesDoDia = (day) => detalhesPorData[format(day, 'yyyy-MM-dd')] || []
 
   const previousMonth = () => {
     setCurrentDate(subMonths(currentDate, 1))
@@ -115,8 +117,8 @@ export default function Calendario() {
                   {/* Dias do mês */}
                   <div className="grid grid-cols-7 gap-1">
                     {calendarDays.map(day => {
-                      const transacoesDoDia = getTransacoesDoDia(day)
-                      const saldoDoDia = getSaldoDoDia(day)
+                      const resumoDoDia = getResumoDoDia(day)
+                      const saldoDoDia = resumoDoDia ? resumoDoDia.saldo : 0
                       const isToday = isSameDay(day, new Date())
                       const isSelected = selectedDay && isSameDay(day, selectedDay)
 
@@ -130,17 +132,17 @@ export default function Calendario() {
                             ${isSelected ? 'bg-blue-100 dark:bg-blue-800 border-blue-400' : ''}
                             ${!isSameMonth(day, currentDate) ? 'opacity-50' : ''}
                           `}
-                          onClick={() => setSelectedDay(day)}
+                          onClick={() => selectDay(day)}
                         >
                           <div className="text-sm font-medium mb-1">
                             {format(day, 'd')}
                           </div>
                           
-                          {transacoesDoDia.length > 0 && (
+                          {resumoDoDia && (
                             <div className="space-y-1">
                               <div className="text-xs">
                                 <Badge variant="outline" className="text-xs px-1 py-0">
-                                  {transacoesDoDia.length}
+                                  {resumoDoDia.quantidade}
                                 </Badge>
                               </div>
                               {saldoDoDia !== 0 && (
@@ -176,7 +178,7 @@ export default function Calendario() {
             <CardContent>
               {selectedDay ? (
                 <div className="space-y-4">
-                  {getTransacoesDoDia(selectedDay).length > 0 ? (
+                  {getResumoDoDia(selectedDay) ? (
                     <>
                       {/* Resumo do dia */}
                       <div className="p-3 bg-gray-50 dark:bg-gray-800 rounded-lg">
@@ -187,25 +189,19 @@ export default function Calendario() {
                           <div className="flex justify-between">
                             <span>Entradas:</span>
                             <span className="text-green-600 font-medium">
-                              R$ {getTransacoesDoDia(selectedDay)
-                                .filter(t => t.tipo === 'entrada')
-                                .reduce((sum, t) => sum + t.valor, 0)
-                                .toLocaleString('pt-BR', { minimumFractionDigits: 2 })}
+                              R$ {getResumoDoDia(selectedDay).entradas.toLocaleString('pt-BR', { minimumFractionDigits: 2 })}
                             </span>
                           </div>
                           <div className="flex justify-between">
                             <span>Saídas:</span>
                             <span className="text-red-600 font-medium">
-                              R$ {getTransacoesDoDia(selectedDay)
-                                .filter(t => t.tipo === 'saida')
-                                .reduce((sum, t) => sum + t.valor, 0)
-                                .toLocaleString('pt-BR', { minimumFractionDigits: 2 })}
+                              R$ {getResumoDoDia(selectedDay).saidas.toLocaleString('pt-BR', { minimumFractionDigits: 2 })}
                             </span>
                           </div>
                           <div className="flex justify-between font-bold border-t pt-1">
                             <span>Saldo:</span>
-                            <span className={getSaldoDoDia(selectedDay) >= 0 ? 'text-green-600' : 'text-red-600'}>
-                              R$ {getSaldoDoDia(selectedDay).toLocaleString('pt-BR', { minimumFractionDigits: 2 })}
+                            <span className={getResumoDoDia(selectedDay).saldo >= 0 ? 'text-green-600' : 'text-red-600'}>
+                              R$ {getResumoDoDia(selectedDay).saldo.toLocaleString('pt-BR', { minimumFractionDigits: 2 })}
                             </span>
                           </div>
                         </div>
@@ -214,6 +210,11 @@ export default function Calendario() {
                       {/* Lista de transações */}
                       <div className="space-y-3">
                         <h4 className="font-medium">Transações</h4>
+                        {loadingDia && getTransacoesDoDia(selectedDay).length === 0 && (
+                          <div className="flex items-center justify-center py-4">
+                            <div className="animate-spin rounded-full h-8 w-8 border-b-2 border-blue-600"></div>
+                          </div>
+                        )}
                         {getTransacoesDoDia(selectedDay).map(transacao => (
                           <div key={transacao.id} className="p-3 border rounded-lg">
                             <div className="flex items-center justify-between mb-2">
@@ -32,6 +32,7 @@ export default function Dashboard() {
   const [balanceData, setBalanceData] = useState([])
   const [expensesByCategory, setExpensesByCategory] = useState([])
   const [incomesByCategory, setIncomesByCategory] = useState([])
+  const [forecastData, setForecastData] = useState([])
   const [loading, setLoading] = useState(true)
 
   useEffect(() => {
@@ -73,6 +74,14 @@ export default function Dashboard() {
         value: item.valor
       })))
 
+      // Carregar previsão de saldo (em cache no servidor até os dados mudarem)
+      const previsao = await apiService.getPrevisao(12, currentMonth, currentYear)
+      setForecastData(previsao.meses.map((item, index) => ({
+        month: `${String(item.mes).padStart(2, '0')}/${item.ano}`,
+        saldo: previsao.total.saldos[index],
+        livre: previsao.total.saldo_livre[index]
+      })))
+
     } catch (error) {
       console.error('Erro ao carregar dados do dashboard:', error)
     } finally {
@@ -277,6 +286,27 @@ export default function Dashboard() {
             </ResponsiveContainer>
           </CardContent>
         </Card>
+
+        {/* Previsão de Saldo */}
+        <Card className="lg:col-span-2">
+          <CardHeader>
+            <CardTitle>Previsão de Saldo (12 meses)</CardTitle>
+          </CardHeader>
+          <CardContent>
+            <ResponsiveContainer width="100%" height={300}>
+              <LineChart data={forecastData}>
+                <CartesianGrid strokeDasharray="3 3" />
+                <XAxis dataKey="month" />
+                <YAxis />
+                <Tooltip 
+                  formatter={(value) => [`R$ ${value.toLocaleString('pt-BR', { minimumFractionDigits: 2 })}`, '']}
+                />
+                <Line type="monotone" dataKey="saldo" stroke="#3B82F6" strokeWidth={2} name="Saldo previsto" />
+                <Line type="monotone" dataKey="livre" stroke="#10B981" strokeWidth={2} name="Livre das metas" />
+              </LineChart>
+            </ResponsiveContainer>
+          </CardContent>
+        </Card>
       </div>
     </div>
   )
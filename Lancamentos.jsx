@@ -92,7 +92,8 @@ export default function Lancamentos() {
       const currentDate = new Date()
       const transacoesData = await apiService.getTransacoes({
         mes: currentDate.getMonth() + 1,
-        ano: currentDate.getFullYear()
+        ano: currentDate.getFullYear(),
+        expandir: 1
       })
       setTransacoes(transacoesData)
     } catch (error) {
@@ -391,6 +391,14 @@ export default function Metas() {
                       {format(new Date(meta.data_inicio), 'dd/MM/yyyy')} - {format(new Date(meta.data_fim), 'dd/MM/yyyy')}
                     </span>
                   </div>
+                  {meta.data_conclusao_prevista && (
+                    <div className="flex justify-between">
+                      <span className="text-gray-500">Previsão:</span>
+                      <span className={meta.no_prazo ? 'text-green-600' : 'text-red-600'}>
+                        {format(new Date(meta.data_conclusao_prevista), 'dd/MM/yyyy')}
+                      </span>
+                    </div>
+                  )}
                   {meta.descricao && (
                     <div>
                       <span className="text-gray-500">Descrição:</span>
@@ -51,20 +51,15 @@ export default function Painel() {
     try {
       setLoading(true)
 
-      // Carregar balanço mensal
-      const balance = await apiService.getBalancoMensal(selectedYear)
-      setBalanceData(balance)
-
-      // Carregar resumos
-      const [paymentMethods, expenseTypes, periodicity] = await Promise.all([
-        apiService.getFormaPagamentoResumo(selectedMonth, selectedYear),
-        apiService.getTipoGastoResumo(selectedMonth, selectedYear),
-        apiService.getPeriodicidadeResumo(selectedMonth, selectedYear)
+      // Carregar balanço mensal e resumos em uma única requisição
+      const painel = await apiService.getPainel(selectedMonth, selectedYear, [
+        'balanco', 'forma_pagamento', 'tipo_gasto', 'periodicidade'
       ])
 
-      setPaymentMethodData(paymentMethods)
-      setExpenseTypeData(expenseTypes)
-      setPeriodicityData(periodicity)
+      setBalanceData(painel.balanco)
+      setPaymentMethodData(painel.forma_pagamento)
+      setExpenseTypeData(painel.tipo_gasto)
+      setPeriodicityData(painel.periodicidade)
 
     } catch (error) {
       console.error('Erro ao carregar dados do painel:', error)
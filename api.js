@@ -1,13 +1,22 @@
 const API_BASE_URL = '/api'
 
 class ApiService {
+  constructor() {
+    // Respostas de GET por URL, com o ETag para revalidação (If-None-Match)
+    this.etagCache = new Map()
+  }
+
   async request(endpoint, options = {}) {
     const url = `${API_BASE_URL}${endpoint}`
+    const method = (options.method || 'GET').toUpperCase()
+    const cached = method === 'GET' ? this.etagCache.get(url) : null
     const config = {
+      ...options,
       headers: {
         'Content-Type': 'application/json',
+        ...(cached ? { 'If-None-Match': cached.etag } : {}),
+        ...options.headers,
       },
-      ...options,
     }
 
     if (config.body && typeof config.body === 'object') {
@@ -16,13 +25,22 @@ class ApiService {
 
     try {
       const response = await fetch(url, config)
+
+      if (response.status === 304 && cached) {
+        return cached.data
+      }
       
       if (!response.ok) {
         const errorData = await response.json().catch(() => ({}))
         throw new Error(errorData.error || `HTTP error! status: ${response.status}`)
       }
       
-      return await response.json()
+      const data = await response.json()
+      const etag = response.headers.get('ETag')
+      if (method === 'GET' && etag) {
+        this.etagCache.set(url, { etag, data })
+      }
+      return data
     } catch (error) {
       console.error('API request failed:', error)
       throw error
@@ -102,6 +120,39 @@ class ApiService {
     return this.request(`/transacoes${query}`)
   }
 
+  async getTransacoesPagina(filters = {}, cursor = null, limit = 100) {
+    return this.getTransacoes({ ...filters, limit, cursor })
+  }
+
+  // Percorre todo o histórico em streaming NDJSON, uma transação por linha
+  async *streamTransacoes(filters = {}) {
+    const params = new URLSearchParams({ formato: 'ndjson' })
+    Object.keys(filters).forEach(key => {
+      if (filters[key] !== null && filters[key] !== undefined) {
+        params.append(key, filters[key])
+      }
+    })
+    const response = await fetch(`${API_BASE_URL}/transacoes?${params.toString()}`)
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`)
+    }
+
+    const reader = response.body.getReader()
+    const decoder = new TextDecoder()
+    let buffer = ''
+    while (true) {
+      const { done, value } = await reader.read()
+      if (done) break
+      buffer += decoder.decode(value, { stream: true })
+      const lines = buffer.split('\n')
+      buffer = lines.pop()
+      for (const line of lines) {
+        if (line) yield JSON.parse(line)
+      }
+    }
+    if (buffer) yield JSON.parse(buffer)
+  }
+
   async createTransacao(transacao) {
     return this.request('/transacoes', {
       method: 'POST',
@@ -109,6 +160,13 @@ class ApiService {
     })
   }
 
+  async createTransacoesLote(transacoes) {
+    return this.request('/transacoes/lote', {
+      method: 'POST',
+      body: transacoes,
+    })
+  }
+
   async updateTransacao(id, transacao) {
     return this.request(`/transacoes/${id}`, {
       method: 'PUT',
@@ -161,6 +219,15 @@ class ApiService {
     return this.request(`/periodicidade-resumo${query}`)
   }
 
+  async getPainel(mes, ano, fields = null) {
+    const params = new URLSearchParams()
+    if (mes) params.append('mes', mes)
+    if (ano) params.append('ano', ano)
+    if (fields) params.append('fields', fields.join(','))
+    const query = params.toString() ? `?${params.toString()}` : ''
+    return this.request(`/painel${query}`)
+  }
+
   async getDashboardData(mes, ano) {
     const params = new URLSearchParams()
     if (mes) params.append('mes', mes)
@@ -169,6 +236,19 @@ class ApiService {
     return this.request(`/dashboard${query}`)
   }
 
+  // Calendário: totais por dia do mês e detalhe de um dia (AAAA-MM-DD)
+  async getCalendario(mes, ano) {
+    const params = new URLSearchParams()
+    if (mes) params.append('mes', mes)
+    if (ano) params.append('ano', ano)
+    const query = params.toString() ? `?${params.toString()}` : ''
+    return this.request(`/calendario${query}`)
+  }
+
+  async getCalendarioDia(dia) {
+    return this.request(`/calendario/${dia}`)
+  }
+
   // Parcelamentos
   async getParcelamentos() {
     return this.request('/parcelamentos')
@@ -181,6 +261,20 @@ class ApiService {
     })
   }
 
+  async getProjecao(meses = 12, mes = null, ano = null) {
+    const params = new URLSearchParams({ meses })
+    if (mes) params.append('mes', mes)
+    if (ano) params.append('ano', ano)
+    return this.request(`/projecao?${params.toString()}`)
+  }
+
+  async getPrevisao(meses = 12, mes = null, ano = null) {
+    const params = new URLSearchParams({ meses })
+    if (mes) params.append('mes', mes)
+    if (ano) params.append('ano', ano)
+    return this.request(`/previsao?${params.toString()}`)
+  }
+
   // Metas
   async getMetas() {
     return this.request('/metas')
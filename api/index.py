@@ -9,6 +9,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from user import user_bp
 from financial_routes import financial_bp
 from seed_data import seed_bp
+from metricas import metricas_bp
 from supabase_config import get_supabase_admin
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static'))
@@ -16,6 +17,7 @@ app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
 
 CORS(app)
 
+app.register_blueprint(metricas_bp, url_prefix='/api')
 app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(financial_bp, url_prefix='/api')
 app.register_blueprint(seed_bp, url_prefix='/api')
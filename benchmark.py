@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Benchmark de carga da API: gera um usuário sintético com o vocabulário de
+seed_data.py (contas, categorias, formas de pagamento, tipos de gasto e
+periodicidades) e N transações, e dispara as rotas principais com
+concorrência configurável, reportando p50/p95/p99 e vazão por rota.
+
+Roda a app Flask completa (main.app) contra o substituto em memória de
+fake_supabase.py, com latência simulada por round-trip ao PostgREST.
+Com --salvar/--comparar, falha se o p95 de alguma rota piorar além da
+tolerância em relação a uma execução anterior.
+
+Uso: python benchmark.py --transacoes 100000 --concorrencia 8 --requisicoes 200
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import supabase_models
+from fake_supabase import FakeSupabaseClient
+from financial_routes import get_user_id
+from seed_data import SEED_PADRAO, CATEGORIAS_ENTRADA_PADRAO
+
+# Rotas exercitadas, com os parâmetros de consulta (mes/ano preenchidos na execução)
+ROTAS = [
+    ("/api/dashboard", "mes={mes}&ano={ano}"),
+    ("/api/balanco-mensal", "ano={ano}"),
+    ("/api/transacoes", "mes={mes}&ano={ano}&limit=100"),
+    ("/api/painel", "mes={mes}&ano={ano}"),
+    ("/api/categorias-resumo", "mes={mes}&ano={ano}"),
+    ("/api/forma-pagamento-resumo", "mes={mes}&ano={ano}"),
+    ("/api/tipo-gasto-resumo", "mes={mes}&ano={ano}"),
+    ("/api/periodicidade-resumo", "mes={mes}&ano={ano}"),
+]
+
+def gerar_dados(quantidade: int, ano: int, user_id: str, semente: int = 42) -> dict:
+    """
+    Gera as tabelas de um usuário: dados iniciais de seed_data.py e
+    transações distribuídas pelos 12 meses do ano
+    """
+    rng = random.Random(semente)
+    agora = f"{ano}-01-01T00:00:00+00:00"
+
+    def novo_id():
+        return str(uuid.UUID(int=rng.getrandbits(128)))
+
+    tables = {}
+    for model_class, rows in SEED_PADRAO:
+        tables[model_class.table_name] = [
+            {"id": novo_id(), "user_id": user_id, "ativo": True,
+             "created_at": agora, "updated_at": agora, **row}
+            for row in rows
+        ]
+
+    nomes_entrada = {c["nome"] for c in CATEGORIAS_ENTRADA_PADRAO}
+    categorias = {"entrada": [], "saida": []}
+    for categoria in tables["categorias"]:
+        categorias["entrada" if categoria["nome"] in nomes_entrada else "saida"].append(categoria["id"])
+
+    ids = {tabela: [r["id"] for r in rows] for tabela, rows in tables.items()}
+    inicio = date(ano, 1, 1)
+    dias = (date(ano, 12, 31) - inicio).days
+
+    transacoes = []
+    for i in range(quantidade):
+        tipo = "entrada" if rng.random() < 0.25 else "saida"
+        data_transacao = inicio + timedelta(days=rng.randint(0, dias))
+        transacoes.append({
+            "id": novo_id(),
+            "user_id": user_id,
+            "tipo": tipo,
+            "descricao": f"Transação {i}",
+            "valor": round(rng.lognormvariate(4.5, 1.0), 2),
+            "data_transacao": data_transacao.isoformat(),
+            "mes_referencia": data_transacao.month,
+            "ano_referencia": data_transacao.year,
+            "observacoes": None,
+            "conta_id": rng.choice(ids["contas"]),
+            "categoria_id": rng.choice(categorias[tipo]),
+            "forma_pagamento_id": rng.choice(ids["formas_pagamento"]),
+            "tipo_gasto_id": rng.choice(ids["tipos_gasto"]) if tipo == "saida" else None,
+            "periodicidade_id": rng.choice(ids["periodicidades"]),
+            "created_at": agora,
+            "updated_at": agora,
+        })
+    tables["transacoes"] = transacoes
+    return tables
+
+def percentil(amostras: list, p: int) -> float:
+    if len(amostras) < 2:
+        return amostras[0] if amostras else 0.0
+    return statistics.quantiles(amostras, n=100, method="inclusive")[p - 1]
+
+def medir_rota(app, url: str, requisicoes: int, concorrencia: int) -> dict:
+    """Dispara requisicoes GETs em url com concorrencia threads"""
+    def requisitar(_):
+        with app.test_client() as client:
+            inicio = time.perf_counter()
+            resposta = client.get(url)
+            return time.perf_counter() - inicio, resposta.status_code
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        resultados = list(executor.map(requisitar, range(requisicoes)))
+    duracao = time.perf_counter() - inicio
+
+    tempos = [t * 1000 for t, status in resultados if status < 400]
+    return {
+        "requisicoes": requisicoes,
+        "erros": sum(1 for _, status in resultados if status >= 400),
+        "p50": percentil(tempos, 50),
+        "p95": percentil(tempos, 95),
+        "p99": percentil(tempos, 99),
+        "vazao": requisicoes / duracao,
+    }
+
+def comparar(resultados: dict, arquivo: str, tolerancia: float) -> list:
+    """Rotas cujo p95 piorou além da tolerância em relação à execução salva"""
+    with open(arquivo) as f:
+        anteriores = json.load(f)
+    regressoes = []
+    for rota, atual in resultados.items():
+        anterior = anteriores.get(rota)
+        if anterior and anterior["p95"] and atual["p95"] > anterior["p95"] * (1 + tolerancia):
+            regressoes.append((rota, anterior["p95"], atual["p95"]))
+    return regressoes
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transacoes", type=int, default=10000)
+    parser.add_argument("--latencia", type=float, default=0.005, help="segundos por round-trip")
+    parser.add_argument("--concorrencia", type=int, default=8)
+    parser.add_argument("--requisicoes", type=int, default=100, help="por rota")
+    parser.add_argument("--ano", type=int, default=date.today().year)
+    parser.add_argument("--mes", type=int, default=6)
+    parser.add_argument("--rotas", help="prefixos de rota separados por vírgula (padrão: todas)")
+    parser.add_argument("--salvar", help="arquivo JSON para gravar os resultados")
+    parser.add_argument("--comparar", help="arquivo JSON de uma execução anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="piora máxima do p95 (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    print(f"🧪 Gerando {args.transacoes} transações sintéticas...")
+    client = FakeSupabaseClient(gerar_dados(args.transacoes, args.ano, get_user_id()), latency=args.latencia)
+
+    # Todas as instâncias de modelo passam a usar o substituto em memória
+    supabase_models.get_supabase_admin = lambda: client
+    supabase_models.get_supabase_client = lambda user_token=None: client
+    from main import app
+
+    rotas = ROTAS
+    if args.rotas:
+        prefixos = [p.strip() for p in args.rotas.split(",")]
+        rotas = [r for r in ROTAS if any(r[0].startswith(p) for p in prefixos)]
+
+    print(f"🚀 {args.requisicoes} requisições por rota, concorrência {args.concorrencia}, "
+          f"latência {args.latencia * 1000:.0f} ms\n")
+    print(f"{'rota':<32}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}{'req/s':>10}{'erros':>8}")
+
+    resultados = {}
+    for caminho, parametros in rotas:
+        url = f"{caminho}?{parametros.format(mes=args.mes, ano=args.ano)}"
+        r = resultados[caminho] = medir_rota(app, url, args.requisicoes, args.concorrencia)
+        print(f"{caminho:<32}{r['p50']:>10.1f}{r['p95']:>10.1f}{r['p99']:>10.1f}{r['vazao']:>10.1f}{r['erros']:>8}")
+
+    if args.salvar:
+        with open(args.salvar, "w") as f:
+            json.dump(resultados, f, indent=2)
+        print(f"\n💾 Resultados gravados em {args.salvar}")
+
+    if any(r["erros"] for r in resultados.values()):
+        print("\n❌ Houve respostas com erro")
+        return 1
+
+    if args.comparar:
+        regressoes = comparar(resultados, args.comparar, args.tolerancia)
+        for rota, anterior, atual in regressoes:
+            print(f"❌ Regressão em {rota}: p95 {anterior:.1f} ms -> {atual:.1f} ms")
+        if regressoes:
+            return 1
+        print(f"\n✅ Nenhuma regressão de p95 acima de {args.tolerancia:.0%}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
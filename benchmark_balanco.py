@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark de regressão do /balanco-mensal: caminho antigo (12 consultas
+sequenciais, uma por mês) versus o balanço anual agregado em uma consulta.
+
+Roda contra o substituto em memória de fake_supabase.py, com latência
+simulada por round-trip ao PostgREST.
+
+Uso: python benchmark_balanco.py --transacoes 20000 --latencia 0.02
+"""
+
+import argparse
+import calendar
+import random
+import time
+import uuid
+from datetime import date
+
+from fake_supabase import FakeSupabaseClient
+from supabase_models import Transacao
+from financial_routes import calcular_balanco_anual
+
+USER_ID = "550e8400-e29b-41d4-a716-446655440000"
+
+def gerar_transacoes(quantidade: int, ano: int) -> list:
+    """Gera transações sintéticas distribuídas ao longo do ano"""
+    rng = random.Random(42)
+    transacoes = []
+    for i in range(quantidade):
+        data_transacao = date(ano, rng.randint(1, 12), rng.randint(1, 28))
+        transacoes.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "user_id": USER_ID,
+            "tipo": rng.choice(["entrada", "saida", "saida"]),
+            "descricao": f"Transação {i}",
+            "valor": round(rng.uniform(5, 2000), 2),
+            "data_transacao": data_transacao.isoformat(),
+            "mes_referencia": data_transacao.month,
+            "ano_referencia": data_transacao.year,
+            "observacoes": "Gerada para benchmark",
+        })
+    return transacoes
+
+def balanco_legado(transacao_model, user_id, ano):
+    """Implementação anterior: uma consulta completa por mês"""
+    balanco = []
+    for mes in range(1, 13):
+        transacoes = transacao_model.get_all(user_id, mes, ano)
+        entradas = sum(t["valor"] for t in transacoes if t["tipo"] == "entrada")
+        saidas = sum(t["valor"] for t in transacoes if t["tipo"] == "saida")
+
+        balanco.append({
+            "mes": mes,
+            "mes_nome": calendar.month_name[mes],
+            "entradas": entradas,
+            "saidas": saidas,
+            "resultado": entradas - saidas
+        })
+    return balanco
+
+def medir(funcao, client, repeticoes):
+    client.reset_stats()
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resultado = funcao()
+    duracao = (time.perf_counter() - inicio) / repeticoes
+    return resultado, duracao, client.requests / repeticoes, client.bytes_transferred / repeticoes
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transacoes", type=int, default=20000)
+    parser.add_argument("--latencia", type=float, default=0.02, help="segundos por round-trip")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--ano", type=int, default=date.today().year)
+    args = parser.parse_args()
+
+    client = FakeSupabaseClient({"transacoes": gerar_transacoes(args.transacoes, args.ano)}, latency=args.latencia)
+    transacao_model = Transacao()
+    transacao_model.client = client
+
+    print(f"📊 Balanço mensal: {args.transacoes} transações, latência {args.latencia * 1000:.0f} ms\n")
+
+    antigo, t_antigo, req_antigo, bytes_antigo = medir(
+        lambda: balanco_legado(transacao_model, USER_ID, args.ano), client, args.repeticoes
+    )
+    novo, t_novo, req_novo, bytes_novo = medir(
+        lambda: calcular_balanco_anual(transacao_model, USER_ID, args.ano), client, args.repeticoes
+    )
+
+    for a, n in zip(antigo, novo):
+        if abs(a["entradas"] - n["entradas"]) > 0.01 or abs(a["saidas"] - n["saidas"]) > 0.01:
+            print(f"❌ Divergência no mês {a['mes']}: {a} != {n}")
+            return 1
+
+    print(f"{'caminho':<12}{'tempo (ms)':>12}{'consultas':>12}{'bytes':>14}")
+    print(f"{'antigo':<12}{t_antigo * 1000:>12.1f}{req_antigo:>12.0f}{bytes_antigo:>14.0f}")
+    print(f"{'agregado':<12}{t_novo * 1000:>12.1f}{req_novo:>12.0f}{bytes_novo:>14.0f}")
+    print(f"\n✅ Resultados idênticos; ganho de {t_antigo / t_novo:.1f}x")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark do volume trafegado pelo /dashboard: consultas com select("*")
+versus as projeções de colunas do repositório (Transacao.COLUNAS_TOTAIS,
+Transacao.COLUNAS_LISTAGEM e apenas o saldo das contas).
+
+Roda contra o substituto em memória de fake_supabase.py.
+
+Uso: python benchmark_payload.py --transacoes 20000
+"""
+
+import argparse
+import time
+from datetime import date
+
+from fake_supabase import FakeSupabaseClient
+from supabase_models import Conta, Transacao
+from benchmark_balanco import USER_ID, gerar_transacoes
+
+def dashboard_legado(transacao_model, conta_model, mes, ano):
+    """Implementação anterior: todas as colunas de todas as transações do mês"""
+    transacoes = transacao_model.get_all(USER_ID, mes, ano)
+    contas = conta_model.get_all(USER_ID)
+    entradas = sum(t["valor"] for t in transacoes if t["tipo"] == "entrada")
+    saidas = sum(t["valor"] for t in transacoes if t["tipo"] == "saida")
+    return entradas, saidas, sum(c["saldo"] for c in contas), len(transacoes)
+
+def dashboard_projetado(transacao_model, conta_model, mes, ano):
+    """Implementação atual: apenas as colunas usadas por /dashboard"""
+    transacoes = transacao_model.get_all(USER_ID, mes, ano, columns=Transacao.COLUNAS_TOTAIS)
+    transacao_model.get_all(USER_ID, mes, ano, columns=Transacao.COLUNAS_LISTAGEM, limit=10)
+    contas = conta_model.get_all(USER_ID, columns="saldo")
+    entradas = sum(t["valor"] for t in transacoes if t["tipo"] == "entrada")
+    saidas = sum(t["valor"] for t in transacoes if t["tipo"] == "saida")
+    return entradas, saidas, sum(c["saldo"] for c in contas), len(transacoes)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transacoes", type=int, default=20000)
+    parser.add_argument("--ano", type=int, default=date.today().year)
+    args = parser.parse_args()
+
+    transacoes = gerar_transacoes(args.transacoes, args.ano)
+    for i, t in enumerate(transacoes):
+        t.update({
+            "conta_id": f"conta-{i % 3}",
+            "categoria_id": f"cat-{i % 16}",
+            "forma_pagamento_id": f"forma-{i % 5}",
+            "tipo_gasto_id": f"tipo-{i % 3}",
+            "periodicidade_id": f"per-{i % 2}",
+            "created_at": "2025-01-01T00:00:00+00:00",
+            "updated_at": "2025-01-01T00:00:00+00:00",
+        })
+    contas = [
+        {"id": f"conta-{i}", "user_id": USER_ID, "nome": nome, "logo_url": f"/static/images/{nome}.jpg",
+         "saldo": 1000.0, "ativo": True}
+        for i, nome in enumerate(["Itaú", "Mercado Pago", "Nubank"])
+    ]
+    client = FakeSupabaseClient({"transacoes": transacoes, "contas": contas})
+
+    transacao_model = Transacao()
+    conta_model = Conta()
+    transacao_model.client = conta_model.client = client
+
+    print(f"📦 Dashboard: {args.transacoes} transações no ano, mês 1\n")
+    print(f"{'caminho':<12}{'tempo (ms)':>12}{'consultas':>12}{'bytes':>14}")
+
+    resultados = {}
+    for nome, funcao in (("select *", dashboard_legado), ("projetado", dashboard_projetado)):
+        client.reset_stats()
+        inicio = time.perf_counter()
+        resultados[nome] = funcao(transacao_model, conta_model, 1, args.ano)
+        duracao = time.perf_counter() - inicio
+        print(f"{nome:<12}{duracao * 1000:>12.1f}{client.requests:>12}{client.bytes_transferred:>14}")
+        resultados[nome + "_bytes"] = client.bytes_transferred
+
+    if resultados["select *"] != resultados["projetado"]:
+        print("\n❌ Os totais divergem entre os caminhos")
+        return 1
+
+    reducao = 1 - resultados["projetado_bytes"] / resultados["select *_bytes"]
+    print(f"\n✅ Totais idênticos; payload {reducao:.0%} menor")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
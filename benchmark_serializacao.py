@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark da serialização dos modelos SQLAlchemy de financial.py: to_dict
+com relacionamentos lazy (uma consulta por relacionamento acessado) versus
+Transacao.consulta_serializacao (joinedload) e Transacao.consulta_compacta
+(tuplas de uma única consulta desnormalizada).
+
+Roda em um SQLite em memória, contando as consultas emitidas.
+
+Uso: python benchmark_serializacao.py --transacoes 10000
+"""
+
+import argparse
+import random
+import time
+import warnings
+from datetime import date
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import SAWarning
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from financial import db, Conta, Categoria, FormaPagamento, TipoGasto, Periodicidade, Transacao
+from seed_data import (CONTAS_PADRAO, CATEGORIAS_SAIDA_PADRAO, FORMAS_PAGAMENTO_PADRAO,
+                       TIPOS_GASTO_PADRAO, PERIODICIDADES_PADRAO)
+
+def popular(session, quantidade: int):
+    """Tabelas de apoio de seed_data.py e transações que as referenciam"""
+    rng = random.Random(42)
+    apoio = {
+        Conta: CONTAS_PADRAO,
+        Categoria: CATEGORIAS_SAIDA_PADRAO,
+        FormaPagamento: FORMAS_PAGAMENTO_PADRAO,
+        TipoGasto: TIPOS_GASTO_PADRAO,
+        Periodicidade: PERIODICIDADES_PADRAO,
+    }
+    ids = {}
+    for model, rows in apoio.items():
+        objetos = [model(**row) for row in rows]
+        session.add_all(objetos)
+        session.flush()
+        ids[model] = [o.id for o in objetos]
+
+    for i in range(quantidade):
+        data_transacao = date(2025, rng.randint(1, 12), rng.randint(1, 28))
+        session.add(Transacao(
+            tipo="saida", descricao=f"Transação {i}", valor=round(rng.uniform(5, 500), 2),
+            data_transacao=data_transacao, mes_referencia=data_transacao.month, ano_referencia=2025,
+            conta_id=rng.choice(ids[Conta]), categoria_id=rng.choice(ids[Categoria]),
+            forma_pagamento_id=rng.choice(ids[FormaPagamento]), tipo_gasto_id=rng.choice(ids[TipoGasto]),
+            periodicidade_id=rng.choice(ids[Periodicidade]),
+        ))
+    session.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transacoes", type=int, default=10000)
+    args = parser.parse_args()
+
+    # SQLite não tem DECIMAL nativo; o aviso não interessa aqui
+    warnings.filterwarnings("ignore", category=SAWarning)
+
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    db.metadata.create_all(engine)
+    consultas = []
+    event.listen(engine, "before_cursor_execute", lambda *a: consultas.append(1))
+
+    with Session(engine) as session:
+        popular(session, args.transacoes)
+
+    caminhos = {
+        "lazy": lambda s: [t.to_dict() for t in s.scalars(db.select(Transacao))],
+        "joinedload": lambda s: [t.to_dict() for t in s.scalars(Transacao.consulta_serializacao()).unique()],
+        "tuplas": lambda s: [Transacao.linha_to_dict(l) for l in s.execute(Transacao.consulta_compacta())],
+    }
+
+    print(f"🔗 Serialização de {args.transacoes} transações com 5 relacionamentos\n")
+    print(f"{'caminho':<12}{'tempo (ms)':>12}{'consultas':>12}")
+
+    resultados = {}
+    for nome, funcao in caminhos.items():
+        # Sessão nova por caminho: sem objetos já carregados no identity map
+        with Session(engine) as session:
+            consultas.clear()
+            inicio = time.perf_counter()
+            resultados[nome] = sorted(funcao(session), key=lambda t: t["id"])
+            duracao = time.perf_counter() - inicio
+        print(f"{nome:<12}{duracao * 1000:>12.1f}{len(consultas):>12}")
+
+    if not resultados["lazy"] == resultados["joinedload"] == resultados["tuplas"]:
+        print("\n❌ Os caminhos serializam resultados diferentes")
+        return 1
+    print("\n✅ Resultados idênticos")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,96 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+class TTLCache:
+    """
+    Cache em memória do processo, com expiração por TTL e descarte LRU.
+    Seguro para workers Flask com threads. Cada processo tem o seu cache,
+    então entre workers uma escrita pode levar até o TTL para aparecer.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()  # chave -> (valor, expira_em)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Retorna (encontrado, valor)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > time.monotonic():
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return True, entry[0]
+            if entry:
+                del self._entries[key]
+                self.evictions += 1
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader):
+        """Read-through: retorna o valor em cache ou carrega e armazena"""
+        found, value = self.get(key)
+        if found:
+            return value
+        value = loader()
+        self.set(key, value)
+        return value
+
+    def invalidate(self, predicate=None):
+        """Remove as entradas cuja chave satisfaz o predicado (todas, se omitido)"""
+        with self._lock:
+            keys = [k for k in self._entries if predicate is None or predicate(k)]
+            for key in keys:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        """Métricas do cache"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
+
+# Cache das tabelas de apoio (contas, categorias, formas de pagamento, tipos de gasto, periodicidades)
+lookup_cache = TTLCache(
+    ttl=float(os.getenv("LOOKUP_CACHE_TTL", "300")),
+    max_size=int(os.getenv("LOOKUP_CACHE_MAX_SIZE", "1024")),
+)
+
+# Cronogramas de parcelas por parcelamento (ver cronograma.py)
+cronograma_cache = TTLCache(
+    ttl=float(os.getenv("CRONOGRAMA_CACHE_TTL", "3600")),
+    max_size=int(os.getenv("CRONOGRAMA_CACHE_MAX_SIZE", "4096")),
+)
+
+# Previsões de fluxo de caixa, chaveadas pelo validador dos dados do usuário
+previsao_cache = TTLCache(
+    ttl=float(os.getenv("PREVISAO_CACHE_TTL", "3600")),
+    max_size=int(os.getenv("PREVISAO_CACHE_MAX_SIZE", "1024")),
+)
+
+def get_cache_stats() -> dict:
+    """Métricas dos caches do processo"""
+    return {
+        "lookup": lookup_cache.stats(),
+        "cronograma": cronograma_cache.stats(),
+        "previsao": previsao_cache.stats(),
+    }
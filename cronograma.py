@@ -0,0 +1,150 @@
+import calendar
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+
+from cache import cronograma_cache
+
+# Cronograma de parcelas dos parcelamentos. Os valores são calculados em
+# centavos inteiros (sem float): a parcela base é valor_total // parcelas e
+# o resto da divisão vai para a última parcela, então a soma das parcelas é
+# sempre exatamente o valor_total. O NumPy é importado sob demanda, para
+# não pesar no cold start das rotas que não projetam parcelas.
+
+def para_centavos(valor) -> int:
+    """Valor monetário (str, float ou Decimal) em centavos inteiros"""
+    return int((Decimal(str(valor)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+def para_reais(centavos: int) -> float:
+    """Centavos inteiros no valor em reais serializado pela API"""
+    return float(Decimal(int(centavos)).scaleb(-2))
+
+def valor_parcela(valor_total, parcelas_total: int) -> float:
+    """Valor das parcelas regulares (a última recebe o resto da divisão)"""
+    return para_reais(para_centavos(valor_total) // int(parcelas_total))
+
+def indice_mes(ano: int, mes: int) -> int:
+    """Mês como inteiro contínuo (ano * 12 + mes - 1), para aritmética de meses"""
+    return ano * 12 + mes - 1
+
+def mes_do_indice(indice: int) -> tuple:
+    """(ano, mes) do índice de indice_mes"""
+    return int(indice) // 12, int(indice) % 12 + 1
+
+def vencimento(primeira: date, indice: int) -> date:
+    """Data de vencimento no mês do índice, no dia da primeira parcela (limitado ao fim do mês)"""
+    ano, mes = mes_do_indice(indice)
+    return date(ano, mes, min(primeira.day, calendar.monthrange(ano, mes)[1]))
+
+def para_data(valor) -> date:
+    """Data de uma coluna DATE (date ou string ISO)"""
+    return valor if isinstance(valor, date) else date.fromisoformat(str(valor)[:10])
+
+def gerar_cronograma(parcelamento: dict) -> dict:
+    """
+    Cronograma completo de um parcelamento, como arrays NumPy alinhados:
+    numero (1..parcelas_total), mes (índice de indice_mes) e centavos.
+    """
+    import numpy as np
+
+    total = int(parcelamento["parcelas_total"])
+    primeira = para_data(parcelamento["data_primeira_parcela"])
+    valor_total = para_centavos(parcelamento["valor_total"])
+
+    centavos = np.full(total, valor_total // total, dtype=np.int64)
+    centavos[-1] += valor_total % total
+    return {
+        "numero": np.arange(1, total + 1, dtype=np.int64),
+        "mes": np.arange(total, dtype=np.int64) + indice_mes(primeira.year, primeira.month),
+        "centavos": centavos,
+        "primeira": primeira,
+    }
+
+def cronograma(parcelamento: dict) -> dict:
+    """
+    Cronograma do parcelamento, em cache. A chave inclui updated_at, então uma
+    edição feita por outro worker também gera um cronograma novo; no worker
+    que edita, Parcelamento.update/delete descartam a entrada antiga.
+    """
+    chave = (parcelamento["id"], parcelamento.get("updated_at"))
+    return cronograma_cache.get_or_load(chave, lambda: gerar_cronograma(parcelamento))
+
+def invalidar_cronograma(parcelamento_id: str):
+    """Descarta os cronogramas em cache do parcelamento"""
+    cronograma_cache.invalidate(lambda chave: chave[0] == parcelamento_id)
+
+def parcelas_pendentes(parcelamentos: list, inicio: int, meses: int, incluir_atrasadas: bool = False) -> dict:
+    """
+    Parcelas pendentes (número > parcelas_pagas) dos parcelamentos ativos nos
+    `meses` meses a partir do índice `inicio`, como arrays NumPy alinhados:
+    origem (posição em ativos), numero, posicao (mês relativo a inicio),
+    centavos e atrasada. Com incluir_atrasadas, as parcelas não pagas de
+    meses anteriores a inicio entram na posição 0, marcadas como atrasadas;
+    sem ele, são ignoradas.
+    """
+    import numpy as np
+
+    ativos = [p for p in parcelamentos if p.get("status", "ativo") == "ativo" and int(p["parcelas_total"]) > 0]
+    vazio = np.zeros(0, dtype=np.int64)
+    if not ativos:
+        return {"ativos": [], "cronogramas": [], "origem": vazio, "numero": vazio, "posicao": vazio,
+                "centavos": vazio, "atrasada": vazio.astype(bool)}
+
+    cronogramas = [cronograma(p) for p in ativos]
+    origem = np.concatenate([np.full(len(c["numero"]), i, dtype=np.int64) for i, c in enumerate(cronogramas)])
+    numero = np.concatenate([c["numero"] for c in cronogramas])
+    mes_parcela = np.concatenate([c["mes"] for c in cronogramas])
+    centavos = np.concatenate([c["centavos"] for c in cronogramas])
+    pagas = np.array([int(p.get("parcelas_pagas") or 0) for p in ativos], dtype=np.int64)
+
+    atrasada = (mes_parcela < inicio) if incluir_atrasadas else np.zeros(len(numero), dtype=bool)
+    pendente = (numero > pagas[origem]) & ((mes_parcela >= inicio) | atrasada) & (mes_parcela < inicio + meses)
+    return {
+        "ativos": ativos,
+        "cronogramas": cronogramas,
+        "origem": origem[pendente],
+        "numero": numero[pendente],
+        "posicao": np.maximum(mes_parcela[pendente] - inicio, 0),
+        "centavos": centavos[pendente],
+        "atrasada": atrasada[pendente],
+    }
+
+def projetar(parcelamentos: list, ano: int, mes: int, meses: int) -> list:
+    """
+    Parcelas pendentes dos parcelamentos ativos nos `meses` meses a partir de
+    mes/ano, agrupadas por mês. Parcelas não pagas de meses anteriores entram
+    no primeiro mês com atrasada = True (e o vencimento original). Os totais
+    mensais são somados em centavos com np.add.at sobre os cronogramas concatenados.
+    """
+    import numpy as np
+
+    inicio = indice_mes(ano, mes)
+    pendentes = parcelas_pendentes(parcelamentos, inicio, meses, incluir_atrasadas=True)
+    ativos, cronogramas = pendentes["ativos"], pendentes["cronogramas"]
+
+    totais = np.zeros(meses, dtype=np.int64)
+    np.add.at(totais, pendentes["posicao"], pendentes["centavos"])
+
+    meses_projecao = [
+        {"ano": a, "mes": m, "total": para_reais(total), "parcelas": []}
+        for (a, m), total in zip((mes_do_indice(inicio + i) for i in range(meses)), totais)
+    ]
+
+    for i, n, p, c, atrasada in zip(pendentes["origem"], pendentes["numero"], pendentes["posicao"],
+                                    pendentes["centavos"], pendentes["atrasada"]):
+        parcelamento = ativos[i]
+        mes_vencimento = inicio + p if not atrasada else cronogramas[i]["mes"][n - 1]
+        meses_projecao[p]["parcelas"].append({
+            "parcelamento_id": parcelamento["id"],
+            "descricao": parcelamento["descricao"],
+            "numero": int(n),
+            "parcelas_total": int(parcelamento["parcelas_total"]),
+            "valor": para_reais(c),
+            "vencimento": vencimento(cronogramas[i]["primeira"], mes_vencimento).isoformat(),
+            "atrasada": bool(atrasada),
+            "conta_id": parcelamento.get("conta_id"),
+            "categoria_id": parcelamento.get("categoria_id"),
+        })
+
+    for projecao in meses_projecao:
+        projecao["parcelas"].sort(key=lambda parcela: parcela["vencimento"])
+    return meses_projecao
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Substituto local (em memória) do cliente Supabase, usado em benchmarks.
+
+Implementa o subconjunto da API de consultas do supabase-py usado por
+supabase_models.py (table/select/eq/order/execute e rpc), simulando a
+latência de cada round-trip ao PostgREST e contabilizando os bytes
+transferidos em JSON.
+"""
+
+import heapq
+import json
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+# Item da projeção do PostgREST: "alias:tabela(c1, c2)" ou uma coluna simples
+_ITEM_PROJECAO = re.compile(r'(\w+):(\w+)\(([^)]*)\)|([\w*]+)')
+
+def _parse_colunas(colunas: str) -> list:
+    """"a, alias:tabela(c, d)" -> [('a', None), ('alias', ('tabela', ['c', 'd']))]"""
+    return [
+        (alias, (tabela, [c.strip() for c in internas.split(',')])) if alias else (coluna, None)
+        for alias, tabela, internas, coluna in _ITEM_PROJECAO.findall(colunas)
+    ]
+
+class FakeQuery:
+    def __init__(self, client, table_name):
+        self.client = client
+        self.table_name = table_name
+        self._operacao = 'select'
+        self._colunas = '*'
+        self._payload = None
+        self._filtros = []
+        self._negar = False
+        self._ordem = []
+        self._limite = None
+
+    def select(self, columns: str = "*", count=None):
+        self._operacao = 'select'
+        self._colunas = columns
+        return self
+
+    def insert(self, data, count=None, returning=None, upsert=False):
+        self._operacao = 'insert'
+        self._payload = data
+        return self
+
+    def upsert(self, data, count=None, returning=None, ignore_duplicates=False, on_conflict=''):
+        self._operacao = 'upsert'
+        self._payload = data
+        self._on_conflict = [c.strip() for c in on_conflict.split(',') if c.strip()] or ['id']
+        self._ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, data):
+        self._operacao = 'update'
+        self._payload = data
+        return self
+
+    def delete(self):
+        self._operacao = 'delete'
+        return self
+
+    @property
+    def not_(self):
+        self._negar = True
+        return self
+
+    def _filtro(self, condicao):
+        if self._negar:
+            self._negar = False
+            self._filtros.append(lambda r: not condicao(r))
+        else:
+            self._filtros.append(condicao)
+
+    def eq(self, column, value):
+        self._filtro(lambda r: r.get(column) == value)
+        return self
+
+    def neq(self, column, value):
+        self._filtro(lambda r: r.get(column) != value)
+        return self
+
+    def gt(self, column, value):
+        self._filtro(lambda r: r.get(column) is not None and r.get(column) > value)
+        return self
+
+    def gte(self, column, value):
+        self._filtro(lambda r: r.get(column) is not None and r.get(column) >= value)
+        return self
+
+    def lt(self, column, value):
+        self._filtro(lambda r: r.get(column) is not None and r.get(column) < value)
+        return self
+
+    def in_(self, column, values):
+        self._filtro(lambda r: r.get(column) in values)
+        return self
+
+    def is_(self, column, value):
+        esperado = None if value in (None, 'null') else value
+        self._filtro(lambda r: r.get(column) is esperado or r.get(column) == esperado)
+        return self
+
+    def order(self, column, desc=False):
+        self._ordem.append((column, desc))
+        return self
+
+    def limit(self, size):
+        self._limite = size
+        return self
+
+    def _projetar(self, linha):
+        projetada = {}
+        for coluna, embutido in _parse_colunas(self._colunas):
+            if embutido:
+                # Recurso embutido alias:tabela(colunas), pela chave estrangeira <alias>_id
+                tabela, colunas = embutido
+                chave = linha.get(f'{coluna}_id')
+                relacionada = next((r for r in self.client.tables.get(tabela, []) if r.get('id') == chave), None)
+                projetada[coluna] = {c: relacionada.get(c) for c in colunas} if relacionada else None
+            elif coluna == '*':
+                projetada.update(linha)
+            else:
+                projetada[coluna] = linha.get(coluna)
+        return projetada
+
+    def execute(self):
+        linhas = self.client.tables.setdefault(self.table_name, [])
+
+        if self._operacao == 'insert':
+            novas = self._payload if isinstance(self._payload, list) else [self._payload]
+            inseridas = []
+            agora = datetime.now(timezone.utc).isoformat()
+            for nova in novas:
+                linha = {'id': str(uuid.uuid4()), 'created_at': agora, 'updated_at': agora, **nova}
+                linhas.append(linha)
+                inseridas.append(linha)
+            return self.client._responder(inseridas)
+
+        if self._operacao == 'upsert':
+            novas = self._payload if isinstance(self._payload, list) else [self._payload]
+            existentes = {tuple(r.get(c) for c in self._on_conflict): r for r in linhas}
+            agora = datetime.now(timezone.utc).isoformat()
+            afetadas = []
+            for nova in novas:
+                existente = existentes.get(tuple(nova.get(c) for c in self._on_conflict))
+                if existente is None:
+                    linha = {'id': str(uuid.uuid4()), 'created_at': agora, 'updated_at': agora, **nova}
+                    linhas.append(linha)
+                    existentes[tuple(nova.get(c) for c in self._on_conflict)] = linha
+                    afetadas.append(linha)
+                elif not self._ignore_duplicates:
+                    existente.update(nova, updated_at=agora)
+                    afetadas.append(existente)
+            return self.client._responder(afetadas)
+
+        selecionadas = [r for r in linhas if all(f(r) for f in self._filtros)]
+
+        if self._operacao == 'update':
+            for linha in selecionadas:
+                # Equivalente ao trigger update_updated_at_column
+                linha.update(self._payload, updated_at=datetime.now(timezone.utc).isoformat())
+            return self.client._responder(selecionadas)
+
+        if self._operacao == 'delete':
+            ids = {id(r) for r in selecionadas}
+            linhas[:] = [r for r in linhas if id(r) not in ids]
+            return self.client._responder(selecionadas)
+
+        for coluna, desc in reversed(self._ordem):
+            selecionadas.sort(key=lambda r: (r.get(coluna) is None, r.get(coluna)), reverse=desc)
+        if self._limite is not None:
+            selecionadas = selecionadas[:self._limite]
+
+        return self.client._responder([self._projetar(r) for r in selecionadas])
+
+class FakeRpc:
+    def __init__(self, client, fn, params):
+        self.client = client
+        self.fn = fn
+        self.params = params or {}
+
+    def execute(self):
+        funcao = RPC_FUNCTIONS.get(self.fn)
+        if funcao is None:
+            raise Exception(f"Função RPC desconhecida: {self.fn}")
+        return self.client._responder(funcao(self.client.tables, **self.params))
+
+class FakeSupabaseClient:
+    """Cliente em memória com latência simulada por round-trip"""
+
+    def __init__(self, tables=None, latency: float = 0.0):
+        self.tables = tables if tables is not None else {}
+        self.latency = latency
+        self.requests = 0
+        self.bytes_transferred = 0
+
+    def table(self, table_name: str) -> FakeQuery:
+        return FakeQuery(self, table_name)
+
+    def rpc(self, fn: str, params=None) -> FakeRpc:
+        return FakeRpc(self, fn, params)
+
+    def reset_stats(self):
+        self.requests = 0
+        self.bytes_transferred = 0
+
+    def _responder(self, data):
+        # Serializar como o PostgREST faria, para medir o volume trafegado
+        payload = json.dumps(data, default=str)
+        self.requests += 1
+        self.bytes_transferred += len(payload.encode('utf-8'))
+        if self.latency:
+            time.sleep(self.latency)
+        return FakeResponse(json.loads(payload))
+
+# Implementações em Python das funções de supabase_setup.sql
+RPC_FUNCTIONS = {}
+
+def _rpc(nome):
+    def registrar(funcao):
+        RPC_FUNCTIONS[nome] = funcao
+        return funcao
+    return registrar
+
+@_rpc('balanco_anual')
+def _balanco_anual(tables, p_ano, p_user_id=None):
+    totais = {}
+    for t in tables.get('transacoes', []):
+        if t['ano_referencia'] != p_ano:
+            continue
+        if p_user_id is not None and t.get('user_id') != p_user_id:
+            continue
+        linha = totais.setdefault(t['mes_referencia'], {
+            'mes_referencia': t['mes_referencia'], 'entradas': 0, 'saidas': 0
+        })
+        if t['tipo'] == 'entrada':
+            linha['entradas'] += t['valor']
+        elif t['tipo'] == 'saida':
+            linha['saidas'] += t['valor']
+    return [totais[mes] for mes in sorted(totais)]
+
+_TABELAS_DIMENSAO = {
+    'categoria': 'categorias',
+    'forma_pagamento': 'formas_pagamento',
+    'tipo_gasto': 'tipos_gasto',
+    'periodicidade': 'periodicidades',
+}
+
+@_rpc('resumo_transacoes')
+def _resumo_transacoes(tables, p_dimensao, p_mes=None, p_ano=None, p_tipo=None, p_user_id=None):
+    tabela = _TABELAS_DIMENSAO.get(p_dimensao)
+    if tabela is None:
+        raise Exception(f"Dimensão de resumo inválida: {p_dimensao}")
+    nomes = {d['id']: d['nome'] for d in tables.get(tabela, [])}
+
+    totais = {}
+    for t in tables.get('transacoes', []):
+        if p_mes is not None and t['mes_referencia'] != p_mes:
+            continue
+        if p_ano is not None and t['ano_referencia'] != p_ano:
+            continue
+        if p_tipo is not None and t['tipo'] != p_tipo:
+            continue
+        if p_user_id is not None and t.get('user_id') != p_user_id:
+            continue
+        chave = t.get(f'{p_dimensao}_id')
+        chave = chave if chave in nomes else None
+        totais[chave] = totais.get(chave, 0) + t['valor']
+
+    linhas = [{'id': k, 'nome': nomes.get(k), 'total': v} for k, v in totais.items()]
+    return sorted(linhas, key=lambda l: l['total'], reverse=True)
+
+@_rpc('resumo_mes_agrupado')
+def _resumo_mes_agrupado(tables, p_mes, p_ano, p_user_id=None):
+    nomes = {
+        dimensao: {d['id']: d['nome'] for d in tables.get(tabela, [])}
+        for dimensao, tabela in _TABELAS_DIMENSAO.items()
+    }
+
+    grupos = {}
+    for t in tables.get('transacoes', []):
+        if t['mes_referencia'] != p_mes or t['ano_referencia'] != p_ano:
+            continue
+        if p_user_id is not None and t.get('user_id') != p_user_id:
+            continue
+        ids = tuple(
+            t.get(f'{d}_id') if t.get(f'{d}_id') in nomes[d] else None
+            for d in _TABELAS_DIMENSAO
+        )
+        grupo = grupos.get((t['tipo'],) + ids)
+        if grupo is None:
+            grupo = {'tipo': t['tipo'], 'quantidade': 0, 'total': 0}
+            for dimensao, chave in zip(_TABELAS_DIMENSAO, ids):
+                grupo[f'{dimensao}_id'] = chave
+                grupo[dimensao] = nomes[dimensao].get(chave)
+            grupos[(t['tipo'],) + ids] = grupo
+        grupo['quantidade'] += 1
+        grupo['total'] += t['valor']
+    return list(grupos.values())
+
+@_rpc('resumo_diario')
+def _resumo_diario(tables, p_inicio, p_fim, p_user_id=None):
+    dias = {}
+    for t in tables.get('transacoes', []):
+        if not p_inicio <= t['data_transacao'] < p_fim:
+            continue
+        if p_user_id is not None and t.get('user_id') != p_user_id:
+            continue
+        dia = dias.setdefault(t['data_transacao'], {
+            'data_transacao': t['data_transacao'], 'quantidade': 0, 'entradas': 0, 'saidas': 0
+        })
+        dia['quantidade'] += 1
+        dia['entradas' if t['tipo'] == 'entrada' else 'saidas'] += t['valor']
+    return [dias[d] for d in sorted(dias)]
+
+@_rpc('transacoes_pagina')
+def _transacoes_pagina(tables, p_limite, p_cursor_data=None, p_cursor_id=None,
+                       p_mes=None, p_ano=None, p_user_id=None):
+    linhas = []
+    for t in tables.get('transacoes', []):
+        if p_mes is not None and t['mes_referencia'] != p_mes:
+            continue
+        if p_ano is not None and t['ano_referencia'] != p_ano:
+            continue
+        if p_user_id is not None and t.get('user_id') != p_user_id:
+            continue
+        if p_cursor_data is not None and (t['data_transacao'], t['id']) >= (p_cursor_data, p_cursor_id):
+            continue
+        linhas.append(t)
+    return heapq.nlargest(p_limite, linhas, key=lambda t: (t['data_transacao'], t['id']))
+
+@_rpc('validador_dados')
+def _validador_dados(tables, p_tabelas, p_mes=None, p_ano=None, p_user_id=None, p_dia=None):
+    ultima, quantidade = None, 0
+    for tabela in p_tabelas:
+        for linha in tables.get(tabela, []):
+            if tabela == 'transacoes':
+                if p_mes is not None and linha['mes_referencia'] != p_mes:
+                    continue
+                if p_ano is not None and linha['ano_referencia'] != p_ano:
+                    continue
+                if p_dia is not None and linha['data_transacao'] != p_dia:
+                    continue
+            if p_user_id is not None and linha.get('user_id') not in (p_user_id, None):
+                continue
+            quantidade += 1
+            if linha.get('updated_at') and (ultima is None or linha['updated_at'] > ultima):
+                ultima = linha['updated_at']
+    return [{'ultima_atualizacao': ultima, 'quantidade': quantidade}]
@@ -1,18 +1,33 @@
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from sqlalchemy.orm import joinedload
+from datetime import datetime, timezone
 from decimal import Decimal
+import uuid
 
 db = SQLAlchemy()
 
+# Esquema equivalente ao de supabase_setup.sql, usado pelo backend local
+# (STORAGE_BACKEND=sqlalchemy): IDs UUID em texto e user_id sem chave
+# estrangeira, pois não há auth.users fora do Supabase
+
+def gerar_uuid():
+    return str(uuid.uuid4())
+
+def agora():
+    return datetime.now(timezone.utc)
+
 class Conta(db.Model):
     __tablename__ = 'contas'
     
-    id = db.Column(db.Integer, primary_key=True)
+    id = db.Column(db.String(36), primary_key=True, default=gerar_uuid)
+    user_id = db.Column(db.String(36))
     nome = db.Column(db.String(100), nullable=False)
-    logo_url = db.Column(db.String(255))
+    logo_url = db.Column(db.Text)
     saldo = db.Column(db.Numeric(10, 2), default=0.00)
+    saldo_inicial = db.Column(db.Numeric(10, 2), default=0.00)
     ativo = db.Column(db.Boolean, default=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime(timezone=True), default=agora)
+    updated_at = db.Column(db.DateTime(timezone=True), default=agora, onupdate=agora)
     
     # Relacionamentos
     transacoes = db.relationship('Transacao', backref='conta', lazy=True)
@@ -20,13 +35,15 @@ class Conta(db.Model):
 class Categoria(db.Model):
     __tablename__ = 'categorias'
     
-    id = db.Column(db.Integer, primary_key=True)
+    id = db.Column(db.String(36), primary_key=True, default=gerar_uuid)
+    user_id = db.Column(db.String(36))
     nome = db.Column(db.String(100), nullable=False)
-    tipo = db.Column(db.String(20), nullable=False)  # 'entrada' ou 'saida'
+    tipo = db.Column(db.String(20), nullable=False)  # 'Receita' ou 'Despesa'
     cor = db.Column(db.String(7))  # hex color
     icone = db.Column(db.String(50))
     ativo = db.Column(db.Boolean, default=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime(timezone=True), default=agora)
+    updated_at = db.Column(db.DateTime(timezone=True), default=agora, onupdate=agora)
     
     # Relacionamentos
     transacoes = db.relationship('Transacao', backref='categoria', lazy=True)
@@ -34,11 +51,13 @@ class Categoria(db.Model):
 class FormaPagamento(db.Model):
     __tablename__ = 'formas_pagamento'
     
-    id = db.Column(db.Integer, primary_key=True)
+    id = db.Column(db.String(36), primary_key=True, default=gerar_uuid)
+    user_id = db.Column(db.String(36))
     nome = db.Column(db.String(50), nullable=False)
     icone = db.Column(db.String(50))
     ativo = db.Column(db.Boolean, default=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime(timezone=True), default=agora)
+    updated_at = db.Column(db.DateTime(timezone=True), default=agora, onupdate=agora)
     
     # Relacionamentos
     transacoes = db.relationship('Transacao', backref='forma_pagamento', lazy=True)
@@ -46,11 +65,13 @@ class FormaPagamento(db.Model):
 class TipoGasto(db.Model):
     __tablename__ = 'tipos_gasto'
     
-    id = db.Column(db.Integer, primary_key=True)
+    id = db.Column(db.String(36), primary_key=True, default=gerar_uuid)
+    user_id = db.Column(db.String(36))
     nome = db.Column(db.String(50), nullable=False)  # Essencial, Não Essencial, Investimento
     cor = db.Column(db.String(7))  # hex color
     ativo = db.Column(db.Boolean, default=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime(timezone=True), default=agora)
+    updated_at = db.Column(db.DateTime(timezone=True), default=agora, onupdate=agora)
     
     # Relacionamentos
     transacoes = db.relationship('Transacao', backref='tipo_gasto', lazy=True)
@@ -58,18 +79,30 @@ class TipoGasto(db.Model):
 class Periodicidade(db.Model):
     __tablename__ = 'periodicidades'
     
-    id = db.Column(db.Integer, primary_key=True)
+    id = db.Column(db.String(36), primary_key=True, default=gerar_uuid)
+    user_id = db.Column(db.String(36))
     nome = db.Column(db.String(50), nullable=False)  # Fixo, Variável
     ativo = db.Column(db.Boolean, default=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime(timezone=True), default=agora)
+    updated_at = db.Column(db.DateTime(timezone=True), default=agora, onupdate=agora)
     
     # Relacionamentos
     transacoes = db.relationship('Transacao', backref='periodicidade', lazy=True)
 
 class Transacao(db.Model):
     __tablename__ = 'transacoes'
+    __table_args__ = (
+        db.Index('transacoes_usuario_mes_data_idx', 'user_id', 'ano_referencia', 'mes_referencia', 'data_transacao', 'id'),
+        db.Index('transacoes_mes_data_idx', 'ano_referencia', 'mes_referencia', 'data_transacao', 'id'),
+        db.Index('transacoes_data_idx', 'data_transacao', 'id'),
+        db.Index('transacoes_conta_data_idx', 'conta_id', 'data_transacao', 'id'),
+        db.Index('transacoes_conta_id_externo_key', 'conta_id', 'id_externo', unique=True,
+                 sqlite_where=db.text('id_externo IS NOT NULL'),
+                 postgresql_where=db.text('id_externo IS NOT NULL')),
+    )
     
-    id = db.Column(db.Integer, primary_key=True)
+    id = db.Column(db.String(36), primary_key=True, default=gerar_uuid)
+    user_id = db.Column(db.String(36))
     tipo = db.Column(db.String(20), nullable=False)  # 'entrada' ou 'saida'
     descricao = db.Column(db.String(255), nullable=False)
     valor = db.Column(db.Numeric(10, 2), nullable=False)
@@ -77,17 +110,61 @@ class Transacao(db.Model):
     mes_referencia = db.Column(db.Integer, nullable=False)  # 1-12
     ano_referencia = db.Column(db.Integer, nullable=False)
     observacoes = db.Column(db.Text)
+    id_externo = db.Column(db.String(255))  # identificador no extrato importado (FITID ou hash)
     
     # Chaves estrangeiras
-    conta_id = db.Column(db.Integer, db.ForeignKey('contas.id'), nullable=False)
-    categoria_id = db.Column(db.Integer, db.ForeignKey('categorias.id'), nullable=False)
-    forma_pagamento_id = db.Column(db.Integer, db.ForeignKey('formas_pagamento.id'), nullable=False)
-    tipo_gasto_id = db.Column(db.Integer, db.ForeignKey('tipos_gasto.id'))
-    periodicidade_id = db.Column(db.Integer, db.ForeignKey('periodicidades.id'))
+    conta_id = db.Column(db.String(36), db.ForeignKey('contas.id', ondelete='CASCADE'), index=True)
+    categoria_id = db.Column(db.String(36), db.ForeignKey('categorias.id', ondelete='CASCADE'), index=True)
+    forma_pagamento_id = db.Column(db.String(36), db.ForeignKey('formas_pagamento.id', ondelete='CASCADE'))
+    tipo_gasto_id = db.Column(db.String(36), db.ForeignKey('tipos_gasto.id', ondelete='SET NULL'))
+    periodicidade_id = db.Column(db.String(36), db.ForeignKey('periodicidades.id', ondelete='SET NULL'))
     
     # Campos de auditoria
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime(timezone=True), default=agora)
+    updated_at = db.Column(db.DateTime(timezone=True), default=agora, onupdate=agora)
+    
+    # Relacionamentos lidos por to_dict
+    RELACIONAMENTOS = ('conta', 'categoria', 'forma_pagamento', 'tipo_gasto', 'periodicidade')
+    
+    @classmethod
+    def consulta_serializacao(cls):
+        """SELECT com os relacionamentos de to_dict carregados no mesmo JOIN (sem N+1)"""
+        return db.select(cls).options(*(joinedload(getattr(cls, r)) for r in cls.RELACIONAMENTOS))
+    
+    @classmethod
+    def consulta_compacta(cls):
+        """
+        SELECT desnormalizado que devolve tuplas (Row) em vez de instâncias ORM,
+        com os nomes das tabelas de apoio resolvidos por LEFT JOIN
+        """
+        return (
+            db.select(
+                cls.id, cls.tipo, cls.descricao, cls.valor, cls.data_transacao,
+                cls.mes_referencia, cls.ano_referencia, cls.observacoes,
+                Conta.nome.label('conta'),
+                Categoria.nome.label('categoria'),
+                FormaPagamento.nome.label('forma_pagamento'),
+                TipoGasto.nome.label('tipo_gasto'),
+                Periodicidade.nome.label('periodicidade'),
+                cls.created_at, cls.updated_at,
+            )
+            .outerjoin(Conta, Conta.id == cls.conta_id)
+            .outerjoin(Categoria, Categoria.id == cls.categoria_id)
+            .outerjoin(FormaPagamento, FormaPagamento.id == cls.forma_pagamento_id)
+            .outerjoin(TipoGasto, TipoGasto.id == cls.tipo_gasto_id)
+            .outerjoin(Periodicidade, Periodicidade.id == cls.periodicidade_id)
+        )
+    
+    @staticmethod
+    def linha_to_dict(linha):
+        """Serializa uma linha de consulta_compacta no mesmo formato de to_dict"""
+        return {
+            **linha._asdict(),
+            'valor': float(linha.valor),
+            'data_transacao': linha.data_transacao.isoformat(),
+            'created_at': linha.created_at.isoformat(),
+            'updated_at': linha.updated_at.isoformat()
+        }
     
     def to_dict(self):
         return {
@@ -111,7 +188,8 @@ class Transacao(db.Model):
 class Meta(db.Model):
     __tablename__ = 'metas'
     
-    id = db.Column(db.Integer, primary_key=True)
+    id = db.Column(db.String(36), primary_key=True, default=gerar_uuid)
+    user_id = db.Column(db.String(36), index=True)
     nome = db.Column(db.String(255), nullable=False)
     descricao = db.Column(db.Text)
     valor_objetivo = db.Column(db.Numeric(10, 2), nullable=False)
@@ -119,13 +197,18 @@ class Meta(db.Model):
     data_inicio = db.Column(db.Date, nullable=False)
     data_fim = db.Column(db.Date, nullable=False)
     status = db.Column(db.String(20), default='ativa')  # ativa, concluida, cancelada
-    categoria_id = db.Column(db.Integer, db.ForeignKey('categorias.id'))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    categoria_id = db.Column(db.String(36), db.ForeignKey('categorias.id', ondelete='SET NULL'))
+    created_at = db.Column(db.DateTime(timezone=True), default=agora)
+    updated_at = db.Column(db.DateTime(timezone=True), default=agora, onupdate=agora)
     
     # Relacionamentos
     categoria = db.relationship('Categoria', backref='metas')
     
+    @classmethod
+    def consulta_serializacao(cls):
+        """SELECT com a categoria de to_dict carregada no mesmo JOIN (sem N+1)"""
+        return db.select(cls).options(joinedload(cls.categoria))
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -145,23 +228,29 @@ class Meta(db.Model):
 class Parcelamento(db.Model):
     __tablename__ = 'parcelamentos'
     
-    id = db.Column(db.Integer, primary_key=True)
+    id = db.Column(db.String(36), primary_key=True, default=gerar_uuid)
+    user_id = db.Column(db.String(36), index=True)
     descricao = db.Column(db.String(255), nullable=False)
     valor_total = db.Column(db.Numeric(10, 2), nullable=False)
     valor_parcela = db.Column(db.Numeric(10, 2), nullable=False)
     parcelas_total = db.Column(db.Integer, nullable=False)
     parcelas_pagas = db.Column(db.Integer, default=0)
     data_primeira_parcela = db.Column(db.Date, nullable=False)
-    categoria_id = db.Column(db.Integer, db.ForeignKey('categorias.id'), nullable=False)
-    conta_id = db.Column(db.Integer, db.ForeignKey('contas.id'), nullable=False)
+    categoria_id = db.Column(db.String(36), db.ForeignKey('categorias.id', ondelete='CASCADE'))
+    conta_id = db.Column(db.String(36), db.ForeignKey('contas.id', ondelete='CASCADE'))
     status = db.Column(db.String(20), default='ativo')  # ativo, concluido, cancelado
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime(timezone=True), default=agora)
+    updated_at = db.Column(db.DateTime(timezone=True), default=agora, onupdate=agora)
     
     # Relacionamentos
     categoria = db.relationship('Categoria', backref='parcelamentos')
     conta = db.relationship('Conta', backref='parcelamentos')
     
+    @classmethod
+    def consulta_serializacao(cls):
+        """SELECT com categoria e conta de to_dict carregadas no mesmo JOIN (sem N+1)"""
+        return db.select(cls).options(joinedload(cls.categoria), joinedload(cls.conta))
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -178,4 +267,3 @@ class Parcelamento(db.Model):
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
-
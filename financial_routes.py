@@ -1,13 +1,36 @@
-from flask import Blueprint, request, jsonify, g
+from flask import Blueprint, Response, request, jsonify, g, make_response, stream_with_context
 from supabase_models import (
     Conta, Categoria, FormaPagamento, TipoGasto, 
-    Periodicidade, Transacao, Meta, Parcelamento
+    Periodicidade, Transacao, Meta, Parcelamento, ResumoTransacoes, Validador
 )
+from paralelo import executar_em_paralelo, TempoEsgotado, FANOUT_TIMEOUT
+from cronograma import projetar, valor_parcela
+from previsao import prever_saldos, janela_historico
+from importador import ler_extrato, Categorizador, ImportadorExtrato
+from cache import previsao_cache
 from datetime import datetime, date
+from functools import wraps
 import calendar
+import hashlib
+import json
 
 financial_bp = Blueprint("financial", __name__)
 
+# Prazos (segundos) das rotas que disparam consultas em paralelo; padrão
+# FANOUT_TIMEOUT, ajustável por rota
+TIMEOUT_DASHBOARD = FANOUT_TIMEOUT
+TIMEOUT_PAINEL = FANOUT_TIMEOUT
+TIMEOUT_PREVISAO = FANOUT_TIMEOUT
+
+# Horizonte máximo (meses) de /projecao
+MAX_MESES_PROJECAO = 120
+
+# Previsão de fluxo de caixa: horizonte máximo, meses de histórico usados
+# para a média dos lançamentos fixos e tabelas que invalidam a previsão
+MAX_MESES_PREVISAO = 36
+MESES_HISTORICO_PREVISAO = 3
+TABELAS_PREVISAO = ["transacoes", "contas", "periodicidades", "parcelamentos", "metas"]
+
 def get_user_token():
     """Extrai o token do usuário do header Authorization"""
     auth_header = request.headers.get("Authorization")
@@ -21,8 +44,82 @@ def get_user_id():
     # Em produção, isso deve ser extraído do token JWT
     return "550e8400-e29b-41d4-a716-446655440000"
 
+def escopo_mes_ano():
+    """Escopo (mes, ano) da requisição, como informado"""
+    return request.args.get("mes", type=int), request.args.get("ano", type=int)
+
+def escopo_mes_atual():
+    """Escopo (mes, ano) com o mês atual como padrão"""
+    return (
+        request.args.get("mes", type=int, default=datetime.now().month),
+        request.args.get("ano", type=int, default=datetime.now().year)
+    )
+
+def escopo_ano_atual():
+    """Escopo do ano inteiro, com o ano atual como padrão"""
+    return None, request.args.get("ano", type=int, default=datetime.now().year)
+
+def variacao_mes_atual():
+    """mes/ano efetivos (com o mês atual como padrão) para rotas cujo validador cobre mais que o mês"""
+    return escopo_mes_atual()
+
+def conditional_get(tabelas=None, escopo=escopo_mes_ano, variacao=None):
+    """
+    Suporte a GET condicional (ETag / If-None-Match).
+    Com tabelas, o validador é derivado de max(updated_at) e da contagem de
+    linhas no escopo (usuário, mes, ano), em uma consulta barata feita antes
+    da rota; se não mudou, responde 304 sem executar a rota.
+    escopo retorna (mes, ano) ou (mes, ano, dia); se não conseguir derivar o
+    escopo (ex.: data inválida na URL), a rota responde sem validador.
+    variacao, se informada, entra na chave do ETag: valores de que a
+    resposta depende além dos dados (ex.: o mês padrão ou a data de hoje).
+    Sem tabelas (rotas servidas pelo cache de apoio), usa o hash do conteúdo.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not tabelas:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200:
+                    response.add_etag()
+                    response.headers["Cache-Control"] = "private, no-cache"
+                return response.make_conditional(request)
+            
+            try:
+                mes, ano, *dia = escopo()
+                dia = dia[0] if dia else None
+                validador = Validador(get_user_token()).get(tabelas, get_user_id(), mes, ano, dia)
+            except Exception:
+                # Sem validador, responder normalmente
+                return view(*args, **kwargs)
+            
+            ultima_atualizacao = validador["ultima_atualizacao"]
+            chave = f"{request.full_path}|{mes}|{ano}|{dia}|{ultima_atualizacao}|{validador['quantidade']}"
+            if variacao:
+                chave += f"|{variacao()}"
+            etag = hashlib.sha1(chave.encode()).hexdigest()
+            
+            if request.if_none_match.contains(etag):
+                response = make_response("", 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "private, no-cache"
+            if ultima_atualizacao:
+                try:
+                    response.last_modified = datetime.fromisoformat(ultima_atualizacao)
+                except ValueError:
+                    pass
+            return response
+        return wrapper
+    return decorator
+
 # Rotas para Contas
 @financial_bp.route("/contas", methods=["GET"])
+@conditional_get()
 def get_contas():
     try:
         user_id = get_user_id()
@@ -49,6 +146,7 @@ def create_conta():
 
 # Rotas para Categorias
 @financial_bp.route("/categorias", methods=["GET"])
+@conditional_get()
 def get_categorias():
     try:
         user_id = get_user_id()
@@ -77,6 +175,7 @@ def create_categoria():
 
 # Rotas para Formas de Pagamento
 @financial_bp.route("/formas-pagamento", methods=["GET"])
+@conditional_get()
 def get_formas_pagamento():
     try:
         user_id = get_user_id()
@@ -104,6 +203,7 @@ def create_forma_pagamento():
 
 # Rotas para Tipos de Gasto
 @financial_bp.route("/tipos-gasto", methods=["GET"])
+@conditional_get()
 def get_tipos_gasto():
     try:
         user_id = get_user_id()
@@ -131,6 +231,7 @@ def create_tipo_gasto():
 
 # Rotas para Periodicidades
 @financial_bp.route("/periodicidades", methods=["GET"])
+@conditional_get()
 def get_periodicidades():
     try:
         user_id = get_user_id()
@@ -157,16 +258,45 @@ def create_periodicidade():
         return jsonify({"error": str(e)}), 500
 
 # Rotas para Transações
+TRANSACOES_LIMITE_PADRAO = 100
+TRANSACOES_LIMITE_MAXIMO = 1000
+
 @financial_bp.route("/transacoes", methods=["GET"])
+@conditional_get(["transacoes", "contas", "categorias", "formas_pagamento", "tipos_gasto", "periodicidades"])
 def get_transacoes():
     try:
         user_id = get_user_id()
         user_token = get_user_token()
         mes = request.args.get("mes", type=int)
         ano = request.args.get("ano", type=int)
+        limit = request.args.get("limit", type=int)
+        cursor = request.args.get("cursor")
+        formato = request.args.get("formato")
         
         transacao_model = Transacao(user_token)
-        transacoes = transacao_model.get_all(user_id, mes, ano)
+        
+        # Exportação em streaming NDJSON, percorrendo o histórico página a página
+        if formato == "ndjson":
+            page_size = min(limit or TRANSACOES_LIMITE_MAXIMO, TRANSACOES_LIMITE_MAXIMO)
+            
+            def gerar():
+                for transacao in transacao_model.iter_all(user_id, mes, ano, page_size):
+                    yield json.dumps(transacao, default=str, ensure_ascii=False) + "\n"
+            
+            return Response(stream_with_context(gerar()), mimetype="application/x-ndjson")
+        
+        # Paginação por cursor (keyset em data_transacao, id)
+        if limit is not None or cursor:
+            limit = max(1, min(limit or TRANSACOES_LIMITE_PADRAO, TRANSACOES_LIMITE_MAXIMO))
+            try:
+                items, next_cursor = transacao_model.get_page(user_id, mes, ano, limit, cursor)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            return jsonify({"items": items, "next_cursor": next_cursor}), 200
+        
+        # expandir=1: nomes das tabelas de apoio resolvidos no mesmo JOIN
+        expandir = request.args.get("expandir", "").lower() in ("1", "true")
+        transacoes = transacao_model.get_all(user_id, mes, ano, expandir=expandir)
         return jsonify(transacoes), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -174,10 +304,10 @@ def get_transacoes():
 @financial_bp.route("/transacoes", methods=["POST"])
 def create_transacao():
     try:
+        user_id = get_user_id()
         user_token = get_user_token()
         data = request.get_json()
-        # Por enquanto, não exigir user_id para testes
-        # data["user_id"] = get_user_id()
+        data["user_id"] = user_id
         
         # Extrair mês e ano da data da transação
         data_transacao = datetime.strptime(data["data_transacao"], "%Y-%m-%d").date()
@@ -190,6 +320,133 @@ def create_transacao():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Colunas aceitas na importação em lote; todas as linhas de um lote multi-linha
+# precisam ter as mesmas chaves no PostgREST
+CAMPOS_OBRIGATORIOS_TRANSACAO = ("tipo", "descricao", "valor", "data_transacao")
+CAMPOS_OPCIONAIS_TRANSACAO = (
+    "observacoes", "conta_id", "categoria_id", "forma_pagamento_id",
+    "tipo_gasto_id", "periodicidade_id"
+)
+LOTE_LIMITE_MAXIMO = 10000
+
+def preparar_transacao(data, user_id):
+    """Valida uma transação do lote do usuário e deriva mes_referencia/ano_referencia"""
+    if not isinstance(data, dict):
+        raise ValueError("Transação deve ser um objeto JSON")
+    
+    faltando = [c for c in CAMPOS_OBRIGATORIOS_TRANSACAO if data.get(c) in (None, "")]
+    if faltando:
+        raise ValueError(f"Campos obrigatórios ausentes: {', '.join(faltando)}")
+    if data["tipo"] not in ("entrada", "saida"):
+        raise ValueError("Tipo deve ser 'entrada' ou 'saida'")
+    try:
+        valor = float(data["valor"])
+    except (TypeError, ValueError):
+        raise ValueError("Valor inválido")
+    try:
+        data_transacao = date.fromisoformat(str(data["data_transacao"])[:10])
+    except ValueError:
+        raise ValueError("data_transacao deve estar no formato AAAA-MM-DD")
+    
+    transacao = {c: data.get(c) or None for c in CAMPOS_OPCIONAIS_TRANSACAO}
+    transacao.update({
+        "user_id": user_id,
+        "tipo": data["tipo"],
+        "descricao": data["descricao"],
+        "valor": valor,
+        "data_transacao": data_transacao.isoformat(),
+        "mes_referencia": data_transacao.month,
+        "ano_referencia": data_transacao.year
+    })
+    return transacao
+
+def ler_lote_transacoes():
+    """Lê o corpo do lote: array JSON, {"transacoes": [...]} ou NDJSON (uma por linha)"""
+    if request.mimetype == "application/x-ndjson":
+        for linha in request.stream:
+            linha = linha.strip()
+            if not linha:
+                continue
+            try:
+                yield json.loads(linha)
+            except ValueError:
+                yield None
+        return
+    
+    data = request.get_json()
+    if isinstance(data, dict):
+        data = data.get("transacoes")
+    if not isinstance(data, list):
+        raise ValueError("Envie um array de transações")
+    yield from data
+
+@financial_bp.route("/transacoes/lote", methods=["POST"])
+def create_transacoes_lote():
+    try:
+        user_id = get_user_id()
+        user_token = get_user_token()
+        
+        # Validar e derivar mês/ano de todo o lote em uma passada
+        transacoes, indices, erros = [], [], []
+        try:
+            for indice, data in enumerate(ler_lote_transacoes()):
+                if indice >= LOTE_LIMITE_MAXIMO:
+                    return jsonify({"error": f"Lote excede o limite de {LOTE_LIMITE_MAXIMO} transações"}), 400
+                try:
+                    transacoes.append(preparar_transacao(data, user_id))
+                    indices.append(indice)
+                except ValueError as e:
+                    erros.append({"indice": indice, "erro": str(e)})
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        transacao_model = Transacao(user_token)
+        inseridas, falhas = transacao_model.create_many(transacoes)
+        erros.extend({"indice": indices[posicao], "erro": mensagem} for posicao, mensagem in falhas)
+        erros.sort(key=lambda e: e["indice"])
+        
+        status = 207 if erros else 201
+        return jsonify({"inseridas": inseridas, "erros": erros}), status
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@financial_bp.route("/transacoes/importar", methods=["POST"])
+def importar_extrato():
+    """
+    Importa um extrato OFX ou CSV: multipart com o campo "arquivo" ou o
+    arquivo direto no corpo. Parâmetros opcionais (query ou formulário):
+    conta_id, para todos os lançamentos, e formato ("ofx" ou "csv", senão
+    detectado pelo conteúdo). O arquivo é lido em fluxo e gravado em lotes.
+    """
+    try:
+        user_id = get_user_id()
+        user_token = get_user_token()
+        conta_id = request.values.get("conta_id") or None
+        formato = request.values.get("formato") or None
+        
+        arquivo = request.files.get("arquivo")
+        fluxo = arquivo.stream if arquivo else request.stream
+        
+        transacao_model = Transacao(user_token)
+        contas = Conta(user_token).get_all(user_id, "id, nome")
+        if conta_id and not any(str(c["id"]) == conta_id for c in contas):
+            return jsonify({"error": "Conta não encontrada"}), 404
+        
+        categorizador = Categorizador(
+            Categoria(user_token).get_all(user_id, columns="id, nome, tipo"),
+            transacao_model.get_categorizadas(user_id)
+        )
+        importador = ImportadorExtrato(transacao_model, contas, categorizador, user_id, conta_id)
+        try:
+            resultado = importador.importar(ler_extrato(fluxo, formato))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        status = 207 if resultado["total_erros"] else 201
+        return jsonify(resultado), status
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @financial_bp.route("/transacoes/<transacao_id>", methods=["PUT"])
 def update_transacao(transacao_id):
     try:
@@ -221,15 +478,73 @@ def delete_transacao(transacao_id):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def escopo_dia():
+    """Escopo do dia da URL (/calendario/<dia>): só as transações daquela data"""
+    dia = date.fromisoformat(request.view_args["dia"])
+    return dia.month, dia.year, dia
+
+@financial_bp.route("/calendario", methods=["GET"])
+@conditional_get(["transacoes"], escopo_mes_atual)
+def get_calendario():
+    """
+    Totais por dia do mês (quantidade, entradas, saídas e saldo) agrupados no
+    banco por data_transacao; o detalhe de um dia vem de /calendario/<dia>
+    """
+    try:
+        user_id = get_user_id()
+        user_token = get_user_token()
+        mes, ano = escopo_mes_atual()
+        if not 1 <= mes <= 12:
+            return jsonify({"error": "mes deve estar entre 1 e 12"}), 400
+        
+        inicio = date(ano, mes, 1)
+        fim = date(ano + 1, 1, 1) if mes == 12 else date(ano, mes + 1, 1)
+        dias = ResumoTransacoes(user_token).por_dia(user_id, inicio, fim)
+        
+        entradas = round(sum(d["entradas"] for d in dias), 2)
+        saidas = round(sum(d["saidas"] for d in dias), 2)
+        return jsonify({
+            "mes": mes,
+            "ano": ano,
+            "dias": dias,
+            "totais": {
+                "quantidade": sum(d["quantidade"] for d in dias),
+                "entradas": entradas,
+                "saidas": saidas,
+                "saldo": round(entradas - saidas, 2),
+            },
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@financial_bp.route("/calendario/<dia>", methods=["GET"])
+@conditional_get(["transacoes", "contas", "categorias", "formas_pagamento", "tipos_gasto", "periodicidades"], escopo_dia)
+def get_calendario_dia(dia):
+    """Transações de um dia, com os nomes das tabelas de apoio"""
+    try:
+        data_dia = date.fromisoformat(dia)
+    except ValueError:
+        return jsonify({"error": "Data inválida, use AAAA-MM-DD"}), 400
+    
+    try:
+        user_id = get_user_id()
+        user_token = get_user_token()
+        transacoes = Transacao(user_token).get_dia(user_id, data_dia, Transacao.COLUNAS_LISTAGEM, expandir=True)
+        return jsonify(transacoes), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 # Rotas para Metas
 @financial_bp.route("/metas", methods=["GET"])
+@conditional_get(["metas"], variacao=lambda: date.today().isoformat())
 def get_metas():
     try:
         user_id = get_user_id()
         user_token = get_user_token()
         
         meta_model = Meta(user_token)
-        metas = meta_model.get_all(user_id)
+        hoje = date.today()
+        metas = [Meta.com_progresso(meta, hoje) for meta in meta_model.get_all(user_id)]
         return jsonify(metas), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -250,6 +565,7 @@ def create_meta():
 
 # Rotas para Parcelamentos
 @financial_bp.route("/parcelamentos", methods=["GET"])
+@conditional_get(["parcelamentos"])
 def get_parcelamentos():
     try:
         user_id = get_user_id()
@@ -269,8 +585,8 @@ def create_parcelamento():
         data = request.get_json()
         data["user_id"] = user_id
         
-        # Calcular valor da parcela
-        data["valor_parcela"] = float(data["valor_total"]) / int(data["parcelas_total"])
+        # Calcular valor da parcela em centavos (a última parcela leva o resto)
+        data["valor_parcela"] = valor_parcela(data["valor_total"], data["parcelas_total"])
         
         parcelamento_model = Parcelamento(user_token)
         parcelamento = parcelamento_model.create(data)
@@ -278,8 +594,73 @@ def create_parcelamento():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@financial_bp.route("/projecao", methods=["GET"])
+@conditional_get(["parcelamentos"], escopo_mes_atual)
+def get_projecao():
+    """Parcelas pendentes dos parcelamentos ativos nos próximos N meses (e as atrasadas, no primeiro)"""
+    try:
+        user_id = get_user_id()
+        user_token = get_user_token()
+        mes, ano = escopo_mes_atual()
+        if not 1 <= mes <= 12:
+            return jsonify({"error": "mes deve estar entre 1 e 12"}), 400
+        meses = request.args.get("meses", type=int, default=12)
+        if not 1 <= meses <= MAX_MESES_PROJECAO:
+            return jsonify({"error": f"meses deve estar entre 1 e {MAX_MESES_PROJECAO}"}), 400
+        
+        parcelamento_model = Parcelamento(user_token)
+        return jsonify(projetar(parcelamento_model.get_ativos(user_id), ano, mes, meses)), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def calcular_previsao(user_token, user_id, ano, mes, meses):
+    """Carrega contas, lançamentos fixos, parcelamentos e metas em paralelo e projeta os saldos"""
+    inicio, fim = janela_historico(ano, mes, MESES_HISTORICO_PREVISAO)
+    
+    def transacoes_fixas():
+        periodicidades = Periodicidade(user_token).get_all(user_id, "id, nome")
+        fixas = [p["id"] for p in periodicidades if p["nome"] == "Fixo"]
+        return Transacao(user_token).get_por_periodicidade(user_id, fixas, inicio, fim)
+    
+    dados = executar_em_paralelo({
+        "contas": lambda: Conta(user_token).get_all(user_id, "id, nome, saldo"),
+        "transacoes_fixas": transacoes_fixas,
+        "parcelamentos": lambda: Parcelamento(user_token).get_ativos(user_id),
+        "metas": lambda: Meta(user_token).get_ativas(user_id),
+    }, timeout=TIMEOUT_PREVISAO)
+    return prever_saldos(ano=ano, mes=mes, meses=meses, meses_historico=MESES_HISTORICO_PREVISAO, **dados)
+
+@financial_bp.route("/previsao", methods=["GET"])
+def get_previsao():
+    """
+    Saldo projetado por conta nos próximos N meses. A previsão fica em cache
+    até os dados do usuário mudarem: a chave inclui o validador (max(updated_at)
+    e contagem de linhas) das tabelas de entrada
+    """
+    try:
+        user_id = get_user_id()
+        user_token = get_user_token()
+        mes, ano = escopo_mes_atual()
+        if not 1 <= mes <= 12:
+            return jsonify({"error": "mes deve estar entre 1 e 12"}), 400
+        meses = request.args.get("meses", type=int, default=12)
+        if not 1 <= meses <= MAX_MESES_PREVISAO:
+            return jsonify({"error": f"meses deve estar entre 1 e {MAX_MESES_PREVISAO}"}), 400
+        
+        validador = Validador(user_token).get(TABELAS_PREVISAO, user_id)
+        chave = (user_id, ano, mes, meses, validador["ultima_atualizacao"], validador["quantidade"])
+        previsao = previsao_cache.get_or_load(
+            chave, lambda: calcular_previsao(user_token, user_id, ano, mes, meses)
+        )
+        return jsonify(previsao), 200
+    except TempoEsgotado as e:
+        return jsonify({"error": str(e)}), 504
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 # Rotas para Dashboard e Relatórios
 @financial_bp.route("/dashboard", methods=["GET"])
+@conditional_get(["transacoes", "contas", "categorias", "formas_pagamento", "tipos_gasto", "periodicidades"], escopo_mes_atual)
 def get_dashboard_data():
     try:
         user_id = get_user_id()
@@ -289,31 +670,63 @@ def get_dashboard_data():
         
         transacao_model = Transacao(user_token)
         conta_model = Conta(user_token)
+        resumo_model = ResumoTransacoes(user_token)
+        
+        # Totais do mês lidos do resumo mensal materializado, os campos de
+        # listagem somente das 10 transações mais recentes e o saldo das
+        # contas: consultas independentes, disparadas em paralelo
+        resultados = executar_em_paralelo({
+            "totais": lambda: resumo_model.painel(user_id, mes, ano, ['totais'])['totais'],
+            "recentes": lambda: transacao_model.get_all(
+                user_id, mes, ano, columns=Transacao.COLUNAS_LISTAGEM, limit=10, expandir=True
+            ),
+            "contas": lambda: conta_model.get_all(user_id, columns="saldo"),
+        }, timeout=TIMEOUT_DASHBOARD)
+        totais, recentes, contas = resultados["totais"], resultados["recentes"], resultados["contas"]
         
-        # Buscar transações do mês
-        transacoes = transacao_model.get_all(user_id, mes, ano)
-        contas = conta_model.get_all(user_id)
-        
-        # Calcular totais
-        entradas = sum(t["valor"] for t in transacoes if t["tipo"] == "entrada")
-        saidas = sum(t["valor"] for t in transacoes if t["tipo"] == "saida")
         saldo_total = sum(c["saldo"] for c in contas)
-        resultado_mensal = entradas - saidas
         
         dashboard_data = {
             "saldo_total": saldo_total,
-            "entradas_mes": entradas,
-            "saidas_mes": saidas,
-            "resultado_mensal": resultado_mensal,
-            "transacoes_recentes": transacoes[:10],
-            "total_transacoes": len(transacoes)
+            "entradas_mes": totais["entradas"],
+            "saidas_mes": totais["saidas"],
+            "resultado_mensal": totais["resultado_mensal"],
+            "transacoes_recentes": recentes,
+            "total_transacoes": totais["total_transacoes"]
         }
         
         return jsonify(dashboard_data), 200
+    except TempoEsgotado as e:
+        return jsonify({"error": str(e)}), 504
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def calcular_balanco_anual(transacao_model, user_id, ano):
+    """Monta o balanço dos 12 meses a partir dos totais agregados por mês"""
+    # Uma consulta agregada por ano, agrupada por mês, em vez de uma por mês
+    totais = {
+        linha["mes_referencia"]: linha
+        for linha in transacao_model.get_balanco_anual(user_id, ano)
+    }
+    
+    balanco = []
+    for mes in range(1, 13):
+        linha = totais.get(mes, {})
+        entradas = float(linha.get("entradas") or 0)
+        saidas = float(linha.get("saidas") or 0)
+        
+        balanco.append({
+            "mes": mes,
+            "mes_nome": calendar.month_name[mes],
+            "entradas": entradas,
+            "saidas": saidas,
+            "resultado": entradas - saidas
+        })
+    
+    return balanco
+
 @financial_bp.route("/balanco-mensal", methods=["GET"])
+@conditional_get(["transacoes"], escopo_ano_atual)
 def get_balanco_mensal():
     try:
         user_id = get_user_id()
@@ -321,27 +734,58 @@ def get_balanco_mensal():
         ano = request.args.get("ano", type=int, default=datetime.now().year)
         
         transacao_model = Transacao(user_token)
-        
-        balanco = []
-        for mes in range(1, 13):
-            transacoes = transacao_model.get_all(user_id, mes, ano)
-            entradas = sum(t["valor"] for t in transacoes if t["tipo"] == "entrada")
-            saidas = sum(t["valor"] for t in transacoes if t["tipo"] == "saida")
-            
-            balanco.append({
-                "mes": mes,
-                "mes_nome": calendar.month_name[mes],
-                "entradas": entradas,
-                "saidas": saidas,
-                "resultado": entradas - saidas
-            })
+        balanco = calcular_balanco_anual(transacao_model, user_id, ano)
         
         return jsonify(balanco), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Seções disponíveis no endpoint consolidado do painel
+PAINEL_SECOES = ("balanco", "totais", "forma_pagamento", "tipo_gasto", "periodicidade", "categoria")
+
+@financial_bp.route("/painel", methods=["GET"])
+@conditional_get(["transacoes", "categorias", "formas_pagamento", "tipos_gasto", "periodicidades"],
+                 escopo_ano_atual, variacao_mes_atual)
+def get_painel():
+    try:
+        user_id = get_user_id()
+        user_token = get_user_token()
+        mes = request.args.get("mes", type=int, default=datetime.now().month)
+        ano = request.args.get("ano", type=int, default=datetime.now().year)
+        fields = request.args.get("fields")
+        
+        secoes = [s.strip() for s in fields.split(",") if s.strip()] if fields else list(PAINEL_SECOES)
+        invalidas = [s for s in secoes if s not in PAINEL_SECOES]
+        if invalidas:
+            return jsonify({"error": f"Seções inválidas: {', '.join(invalidas)}"}), 400
+        
+        tarefas = {}
+        
+        # Balanço do ano: uma consulta agregada
+        if "balanco" in secoes:
+            transacao_model = Transacao(user_token)
+            tarefas["balanco"] = lambda: {"balanco": calcular_balanco_anual(transacao_model, user_id, ano)}
+        
+        # Totais e resumos do mês: uma consulta agrupada, consolidada em uma passada
+        secoes_mes = [s for s in secoes if s != "balanco"]
+        if secoes_mes:
+            resumo_model = ResumoTransacoes(user_token)
+            tarefas["mes"] = lambda: resumo_model.painel(user_id, mes, ano, secoes_mes)
+        
+        # As duas consultas são independentes: disparadas em paralelo
+        painel = {}
+        for parte in executar_em_paralelo(tarefas, timeout=TIMEOUT_PAINEL).values():
+            painel.update(parte)
+        
+        return jsonify(painel), 200
+    except TempoEsgotado as e:
+        return jsonify({"error": str(e)}), 504
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 # Rotas de resumo por categoria, forma de pagamento, etc.
 @financial_bp.route("/categorias-resumo", methods=["GET"])
+@conditional_get(["transacoes", "categorias"])
 def get_categorias_resumo():
     try:
         user_id = get_user_id()
@@ -350,26 +794,14 @@ def get_categorias_resumo():
         ano = request.args.get("ano", type=int)
         tipo = request.args.get("tipo")
         
-        transacao_model = Transacao(user_token)
-        transacoes = transacao_model.get_all(user_id, mes, ano)
-        
-        if tipo:
-            transacoes = [t for t in transacoes if t["tipo"] == tipo]
-        
-        # Agrupar por categoria
-        resumo = {}
-        for transacao in transacoes:
-            categoria = transacao.get("categoria", "Sem categoria")
-            if categoria not in resumo:
-                resumo[categoria] = 0
-            resumo[categoria] += transacao["valor"]
-        
-        resultado = [{"categoria": k, "total": v} for k, v in resumo.items()]
+        resumo_model = ResumoTransacoes(user_token)
+        resultado = resumo_model.por_dimensao("categoria", user_id, mes, ano, tipo)
         return jsonify(resultado), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @financial_bp.route("/forma-pagamento-resumo", methods=["GET"])
+@conditional_get(["transacoes", "formas_pagamento"])
 def get_forma_pagamento_resumo():
     try:
         user_id = get_user_id()
@@ -377,23 +809,14 @@ def get_forma_pagamento_resumo():
         mes = request.args.get("mes", type=int)
         ano = request.args.get("ano", type=int)
         
-        transacao_model = Transacao(user_token)
-        transacoes = transacao_model.get_all(user_id, mes, ano)
-        
-        # Agrupar por forma de pagamento
-        resumo = {}
-        for transacao in transacoes:
-            forma = transacao.get("forma_pagamento", "Sem forma")
-            if forma not in resumo:
-                resumo[forma] = 0
-            resumo[forma] += transacao["valor"]
-        
-        resultado = [{"forma_pagamento": k, "total": v} for k, v in resumo.items()]
+        resumo_model = ResumoTransacoes(user_token)
+        resultado = resumo_model.por_dimensao("forma_pagamento", user_id, mes, ano)
         return jsonify(resultado), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @financial_bp.route("/tipo-gasto-resumo", methods=["GET"])
+@conditional_get(["transacoes", "tipos_gasto"])
 def get_tipo_gasto_resumo():
     try:
         user_id = get_user_id()
@@ -401,26 +824,15 @@ def get_tipo_gasto_resumo():
         mes = request.args.get("mes", type=int)
         ano = request.args.get("ano", type=int)
         
-        transacao_model = Transacao(user_token)
-        transacoes = transacao_model.get_all(user_id, mes, ano)
-        
-        # Filtrar apenas saídas
-        transacoes = [t for t in transacoes if t["tipo"] == "saida"]
-        
-        # Agrupar por tipo de gasto
-        resumo = {}
-        for transacao in transacoes:
-            tipo = transacao.get("tipo_gasto", "Sem tipo")
-            if tipo not in resumo:
-                resumo[tipo] = 0
-            resumo[tipo] += transacao["valor"]
-        
-        resultado = [{"tipo_gasto": k, "total": v} for k, v in resumo.items()]
+        # Apenas saídas têm tipo de gasto
+        resumo_model = ResumoTransacoes(user_token)
+        resultado = resumo_model.por_dimensao("tipo_gasto", user_id, mes, ano, "saida")
         return jsonify(resultado), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @financial_bp.route("/periodicidade-resumo", methods=["GET"])
+@conditional_get(["transacoes", "periodicidades"])
 def get_periodicidade_resumo():
     try:
         user_id = get_user_id()
@@ -428,18 +840,8 @@ def get_periodicidade_resumo():
         mes = request.args.get("mes", type=int)
         ano = request.args.get("ano", type=int)
         
-        transacao_model = Transacao(user_token)
-        transacoes = transacao_model.get_all(user_id, mes, ano)
-        
-        # Agrupar por periodicidade
-        resumo = {}
-        for transacao in transacoes:
-            periodicidade = transacao.get("periodicidade", "Sem periodicidade")
-            if periodicidade not in resumo:
-                resumo[periodicidade] = 0
-            resumo[periodicidade] += transacao["valor"]
-        
-        resultado = [{"periodicidade": k, "total": v} for k, v in resumo.items()]
+        resumo_model = ResumoTransacoes(user_token)
+        resultado = resumo_model.por_dimensao("periodicidade", user_id, mes, ano)
         return jsonify(resultado), 200
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
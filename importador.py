@@ -0,0 +1,447 @@
+import codecs
+import csv
+import hashlib
+import html
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+from cronograma import para_reais
+
+# Importação de extratos bancários (OFX e CSV) em fluxo: o arquivo é lido em
+# blocos e cada lançamento é produzido por um gerador, então a memória fica
+# limitada a um lote (TAMANHO_LOTE lançamentos), qualquer que seja o tamanho
+# do extrato. Por lote:
+#   - conciliação: uma consulta por conta com as datas do lote; são
+#     duplicados os lançamentos cujo id_externo já existe e os que casam
+#     (data, tipo, valor) com uma transação digitada à mão (sem id_externo)
+#   - categorização: histórico de descrições já categorizadas do usuário e,
+#     na falta dele, nomes das categorias contidos na descrição
+#   - gravação: Transacao.create_many, um INSERT multi-linha por lote
+
+TAMANHO_BLOCO = 64 * 1024
+TAMANHO_LOTE = 1000
+DIAS_POR_CONSULTA = 100  # datas por consulta de conciliação (limite da URL do PostgREST)
+MAX_ERROS = 100
+
+# Cabeçalhos aceitos no CSV (já normalizados) para cada campo
+COLUNAS_CSV = {
+    "data": ("data", "date", "data transacao", "data lancamento", "data movimento", "dt"),
+    "descricao": ("descricao", "historico", "memo", "lancamento", "description", "detalhes"),
+    "valor": ("valor", "amount", "valor r", "quantia"),
+    "credito": ("credito", "entrada", "credit"),
+    "debito": ("debito", "saida", "debit"),
+    "tipo": ("tipo", "natureza", "d c", "dc"),
+    "id_externo": ("id", "fitid", "identificador", "documento", "id externo"),
+    "conta": ("conta", "account"),
+}
+
+TIPOS_SAIDA = {"d", "debito", "saida", "debit", "dr"}
+
+_TAG_OFX = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+_NAO_ALFANUMERICO = re.compile(r"[^a-z0-9]+")
+_DATA_OFX = re.compile(r"\d{8}.*")
+_DATA_ISO = re.compile(r"\d{4}-\d{2}-\d{2}.*")
+_DATA_BR = re.compile(r"(\d{1,2})[/.-](\d{1,2})[/.-](\d{2}|\d{4})")
+
+# normalizar e ler_data têm cache limitado: descrições e datas se repetem
+# muito em um extrato, e elas dominam o tempo da leitura
+
+@lru_cache(maxsize=8192)
+def normalizar(texto) -> str:
+    """Texto sem acentos, em minúsculas e só com letras, dígitos e espaços simples"""
+    texto = str(texto or "")
+    if not texto.isascii():
+        texto = "".join(c for c in unicodedata.normalize("NFKD", texto) if not unicodedata.combining(c))
+    return " ".join(_NAO_ALFANUMERICO.sub(" ", texto.lower()).split())
+
+def assinatura(descricao) -> str:
+    """Primeiras palavras da descrição sem números (datas, parcelas e códigos variam)"""
+    return " ".join([p for p in normalizar(descricao).split() if not any(c.isdigit() for c in p)][:3])
+
+def ler_valor(texto) -> int:
+    """Valor em centavos com sinal: '1.234,56', '-1234.56', '(12,00)' e 'R$ 10'"""
+    texto = str(texto).strip().replace("R$", "").replace(" ", "")
+    negativo = (texto.startswith("(") and texto.endswith(")")) or texto.endswith("-")
+    texto = texto.strip("()").rstrip("-")
+    if "," in texto and "." in texto:
+        decimal = "," if texto.rfind(",") > texto.rfind(".") else "."
+        texto = texto.replace("." if decimal == "," else ",", "").replace(",", ".")
+    elif "," in texto:
+        texto = texto.replace(",", ".")
+    elif texto.count(".") > 1:
+        texto = texto.replace(".", "")
+    try:
+        centavos = int((Decimal(texto) * 100).to_integral_value())
+    except InvalidOperation:
+        raise ValueError(f"Valor inválido: {texto!r}")
+    return -centavos if negativo else centavos
+
+@lru_cache(maxsize=8192)
+def ler_data(texto) -> date:
+    """Data em AAAA-MM-DD, DD/MM/AAAA, DD/MM/AA, DD-MM-AAAA ou AAAAMMDD[hhmmss] (OFX)"""
+    texto = str(texto).strip()
+    try:
+        if _DATA_OFX.fullmatch(texto):
+            return date(int(texto[:4]), int(texto[4:6]), int(texto[6:8]))
+        if _DATA_ISO.fullmatch(texto):
+            return date.fromisoformat(texto[:10])
+        partes = _DATA_BR.fullmatch(texto)
+        if partes:
+            dia, mes, ano = (int(p) for p in partes.groups())
+            return date(ano + 2000 if ano < 100 else ano, mes, dia)
+    except ValueError:
+        pass
+    raise ValueError(f"Data inválida: {texto!r}")
+
+def decodificar(fluxo, tamanho_bloco: int = TAMANHO_BLOCO):
+    """
+    Blocos de texto de um fluxo binário. A codificação é decidida pelo
+    primeiro bloco: UTF-8 (com ou sem BOM) se ele for válido, senão
+    Windows-1252, comum em extratos de bancos brasileiros.
+    """
+    primeiro = fluxo.read(tamanho_bloco)
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(primeiro)
+        codificacao = "utf-8-sig"
+    except UnicodeDecodeError:
+        codificacao = "cp1252"
+    decodificador = codecs.getincrementaldecoder(codificacao)(errors="replace")
+
+    bloco = primeiro
+    while bloco:
+        texto = decodificador.decode(bloco)
+        if texto:
+            yield texto
+        bloco = fluxo.read(tamanho_bloco)
+    texto = decodificador.decode(b"", final=True)
+    if texto:
+        yield texto
+
+def linhas(blocos):
+    """Linhas (com o \\n) a partir de blocos de texto"""
+    resto = ""
+    for bloco in blocos:
+        partes = (resto + bloco).splitlines(keepends=True)
+        resto = partes.pop() if partes and not partes[-1].endswith(("\n", "\r")) else ""
+        yield from partes
+    if resto:
+        yield resto
+
+def detectar_formato(inicio: str) -> str:
+    """'ofx' ou 'csv' pelo início do arquivo"""
+    inicio = inicio.lstrip().upper()
+    return "ofx" if inicio.startswith(("OFXHEADER", "<?XML", "<OFX")) or "<OFX>" in inicio else "csv"
+
+def ler_ofx(blocos):
+    """
+    Lançamentos (<STMTTRN>) de um OFX 1.x (SGML) ou 2.x (XML). As tags são
+    lidas bloco a bloco, sem montar o documento; o ACCTID da conta corrente
+    ou do cartão vale para os lançamentos seguintes.
+    """
+    estado = {"conta": None, "atual": None, "registro": 0}
+
+    def fechar():
+        estado["registro"] += 1
+        lancamento = _lancamento_ofx(estado["registro"], estado["atual"], estado["conta"])
+        estado["atual"] = None
+        return lancamento
+
+    def tags(texto):
+        for fechamento, tag, valor in _TAG_OFX.findall(texto):
+            tag, valor = tag.upper(), html.unescape(valor.strip().split("\n")[0].strip())
+            if tag == "STMTTRN":
+                # No SGML o </STMTTRN> pode faltar: um novo <STMTTRN> fecha o anterior
+                if estado["atual"] is not None:
+                    yield fechar()
+                if not fechamento:
+                    estado["atual"] = {}
+            elif fechamento:
+                continue
+            elif estado["atual"] is not None:
+                estado["atual"][tag] = valor
+            elif tag == "ACCTID":
+                estado["conta"] = valor
+
+    resto = ""
+    for bloco in blocos:
+        texto = resto + bloco
+        # A última tag pode estar incompleta: fica para o próximo bloco
+        corte = max(texto.rfind("<"), 0)
+        texto, resto = texto[:corte], texto[corte:]
+        yield from tags(texto)
+    yield from tags(resto)
+    if estado["atual"] is not None:
+        yield fechar()
+
+def _lancamento_ofx(registro: int, campos: dict, conta) -> dict:
+    try:
+        centavos = ler_valor(campos["TRNAMT"])
+        return {
+            "registro": registro,
+            "data": ler_data(campos["DTPOSTED"]),
+            "centavos": centavos,
+            "descricao": campos.get("MEMO") or campos.get("NAME") or campos.get("TRNTYPE") or "Lançamento",
+            "id_externo": f"ofx:{campos['FITID']}" if campos.get("FITID") else None,
+            "conta": conta,
+        }
+    except KeyError as e:
+        return {"registro": registro, "erro": f"Campo {e.args[0]} ausente"}
+    except ValueError as e:
+        return {"registro": registro, "erro": str(e)}
+
+def ler_csv(blocos):
+    """
+    Lançamentos de um CSV com cabeçalho (separador ',', ';' ou tab). O valor
+    vem com sinal em uma coluna 'valor' (ou 'tipo' D/C) ou em colunas de
+    crédito e débito separadas. Sem coluna de identificador, o id_externo é
+    um hash de (data, valor, descrição, ocorrência no dia): reimportar o
+    mesmo extrato não duplica, e lançamentos iguais no mesmo dia continuam
+    distintos (o extrato lista os lançamentos agrupados por data).
+    """
+    fonte = linhas(blocos)
+    cabecalho = next((linha for linha in fonte if linha.strip()), None)
+    if cabecalho is None:
+        return
+    separador = max((";", ",", "\t"), key=cabecalho.count)
+    nomes = [normalizar(n) for n in next(csv.reader([cabecalho], delimiter=separador))]
+    indice = {
+        campo: next((nomes.index(a) for a in aliases if a in nomes), None)
+        for campo, aliases in COLUNAS_CSV.items()
+    }
+    if indice["data"] is None or (indice["valor"] is None and indice["credito"] is None and indice["debito"] is None):
+        raise ValueError("CSV sem as colunas de data e valor")
+
+    ocorrencias, dia_atual = Counter(), None
+    leitor = csv.reader(fonte, delimiter=separador)
+    for registro, campos in enumerate(leitor, 1):
+        if not any(c.strip() for c in campos):
+            continue
+
+        def campo(nome):
+            i = indice[nome]
+            return campos[i].strip() if i is not None and i < len(campos) else ""
+
+        try:
+            data = ler_data(campo("data"))
+            if campo("valor"):
+                centavos = ler_valor(campo("valor"))
+                if normalizar(campo("tipo")) in TIPOS_SAIDA:
+                    centavos = -abs(centavos)
+            else:
+                centavos = abs(ler_valor(campo("credito") or "0")) - abs(ler_valor(campo("debito") or "0"))
+        except ValueError as e:
+            yield {"registro": registro, "erro": str(e)}
+            continue
+
+        descricao = campo("descricao") or "Lançamento"
+        id_externo = campo("id_externo")
+        if id_externo:
+            id_externo = f"csv:{id_externo}"
+        else:
+            if data != dia_atual:
+                ocorrencias.clear()
+                dia_atual = data
+            chave = f"{data.isoformat()}|{centavos}|{normalizar(descricao)}"
+            ocorrencias[chave] += 1
+            id_externo = "csv:" + hashlib.sha1(f"{chave}|{ocorrencias[chave]}".encode()).hexdigest()
+
+        yield {
+            "registro": registro,
+            "data": data,
+            "centavos": centavos,
+            "descricao": descricao,
+            "id_externo": id_externo,
+            "conta": campo("conta") or None,
+        }
+
+def ler_extrato(fluxo, formato: str = None):
+    """Lançamentos do extrato (fluxo binário), no formato informado ou detectado"""
+    blocos = decodificar(fluxo)
+    primeiro = next(blocos, "")
+    formato = (formato or detectar_formato(primeiro[:1024])).lower()
+    if formato not in ("ofx", "csv"):
+        raise ValueError("Formato deve ser 'ofx' ou 'csv'")
+
+    def todos():
+        yield primeiro
+        yield from blocos
+
+    return ler_ofx(todos()) if formato == "ofx" else ler_csv(todos())
+
+class Categorizador:
+    """
+    Sugere a categoria de um lançamento: primeiro pela assinatura da
+    descrição em transações já categorizadas (a mais recente vence), depois
+    pela categoria do mesmo tipo cujo nome aparece na descrição (a de nome
+    mais longo vence).
+    """
+
+    TIPOS = {"Receita": "entrada", "Despesa": "saida"}
+
+    def __init__(self, categorias: list, historico: list = ()):
+        self.historico = {}
+        for transacao in historico:
+            if transacao.get("categoria_id"):
+                chave = (transacao["tipo"], assinatura(transacao["descricao"]))
+                self.historico.setdefault(chave, transacao["categoria_id"])
+
+        self.por_nome = defaultdict(list)
+        for categoria in categorias:
+            palavras = normalizar(categoria["nome"]).split()
+            if palavras:
+                self.por_nome[self.TIPOS.get(categoria.get("tipo"))].append((set(palavras), categoria["id"]))
+        for candidatas in self.por_nome.values():
+            candidatas.sort(key=lambda c: len(c[0]), reverse=True)
+
+    def categorizar(self, descricao: str, tipo: str):
+        """Id da categoria sugerida, ou None"""
+        categoria_id = self.historico.get((tipo, assinatura(descricao)))
+        if categoria_id:
+            return categoria_id
+        palavras = set(normalizar(descricao).split())
+        for candidatas in (self.por_nome[tipo], self.por_nome[None]):
+            for nome, categoria_id in candidatas:
+                if nome <= palavras:
+                    return categoria_id
+        return None
+
+def resolver_conta(contas: list, identificador):
+    """Id da conta pelo id, pelo nome ou pelo número (ACCTID) contido no nome"""
+    if not identificador:
+        return None
+    alvo = normalizar(identificador)
+    for conta in contas:
+        if str(conta["id"]) == str(identificador) or normalizar(conta["nome"]) == alvo:
+            return conta["id"]
+    digitos = re.sub(r"\D", "", str(identificador))
+    for conta in contas:
+        if digitos and digitos in re.sub(r"\D", "", conta["nome"]):
+            return conta["id"]
+    return None
+
+class ImportadorExtrato:
+    """
+    Grava os lançamentos de um extrato como transações do usuário, lote a
+    lote. conta_id, quando informado, vale para todos os lançamentos; senão a
+    conta vem do extrato (ACCTID ou coluna 'conta') via resolver_conta.
+    """
+
+    def __init__(self, transacao_model, contas: list, categorizador: Categorizador,
+                 user_id: str, conta_id: str = None, tamanho_lote: int = TAMANHO_LOTE):
+        if not user_id:
+            raise ValueError("user_id é obrigatório na importação de extratos")
+        self.transacao_model = transacao_model
+        self.contas = contas
+        self.categorizador = categorizador
+        self.user_id = user_id
+        self.conta_id = conta_id
+        self.tamanho_lote = tamanho_lote
+        self.contas_extrato = {}
+        # Transações digitadas à mão já usadas na conciliação (não casam duas vezes)
+        self.conciliadas = set()
+        self.resultado = {"registros": 0, "inseridas": 0, "duplicadas": 0,
+                          "categorizadas": 0, "sem_conta": 0, "erros": [], "total_erros": 0}
+
+    def importar(self, lancamentos) -> dict:
+        lote = []
+        for lancamento in lancamentos:
+            self.resultado["registros"] += 1
+            if "erro" in lancamento:
+                self._erro(lancamento["registro"], lancamento["erro"])
+                continue
+            lote.append(lancamento)
+            if len(lote) >= self.tamanho_lote:
+                self._gravar(lote)
+                lote = []
+        if lote:
+            self._gravar(lote)
+        return self.resultado
+
+    def _erro(self, registro: int, mensagem: str):
+        self.resultado["total_erros"] += 1
+        if len(self.resultado["erros"]) < MAX_ERROS:
+            self.resultado["erros"].append({"registro": registro, "erro": mensagem})
+
+    def _conta(self, identificador):
+        if self.conta_id:
+            return self.conta_id
+        if identificador not in self.contas_extrato:
+            self.contas_extrato[identificador] = resolver_conta(self.contas, identificador)
+        return self.contas_extrato[identificador]
+
+    def _gravar(self, lote: list):
+        por_conta = defaultdict(list)
+        for lancamento in lote:
+            por_conta[self._conta(lancamento["conta"])].append(lancamento)
+
+        transacoes, registros = [], []
+        for conta_id, lancamentos in por_conta.items():
+            novos = self._conciliar(conta_id, lancamentos)
+            if conta_id is None:
+                self.resultado["sem_conta"] += len(novos)
+            for lancamento in novos:
+                transacoes.append(self._transacao(conta_id, lancamento))
+                registros.append(lancamento["registro"])
+
+        inseridas, falhas = self.transacao_model.create_many(transacoes, chunk_size=self.tamanho_lote)
+        self.resultado["inseridas"] += inseridas
+        recusadas = {posicao for posicao, _ in falhas}
+        self.resultado["categorizadas"] += sum(
+            1 for posicao, t in enumerate(transacoes) if t["categoria_id"] and posicao not in recusadas
+        )
+        for posicao, mensagem in falhas:
+            self._erro(registros[posicao], mensagem)
+
+    def _conciliar(self, conta_id, lancamentos: list) -> list:
+        """Lançamentos do lote que ainda não existem na conta"""
+        # Só os dias do lote (não o intervalo entre o primeiro e o último):
+        # extratos esparsos cobririam anos de transações
+        dias = sorted({l["data"] for l in lancamentos})
+        existentes = []
+        for i in range(0, len(dias), DIAS_POR_CONSULTA):
+            existentes.extend(self.transacao_model.get_para_conciliacao(
+                self.user_id, conta_id, dias[i:i + DIAS_POR_CONSULTA]
+            ))
+
+        importadas = {t["id_externo"] for t in existentes if t.get("id_externo")}
+        manuais = defaultdict(list)
+        for t in existentes:
+            if not t.get("id_externo") and t["id"] not in self.conciliadas:
+                manuais[(str(t["data_transacao"])[:10], t["tipo"], round(float(t["valor"]) * 100))].append(t["id"])
+
+        novos = []
+        for lancamento in lancamentos:
+            tipo = "entrada" if lancamento["centavos"] >= 0 else "saida"
+            chave = (lancamento["data"].isoformat(), tipo, abs(lancamento["centavos"]))
+            if lancamento["id_externo"] in importadas:
+                self.resultado["duplicadas"] += 1
+            elif manuais[chave]:
+                self.conciliadas.add(manuais[chave].pop())
+                self.resultado["duplicadas"] += 1
+            else:
+                if lancamento["id_externo"]:
+                    importadas.add(lancamento["id_externo"])
+                novos.append(lancamento)
+        return novos
+
+    def _transacao(self, conta_id, lancamento: dict) -> dict:
+        tipo = "entrada" if lancamento["centavos"] >= 0 else "saida"
+        descricao = " ".join(lancamento["descricao"].split())[:255]
+        data = lancamento["data"]
+        # Todas as linhas com as mesmas chaves: o PostgREST exige isso no INSERT multi-linha
+        return {
+            "user_id": self.user_id,
+            "tipo": tipo,
+            "descricao": descricao,
+            "valor": para_reais(abs(lancamento["centavos"])),
+            "data_transacao": data.isoformat(),
+            "mes_referencia": data.month,
+            "ano_referencia": data.year,
+            "conta_id": conta_id,
+            "categoria_id": self.categorizador.categorizar(descricao, tipo),
+            "id_externo": lancamento["id_externo"],
+        }
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Relatório do tempo de importação (cold start) do ponto de entrada do Vercel.
+
+Roda `python -X importtime -c "import api.index"` em um processo novo e
+mostra o tempo total, os módulos mais caros (tempo acumulado) e o tempo
+próprio agrupado por pacote. Nenhum cliente Supabase é criado na importação,
+então a medição não depende de rede.
+
+Uso: python importtime_report.py --top 20 --limite 300 --vercel
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+def medir_importacao(modulo: str, env: dict) -> list:
+    """Retorna [(modulo, proprio_us, acumulado_us, profundidade)] na ordem do -X importtime"""
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=RAIZ, env=env, capture_output=True, text=True,
+    )
+    if resultado.returncode != 0:
+        raise SystemExit(f"❌ Falha ao importar {modulo}:\n{resultado.stderr}")
+
+    linhas = []
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        proprio, acumulado, nome = linha[len("import time:"):].split("|")
+        profundidade = (len(nome) - len(nome.lstrip())) // 2
+        linhas.append((nome.strip(), int(proprio), int(acumulado), profundidade))
+    return linhas
+
+def medir_parede(modulo: str, env: dict, repeticoes: int) -> float:
+    """Mediana (ms) do tempo de parede da importação, descontado o interpretador vazio"""
+    def mediana(comando):
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            subprocess.run([sys.executable, "-c", comando], cwd=RAIZ, env=env, check=True)
+            tempos.append(time.perf_counter() - inicio)
+        return sorted(tempos)[len(tempos) // 2]
+
+    return (mediana(f"import {modulo}") - mediana("pass")) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modulo", default="api.index")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--limite", type=float, default=300.0, help="orçamento do cold start em ms")
+    parser.add_argument("--vercel", action="store_true", help="simula o ambiente do Vercel (VERCEL=1)")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.vercel:
+        env["VERCEL"] = "1"
+
+    linhas = medir_importacao(args.modulo, env)
+    alvo = next(l for l in reversed(linhas) if l[0] == args.modulo)
+    total_ms = alvo[2] / 1000
+
+    print(f"⏱️  Importação de {args.modulo}: {total_ms:.1f} ms (-X importtime)\n")
+
+    print(f"{'módulo':<50}{'acumulado (ms)':>16}{'próprio (ms)':>14}")
+    for nome, proprio, acumulado, _ in sorted(linhas, key=lambda l: l[2], reverse=True)[:args.top]:
+        print(f"{nome:<50}{acumulado / 1000:>16.1f}{proprio / 1000:>14.1f}")
+
+    por_pacote = defaultdict(int)
+    for nome, proprio, _, _ in linhas:
+        por_pacote[nome.split(".")[0]] += proprio
+
+    print(f"\n{'pacote':<50}{'próprio (ms)':>16}{'%':>14}")
+    soma = sum(por_pacote.values()) or 1
+    for pacote, proprio in sorted(por_pacote.items(), key=lambda p: p[1], reverse=True)[:args.top]:
+        print(f"{pacote:<50}{proprio / 1000:>16.1f}{proprio / soma * 100:>13.1f}%")
+
+    parede_ms = medir_parede(args.modulo, env, args.repeticoes)
+    print(f"\n🕒 Cold start (parede, mediana de {args.repeticoes}, sem o interpretador): {parede_ms:.1f} ms")
+
+    if parede_ms > args.limite:
+        print(f"❌ Acima do orçamento de {args.limite:.0f} ms")
+        return 1
+    print(f"✅ Dentro do orçamento de {args.limite:.0f} ms")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
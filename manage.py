@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Comandos administrativos da plataforma (executados com a service key)
+
+Uso:
+    python manage.py reconciliar-resumo [--corrigir]
+    python manage.py recalcular-saldos
+    python manage.py recalcular-metas
+    python manage.py importar-extrato <arquivo> --usuario USER_ID [--conta ID_OU_NOME] [--formato ofx|csv]
+    python manage.py criar-banco
+"""
+
+import argparse
+import time
+
+from importador import ler_extrato, resolver_conta, Categorizador, ImportadorExtrato
+from supabase_config import STORAGE_BACKEND, DATABASE_URL
+from supabase_models import Categoria, Conta, Meta, ResumoMensal, Transacao
+
+def reconciliar_resumo(args):
+    """Compara o resumo mensal materializado com as transações"""
+
+    print("🔍 Reconciliando resumo mensal com as transações...")
+
+    try:
+        divergencias = ResumoMensal().reconciliar(corrigir=args.corrigir)
+    except Exception as e:
+        print(f"❌ {str(e)}")
+        return 1
+
+    if not divergencias:
+        print("✅ Resumo mensal consistente com as transações")
+        return 0
+
+    print(f"⚠️  {len(divergencias)} chave(s) divergente(s):")
+    for d in divergencias:
+        print(
+            f"   {d['ano_referencia']}/{d['mes_referencia']:02d} {d['tipo']:<8}"
+            f" usuário {d['user_id']}: quantidade {d['quantidade_resumo']} -> {d['quantidade_real']},"
+            f" total {d['total_resumo']} -> {d['total_real']}"
+        )
+
+    if args.corrigir:
+        print("✅ Resumo mensal reconstruído a partir das transações")
+        return 0
+
+    print("💡 Execute com --corrigir para reconstruir o resumo")
+    return 1
+
+def recalcular_saldos(args):
+    """Recalcula o saldo das contas a partir das transações"""
+
+    print("🏦 Recalculando saldos das contas...")
+
+    try:
+        alteradas = Conta().recalcular_saldos()
+    except Exception as e:
+        print(f"❌ {str(e)}")
+        return 1
+
+    for c in alteradas:
+        print(f"   {c['nome']}: {c['saldo_anterior']} -> {c['saldo_recalculado']}")
+    print(f"✅ {len(alteradas)} conta(s) atualizada(s)")
+    return 0
+
+def recalcular_metas(args):
+    """Recalcula o valor atual das metas a partir das transações da categoria"""
+
+    print("🎯 Recalculando progresso das metas...")
+
+    try:
+        alteradas = Meta().recalcular()
+    except Exception as e:
+        print(f"❌ {str(e)}")
+        return 1
+
+    for m in alteradas:
+        print(f"   {m['nome']}: {m['valor_anterior']} -> {m['valor_recalculado']}")
+    print(f"✅ {len(alteradas)} meta(s) atualizada(s)")
+    return 0
+
+def importar_extrato(args):
+    """Importa um extrato OFX ou CSV como transações"""
+
+    print(f"📥 Importando {args.arquivo}...")
+
+    inicio = time.perf_counter()
+    try:
+        transacao_model = Transacao()
+        contas = Conta().get_all(args.usuario, "id, nome")
+        conta_id = None
+        if args.conta:
+            conta_id = resolver_conta(contas, args.conta)
+            if conta_id is None:
+                print(f"❌ Conta não encontrada: {args.conta}")
+                return 1
+
+        categorizador = Categorizador(
+            Categoria().get_all(args.usuario, columns="id, nome, tipo"),
+            transacao_model.get_categorizadas(args.usuario)
+        )
+        importador = ImportadorExtrato(transacao_model, contas, categorizador, args.usuario, conta_id)
+        with open(args.arquivo, "rb") as fluxo:
+            resultado = importador.importar(ler_extrato(fluxo, args.formato))
+    except Exception as e:
+        print(f"❌ {str(e)}")
+        return 1
+
+    for erro in resultado["erros"]:
+        print(f"   registro {erro['registro']}: {erro['erro']}")
+    if resultado["total_erros"] > len(resultado["erros"]):
+        print(f"   ... e mais {resultado['total_erros'] - len(resultado['erros'])} erro(s)")
+
+    print(
+        f"✅ {resultado['registros']} lançamento(s) lido(s) em {time.perf_counter() - inicio:.1f}s:"
+        f" {resultado['inseridas']} inserido(s), {resultado['duplicadas']} duplicado(s),"
+        f" {resultado['categorizadas']} categorizado(s), {resultado['sem_conta']} sem conta"
+    )
+    return 1 if resultado["total_erros"] else 0
+
+def criar_banco(args):
+    """Cria o esquema do banco local e os registros globais padrão (user_id nulo)"""
+
+    if STORAGE_BACKEND != "sqlalchemy":
+        print("❌ criar-banco é para o backend local: defina STORAGE_BACKEND=sqlalchemy")
+        print("💡 No Supabase, execute supabase_setup.sql no SQL Editor")
+        return 1
+
+    # Importado aqui: o seed importa as rotas Flask, desnecessárias nos demais comandos
+    from seed_data import SEED_PADRAO
+
+    print(f"🗄️  Criando banco local em {DATABASE_URL}...")
+
+    try:
+        for model_class, rows in SEED_PADRAO:
+            if model_class is Conta:
+                continue
+            model_class().upsert_many([{**row, "user_id": None} for row in rows], on_conflict="user_id,nome")
+    except Exception as e:
+        print(f"❌ {str(e)}")
+        return 1
+
+    print("✅ Banco local pronto")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    reconciliar = subparsers.add_parser("reconciliar-resumo", help="verifica o resumo mensal materializado")
+    reconciliar.add_argument("--corrigir", action="store_true", help="reconstrói o resumo em caso de divergência")
+    reconciliar.set_defaults(funcao=reconciliar_resumo)
+
+    saldos = subparsers.add_parser("recalcular-saldos", help="reconstrói o saldo das contas a partir das transações")
+    saldos.set_defaults(funcao=recalcular_saldos)
+
+    metas = subparsers.add_parser("recalcular-metas", help="reconstrói o progresso das metas a partir das transações")
+    metas.set_defaults(funcao=recalcular_metas)
+
+    extrato = subparsers.add_parser("importar-extrato", help="importa um extrato OFX ou CSV como transações")
+    extrato.add_argument("arquivo")
+    extrato.add_argument("--conta", help="id ou nome da conta de todos os lançamentos (senão, a do extrato)")
+    extrato.add_argument("--formato", choices=("ofx", "csv"), help="detectado pelo conteúdo se omitido")
+    extrato.add_argument("--usuario", required=True, help="user_id dono das contas do extrato")
+    extrato.set_defaults(funcao=importar_extrato)
+
+    banco = subparsers.add_parser("criar-banco", help="cria o banco local (STORAGE_BACKEND=sqlalchemy)")
+    banco.set_defaults(funcao=criar_banco)
+
+    args = parser.parse_args()
+    return args.funcao(args)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
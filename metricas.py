@@ -0,0 +1,189 @@
+import contextvars
+import hmac
+import os
+import threading
+import time
+from collections import defaultdict
+from flask import Blueprint, Response, request
+
+from cache import get_cache_stats
+from supabase_config import get_pool_stats
+
+metricas_bp = Blueprint("metricas", __name__)
+
+# Token exigido por /api/metrics (Authorization: Bearer <token>); sem ele a
+# rota responde 404, para não expor tráfego e internos da API publicada
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# Limites (segundos) dos buckets do histograma de latência por rota
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class MetricasRequisicao:
+    """
+    Acumulador da requisição atual: chamadas ao Supabase e acessos ao cache.
+    Compartilhado com as threads do fan-out (paralelo.py copia o contexto),
+    por isso os contadores são protegidos por lock.
+    """
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.duracao_consultas = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._lock = threading.Lock()
+
+    def registrar_consulta(self, duracao: float):
+        with self._lock:
+            self.consultas += 1
+            self.duracao_consultas += duracao
+
+    def registrar_cache(self, encontrado: bool):
+        with self._lock:
+            if encontrado:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+
+_requisicao_atual = contextvars.ContextVar("metricas_requisicao", default=None)
+
+def registrar_consulta(duracao: float):
+    """Contabiliza uma chamada ao Supabase na requisição atual (fora de requisição, nada faz)"""
+    metricas = _requisicao_atual.get()
+    if metricas is not None:
+        metricas.registrar_consulta(duracao)
+
+def registrar_cache(encontrado: bool):
+    """Contabiliza um acesso ao cache de apoio na requisição atual"""
+    metricas = _requisicao_atual.get()
+    if metricas is not None:
+        metricas.registrar_cache(encontrado)
+
+class MetricasRotas:
+    """Agregados do processo por rota, expostos em /api/metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requisicoes = defaultdict(int)                              # (metodo, rota, status)
+        self.buckets = defaultdict(lambda: [0] * len(BUCKETS_LATENCIA))  # (metodo, rota)
+        self.latencia = defaultdict(float)                               # (metodo, rota)
+        self.contagem = defaultdict(int)                                 # (metodo, rota)
+        self.consultas = defaultdict(int)
+        self.duracao_consultas = defaultdict(float)
+        self.bytes = defaultdict(int)
+        self.cache_hits = defaultdict(int)
+        self.cache_misses = defaultdict(int)
+
+    def registrar(self, metodo: str, rota: str, status: int, duracao: float,
+                  metricas: MetricasRequisicao, tamanho: int):
+        chave = (metodo, rota)
+        with self._lock:
+            self.requisicoes[(metodo, rota, status)] += 1
+            buckets = self.buckets[chave]
+            for i, limite in enumerate(BUCKETS_LATENCIA):
+                if duracao <= limite:
+                    buckets[i] += 1
+            self.latencia[chave] += duracao
+            self.contagem[chave] += 1
+            self.consultas[chave] += metricas.consultas
+            self.duracao_consultas[chave] += metricas.duracao_consultas
+            self.bytes[chave] += tamanho
+            self.cache_hits[chave] += metricas.cache_hits
+            self.cache_misses[chave] += metricas.cache_misses
+
+    def exportar(self) -> str:
+        """Agregados no formato texto do Prometheus"""
+        with self._lock:
+            linhas = []
+
+            def serie(nome, tipo, ajuda, valores):
+                linhas.append(f"# HELP {nome} {ajuda}")
+                linhas.append(f"# TYPE {nome} {tipo}")
+                for rotulos, valor in valores:
+                    linhas.append(f"{nome}{_rotulos(rotulos)} {valor}")
+
+            serie("financeiro_http_requests_total", "counter", "Requisições por rota e status", [
+                ({"method": m, "route": r, "status": s}, v) for (m, r, s), v in sorted(self.requisicoes.items())
+            ])
+
+            nome = "financeiro_http_request_duration_seconds"
+            linhas.append(f"# HELP {nome} Latência por rota (até a resposta ser montada)")
+            linhas.append(f"# TYPE {nome} histogram")
+            for (m, r), buckets in sorted(self.buckets.items()):
+                for limite, valor in zip(BUCKETS_LATENCIA, buckets):
+                    linhas.append(f"{nome}_bucket{_rotulos({'method': m, 'route': r, 'le': limite})} {valor}")
+                rotulos = {"method": m, "route": r}
+                linhas.append(f"{nome}_bucket{_rotulos(dict(rotulos, le='+Inf'))} {self.contagem[(m, r)]}")
+                linhas.append(f"{nome}_sum{_rotulos(rotulos)} {self.latencia[(m, r)]:.6f}")
+                linhas.append(f"{nome}_count{_rotulos(rotulos)} {self.contagem[(m, r)]}")
+
+            por_rota = [
+                ("financeiro_supabase_calls_total", "Chamadas ao Supabase por rota", self.consultas),
+                ("financeiro_supabase_duration_seconds_total", "Tempo em chamadas ao Supabase por rota", self.duracao_consultas),
+                ("financeiro_response_bytes_total", "Bytes serializados nas respostas por rota", self.bytes),
+                ("financeiro_route_cache_hits_total", "Acertos no cache de apoio por rota", self.cache_hits),
+                ("financeiro_route_cache_misses_total", "Faltas no cache de apoio por rota", self.cache_misses),
+            ]
+            for nome, ajuda, valores in por_rota:
+                serie(nome, "counter", ajuda, [
+                    ({"method": m, "route": r}, v) for (m, r), v in sorted(valores.items())
+                ])
+
+        for prefixo, stats in (("financeiro_client_pool", get_pool_stats()),
+                               *((f"financeiro_{nome}_cache", s) for nome, s in get_cache_stats().items())):
+            for campo, valor in stats.items():
+                tipo = "counter" if campo in ("hits", "misses", "evictions") else "gauge"
+                nome = f"{prefixo}_{campo}_total" if tipo == "counter" else f"{prefixo}_{campo}"
+                linhas.append(f"# TYPE {nome} {tipo}")
+                linhas.append(f"{nome} {valor}")
+
+        return "\n".join(linhas) + "\n"
+
+metricas_rotas = MetricasRotas()
+
+def _rotulos(rotulos: dict) -> str:
+    def escapar(valor):
+        return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{chave}="{escapar(valor)}"' for chave, valor in rotulos.items()) + "}"
+
+@metricas_bp.before_app_request
+def iniciar_metricas():
+    _requisicao_atual.set(MetricasRequisicao())
+
+@metricas_bp.after_app_request
+def registrar_metricas(response):
+    metricas = _requisicao_atual.get()
+    if metricas is None:
+        return response
+    duracao = time.perf_counter() - metricas.inicio
+
+    # Respostas em streaming (NDJSON) não têm tamanho conhecido aqui, e a
+    # latência medida é a do início da resposta
+    tamanho = 0 if response.is_streamed else response.calculate_content_length() or 0
+    rota = request.url_rule.rule if request.url_rule else "<sem rota>"
+    metricas_rotas.registrar(request.method, rota, response.status_code, duracao, metricas, tamanho)
+
+    response.headers["Server-Timing"] = ", ".join([
+        f'db;desc="Supabase ({metricas.consultas})";dur={metricas.duracao_consultas * 1000:.1f}',
+        f'cache;desc="hits {metricas.cache_hits} / misses {metricas.cache_misses}"',
+        f"app;dur={duracao * 1000:.1f}",
+    ])
+    response.headers["Timing-Allow-Origin"] = "*"
+    return response
+
+@metricas_bp.teardown_app_request
+def encerrar_metricas(exc):
+    # set e não reset: em respostas com stream_with_context o teardown pode
+    # rodar em outro contexto que não o do before_request
+    _requisicao_atual.set(None)
+
+@metricas_bp.route("/metrics", methods=["GET"])
+def metrics():
+    """Métricas do processo no formato texto do Prometheus (requer METRICS_TOKEN)"""
+    if not METRICS_TOKEN:
+        return Response("Não encontrado\n", status=404, mimetype="text/plain")
+    auth_header = request.headers.get("Authorization", "")
+    # Bytes: compare_digest recusa (TypeError) strings com caracteres não ASCII
+    if not hmac.compare_digest(auth_header.encode(), f"Bearer {METRICS_TOKEN}".encode()):
+        return Response("Não autorizado\n", status=401, mimetype="text/plain")
+    return Response(metricas_rotas.exportar(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,37 @@
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Executor compartilhado pelas rotas que disparam várias consultas
+# independentes (cada consulta é I/O bloqueante ao PostgREST)
+FANOUT_MAX_WORKERS = int(os.getenv("FANOUT_MAX_WORKERS", "16"))
+FANOUT_TIMEOUT = float(os.getenv("FANOUT_TIMEOUT", "5"))
+
+_executor = ThreadPoolExecutor(max_workers=FANOUT_MAX_WORKERS, thread_name_prefix="fanout")
+
+class TempoEsgotado(Exception):
+    """Uma ou mais consultas paralelas não terminaram dentro do prazo da rota"""
+
+def executar_em_paralelo(tarefas: dict, timeout: float = FANOUT_TIMEOUT) -> dict:
+    """
+    Executa as tarefas (nome -> função sem argumentos) em paralelo e retorna
+    {nome: resultado}. O tempo total é o da tarefa mais lenta.
+
+    Cada tarefa roda com uma cópia do contexto atual, então g e o contexto
+    da requisição Flask continuam acessíveis. Se o prazo esgotar, as tarefas
+    ainda não iniciadas são canceladas e TempoEsgotado é lançado; a primeira
+    exceção de uma tarefa é relançada.
+    """
+    futures = {
+        nome: _executor.submit(contextvars.copy_context().run, funcao)
+        for nome, funcao in tarefas.items()
+    }
+    _, pendentes = wait(futures.values(), timeout=timeout)
+
+    if pendentes:
+        for future in pendentes:
+            future.cancel()
+        atrasadas = [nome for nome, future in futures.items() if future in pendentes]
+        raise TempoEsgotado(f"Tempo esgotado ({timeout:.1f}s) aguardando: {', '.join(atrasadas)}")
+
+    return {nome: future.result() for nome, future in futures.items()}
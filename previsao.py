@@ -0,0 +1,117 @@
+from datetime import date
+
+from cronograma import (para_centavos, para_reais, indice_mes, mes_do_indice,
+                        parcelas_pendentes, para_data)
+
+# Previsão de fluxo de caixa por conta. Tudo em centavos inteiros, mês a mês
+# como matrizes NumPy (linha = conta, coluna = mês da previsão):
+#   - recorrente: média mensal dos lançamentos de periodicidade "Fixo" nos
+#     meses de histórico, repetida em todos os meses; no mês inicial,
+#     descontados os fixos já lançados nele (já estão no saldo atual)
+#   - parcelas: cronograma dos parcelamentos ativos (cronograma.py), na conta
+#     de cada parcelamento; parcelas atrasadas de meses anteriores não entram
+#   - metas: aporte mensal necessário para atingir valor_objetivo até
+#     data_fim, reservado do total (metas não têm conta)
+# Movimentos sem conta (ou de contas inativas) vão para a linha "Sem conta".
+
+def prever_saldos(contas: list, transacoes_fixas: list, parcelamentos: list, metas: list,
+                  ano: int, mes: int, meses: int, meses_historico: int) -> dict:
+    """Saldos projetados por conta e totais para os `meses` meses a partir de mes/ano"""
+    import numpy as np
+
+    inicio = indice_mes(ano, mes)
+    sem_conta = len(contas)
+    linha_conta = {conta["id"]: i for i, conta in enumerate(contas)}
+    saldo_atual = np.array([para_centavos(c.get("saldo") or 0) for c in contas] + [0], dtype=np.int64)
+
+    # Recorrente: soma dos fixos por conta no histórico, dividida pelos meses;
+    # os fixos do mês inicial ficam à parte
+    recorrente = np.zeros(sem_conta + 1, dtype=np.int64)
+    lancados = np.zeros(sem_conta + 1, dtype=np.int64)
+    if transacoes_fixas:
+        linhas = np.array([linha_conta.get(t.get("conta_id"), sem_conta) for t in transacoes_fixas])
+        sinal = np.array([1 if t["tipo"] == "entrada" else -1 for t in transacoes_fixas], dtype=np.int64)
+        valores = np.array([para_centavos(t["valor"]) for t in transacoes_fixas], dtype=np.int64)
+        no_mes_inicial = np.array([
+            indice_mes(para_data(t["data_transacao"]).year, para_data(t["data_transacao"]).month) == inicio
+            for t in transacoes_fixas
+        ], dtype=bool)
+        np.add.at(recorrente, linhas[~no_mes_inicial], (sinal * valores)[~no_mes_inicial])
+        np.add.at(lancados, linhas[no_mes_inicial], (sinal * valores)[no_mes_inicial])
+        recorrente = np.rint(recorrente / meses_historico).astype(np.int64)
+
+    # Parcelas pendentes, debitadas na conta do parcelamento
+    parcelas = np.zeros((sem_conta + 1, meses), dtype=np.int64)
+    pendentes = parcelas_pendentes(parcelamentos, inicio, meses)
+    if len(pendentes["origem"]):
+        linha_parcelamento = np.array(
+            [linha_conta.get(p.get("conta_id"), sem_conta) for p in pendentes["ativos"]], dtype=np.int64
+        )
+        np.add.at(parcelas, (linha_parcelamento[pendentes["origem"]], pendentes["posicao"]), pendentes["centavos"])
+
+    fluxo = recorrente[:, None] - parcelas
+    fluxo[:, 0] -= lancados
+    saldos = saldo_atual[:, None] + np.cumsum(fluxo, axis=1)
+
+    # Metas: aporte mensal de (objetivo - atual) até o mês de data_fim, com o
+    # resto da divisão no último mês; metas vencidas concentram o aporte no primeiro
+    metas_ativas = [m for m in metas if m.get("status", "ativa") == "ativa"]
+    reservado = np.zeros(meses, dtype=np.int64)
+    aportes = []
+    if metas_ativas:
+        fim = np.array([
+            max(indice_mes(para_data(m["data_fim"]).year, para_data(m["data_fim"]).month) - inicio, 0)
+            for m in metas_ativas
+        ], dtype=np.int64)
+        restante = np.array([
+            max(para_centavos(m["valor_objetivo"]) - para_centavos(m.get("valor_atual") or 0), 0)
+            for m in metas_ativas
+        ], dtype=np.int64)
+        aporte = restante // (fim + 1)
+        no_prazo = np.arange(meses)[None, :] <= fim[:, None]
+        reservado += (no_prazo * aporte[:, None]).sum(axis=0)
+        dentro = fim < meses
+        np.add.at(reservado, fim[dentro], (restante - aporte * (fim + 1))[dentro])
+        aportes = [
+            {"meta_id": m["id"], "nome": m["nome"], "aporte_mensal": para_reais(a), "data_fim": str(m["data_fim"])[:10]}
+            for m, a in zip(metas_ativas, aporte)
+        ]
+
+    total = saldos.sum(axis=0)
+    reservado_acumulado = np.cumsum(reservado)
+
+    linhas_contas = [
+        {
+            "conta_id": conta["id"],
+            "nome": conta.get("nome"),
+            "saldo_atual": para_reais(saldo_atual[i]),
+            "recorrente_mensal": para_reais(recorrente[i]),
+            "saldos": [para_reais(v) for v in saldos[i]],
+        }
+        for i, conta in enumerate(contas)
+    ]
+    if recorrente[sem_conta] or parcelas[sem_conta].any():
+        linhas_contas.append({
+            "conta_id": None,
+            "nome": "Sem conta",
+            "saldo_atual": 0.0,
+            "recorrente_mensal": para_reais(recorrente[sem_conta]),
+            "saldos": [para_reais(v) for v in saldos[sem_conta]],
+        })
+
+    return {
+        "meses": [{"ano": a, "mes": m} for a, m in (mes_do_indice(inicio + i) for i in range(meses))],
+        "contas": linhas_contas,
+        "metas": aportes,
+        "total": {
+            "saldos": [para_reais(v) for v in total],
+            "parcelas": [para_reais(v) for v in parcelas.sum(axis=0)],
+            "reservado_metas": [para_reais(v) for v in reservado_acumulado],
+            "saldo_livre": [para_reais(v) for v in total - reservado_acumulado],
+        },
+    }
+
+def janela_historico(ano: int, mes: int, meses_historico: int) -> tuple:
+    """[início, fim) dos lançamentos fixos: os meses de histórico e o mês inicial"""
+    inicio = indice_mes(ano, mes)
+    return date(*mes_do_indice(inicio - meses_historico), 1), date(*mes_do_indice(inicio + 1), 1)
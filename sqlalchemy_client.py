@@ -0,0 +1,554 @@
+"""
+Backend de armazenamento local (STORAGE_BACKEND=sqlalchemy).
+
+Implementa, sobre SQLAlchemy Core e o esquema de financial.py, o mesmo
+subconjunto da API de consultas do supabase-py usado por supabase_models.py
+(table/select/insert/upsert/update/delete/filtros/order/limit/execute e rpc),
+para que modelos e rotas rodem contra SQLite ou Postgres local sem o
+round-trip HTTP ao PostgREST.
+
+Os triggers e funções de supabase_setup.sql têm equivalentes aqui: updated_at
+e saldo_inicial são preenchidos nas escritas, o saldo das contas e o progresso
+das metas são atualizados na mesma transação da escrita em transacoes, e as
+funções RPC agregam direto
+de transacoes (sem o resumo mensal materializado).
+"""
+
+import re
+import threading
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import and_, case, create_engine, func, or_, select
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.types import Date, DateTime
+
+from financial import db
+
+# Item da projeção do PostgREST: "alias:tabela(c1, c2)" ou uma coluna simples
+_ITEM_PROJECAO = re.compile(r'(\w+):(\w+)\(([^)]*)\)|([\w*]+)')
+
+class LocalResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+def _para_json(valor):
+    """Converte valores do banco para o formato que o PostgREST devolveria"""
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+def _linha_para_dict(linha) -> dict:
+    return {chave: _para_json(valor) for chave, valor in linha._mapping.items()}
+
+class LocalQuery:
+    def __init__(self, client, table_name):
+        self.client = client
+        self.table = client.tabela(table_name)
+        self._operacao = 'select'
+        self._colunas = '*'
+        self._payload = None
+        self._returning = True
+        self._filtros = []
+        self._negar = False
+        self._ordem = []
+        self._limite = None
+
+    def select(self, columns: str = "*", count=None):
+        self._operacao = 'select'
+        self._colunas = columns
+        return self
+
+    def insert(self, data, count=None, returning=None, upsert=False):
+        self._operacao = 'insert'
+        self._payload = data
+        self._returning = getattr(returning, 'value', returning) != 'minimal'
+        return self
+
+    def upsert(self, data, count=None, returning=None, ignore_duplicates=False, on_conflict=''):
+        self._operacao = 'upsert'
+        self._payload = data
+        self._returning = getattr(returning, 'value', returning) != 'minimal'
+        self._on_conflict = [c.strip() for c in on_conflict.split(',') if c.strip()] or ['id']
+        self._ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, data):
+        self._operacao = 'update'
+        self._payload = data
+        return self
+
+    def delete(self):
+        self._operacao = 'delete'
+        return self
+
+    @property
+    def not_(self):
+        self._negar = True
+        return self
+
+    def _filtro(self, column, condicao):
+        expressao = condicao(self.table.c[column])
+        if self._negar:
+            self._negar = False
+            expressao = ~expressao
+        self._filtros.append(expressao)
+        return self
+
+    def eq(self, column, value):
+        return self._filtro(column, lambda c: c == self._converter(column, value))
+
+    def neq(self, column, value):
+        return self._filtro(column, lambda c: c != self._converter(column, value))
+
+    def gt(self, column, value):
+        return self._filtro(column, lambda c: c > self._converter(column, value))
+
+    def gte(self, column, value):
+        return self._filtro(column, lambda c: c >= self._converter(column, value))
+
+    def lt(self, column, value):
+        return self._filtro(column, lambda c: c < self._converter(column, value))
+
+    def lte(self, column, value):
+        return self._filtro(column, lambda c: c <= self._converter(column, value))
+
+    def in_(self, column, values):
+        return self._filtro(column, lambda c: c.in_([self._converter(column, v) for v in values]))
+
+    def is_(self, column, value):
+        esperado = {'null': None, 'true': True, 'false': False}.get(value, value)
+        return self._filtro(column, lambda c: c.is_(esperado))
+
+    def order(self, column, desc=False):
+        coluna = self.table.c[column]
+        self._ordem.append(coluna.desc() if desc else coluna.asc())
+        return self
+
+    def limit(self, size):
+        self._limite = size
+        return self
+
+    def _converter(self, column, value):
+        """Strings ISO viram date/datetime nas colunas desses tipos, como no Postgres"""
+        if isinstance(value, str):
+            tipo = self.table.c[column].type
+            if isinstance(tipo, DateTime):
+                return datetime.fromisoformat(value)
+            if isinstance(tipo, Date):
+                return date.fromisoformat(value)
+        return value
+
+    def _preparar(self, row: dict) -> dict:
+        desconhecidas = set(row) - set(self.table.c.keys())
+        if desconhecidas:
+            raise Exception(f"Coluna(s) inexistente(s) em {self.table.name}: {', '.join(sorted(desconhecidas))}")
+        return {coluna: self._converter(coluna, valor) for coluna, valor in row.items()}
+
+    def _preparar_insercao(self, row: dict) -> dict:
+        """Defaults que no Supabase vêm do banco: id e saldo inicial da conta"""
+        row = {'id': str(uuid.uuid4()), **row}
+        if self.table.name == 'contas':
+            row.setdefault('saldo_inicial', row.get('saldo') or 0)
+        return row
+
+    def _projecao(self):
+        """Colunas e JOINs da projeção; recursos embutidos viram colunas <alias>.<coluna>"""
+        origem, colunas, embutidos = self.table, [], {}
+        for alias, tabela, internas, coluna in _ITEM_PROJECAO.findall(self._colunas):
+            if alias:
+                # Recurso embutido alias:tabela(colunas), pela chave estrangeira <alias>_id
+                relacionada = self.client.tabela(tabela).alias(alias)
+                origem = origem.outerjoin(relacionada, relacionada.c.id == self.table.c[f'{alias}_id'])
+                embutidos[alias] = [c.strip() for c in internas.split(',')]
+                colunas += [relacionada.c[c].label(f'{alias}.{c}') for c in embutidos[alias]]
+                colunas.append(relacionada.c.id.label(f'{alias}.id'))
+            elif coluna == '*':
+                colunas += list(self.table.c)
+            else:
+                colunas.append(self.table.c[coluna])
+        return origem, colunas, embutidos
+
+    @staticmethod
+    def _aninhar(linha: dict, embutidos: dict) -> dict:
+        """Agrupa as colunas <alias>.<coluna> em um objeto, como o PostgREST (None sem vínculo)"""
+        for alias, colunas in embutidos.items():
+            presente = linha.pop(f'{alias}.id') is not None
+            valores = {c: linha.pop(f'{alias}.{c}') for c in colunas}
+            linha[alias] = valores if presente else None
+        return linha
+
+    def _buscar(self, conn, filtros) -> list:
+        return [_linha_para_dict(l) for l in conn.execute(select(self.table).where(*filtros))]
+
+    def execute(self):
+        with self.client.engine.begin() as conn:
+            if self._operacao == 'select':
+                origem, colunas, embutidos = self._projecao()
+                query = select(*colunas).select_from(origem).where(*self._filtros).order_by(*self._ordem)
+                if self._limite is not None:
+                    query = query.limit(self._limite)
+                return LocalResponse([self._aninhar(_linha_para_dict(l), embutidos) for l in conn.execute(query)])
+
+            novas = self._payload if isinstance(self._payload, list) else [self._payload]
+
+            if self._operacao == 'insert':
+                # Um executemany por conjunto de colunas (em geral, um só para o lote)
+                novas = [self._preparar_insercao(self._preparar(nova)) for nova in novas]
+                grupos = {}
+                for nova in novas:
+                    grupos.setdefault(tuple(sorted(nova)), []).append(nova)
+                for grupo in grupos.values():
+                    conn.execute(self.table.insert(), grupo)
+                self.client.gatilho(conn, self.table.name, [], novas)
+                if not self._returning:
+                    return LocalResponse([])
+                return LocalResponse(self._buscar(conn, [self.table.c.id.in_([n['id'] for n in novas])]))
+
+            if self._operacao == 'upsert':
+                afetadas, antigas = [], []
+                for nova in novas:
+                    nova = self._preparar(nova)
+                    chave = [self.table.c[c].is_(None) if nova.get(c) is None else self.table.c[c] == nova[c]
+                             for c in self._on_conflict]
+                    existente = self._buscar(conn, chave)
+                    if not existente:
+                        nova = self._preparar_insercao(nova)
+                        conn.execute(self.table.insert().values(**nova))
+                        afetadas += self._buscar(conn, [self.table.c.id == nova['id']])
+                    elif not self._ignore_duplicates:
+                        antigas += existente
+                        conn.execute(self.table.update().where(self.table.c.id == existente[0]['id']).values(**nova))
+                        afetadas += self._buscar(conn, [self.table.c.id == existente[0]['id']])
+                self.client.gatilho(conn, self.table.name, antigas, afetadas)
+                return LocalResponse(afetadas if self._returning else [])
+
+            antigas = self._buscar(conn, self._filtros)
+            ids = [r['id'] for r in antigas]
+            if not ids:
+                return LocalResponse([])
+
+            if self._operacao == 'update':
+                conn.execute(self.table.update().where(self.table.c.id.in_(ids)).values(**self._preparar(self._payload)))
+                novas = self._buscar(conn, [self.table.c.id.in_(ids)])
+                self.client.gatilho(conn, self.table.name, antigas, novas)
+                return LocalResponse(novas)
+
+            conn.execute(self.table.delete().where(self.table.c.id.in_(ids)))
+            self.client.gatilho(conn, self.table.name, antigas, [])
+            return LocalResponse(antigas)
+
+class LocalRpc:
+    def __init__(self, client, fn, params):
+        self.client = client
+        self.fn = fn
+        self.params = params or {}
+
+    def execute(self):
+        funcao = RPC_FUNCTIONS.get(self.fn)
+        if funcao is None:
+            raise Exception(f"Função RPC desconhecida: {self.fn}")
+        with self.client.engine.begin() as conn:
+            return LocalResponse(funcao(self.client, conn, **self.params))
+
+class SQLAlchemyClient:
+    """Cliente local com a mesma interface de consultas do cliente Supabase"""
+
+    def __init__(self, database_url: str):
+        opcoes = {}
+        if database_url.startswith('sqlite'):
+            opcoes['connect_args'] = {'check_same_thread': False}
+            if database_url in ('sqlite://', 'sqlite:///:memory:'):
+                # Banco em memória: uma única conexão compartilhada pelas threads
+                opcoes['poolclass'] = StaticPool
+        self.engine = create_engine(database_url, **opcoes)
+        db.metadata.create_all(self.engine)
+
+    def tabela(self, table_name: str):
+        tabela = db.metadata.tables.get(table_name)
+        if tabela is None:
+            raise Exception(f"Tabela inexistente: {table_name}")
+        return tabela
+
+    def table(self, table_name: str) -> LocalQuery:
+        return LocalQuery(self, table_name)
+
+    def rpc(self, fn: str, params=None) -> LocalRpc:
+        return LocalRpc(self, fn, params)
+
+    def gatilho(self, conn, table_name: str, antigas: list, novas: list):
+        """Equivalente aos triggers de supabase_setup.sql: saldo das contas e progresso das metas"""
+        if table_name == 'transacoes':
+            self._saldo_contas(conn, antigas, novas)
+            self._progresso_metas(conn, antigas, novas)
+        elif table_name == 'metas':
+            self._valor_atual_metas(conn, antigas, novas)
+
+    def _saldo_contas(self, conn, antigas: list, novas: list):
+        """Aplica a variação das transações ao saldo das contas do mesmo dono"""
+        deltas = {}
+        for linhas, sinal in ((novas, 1), (antigas, -1)):
+            for t in linhas:
+                if t.get('conta_id'):
+                    chave = (t['conta_id'], t.get('user_id'))
+                    valor = Decimal(str(t['valor'])) * (1 if t['tipo'] == 'entrada' else -1)
+                    deltas[chave] = deltas.get(chave, 0) + sinal * valor
+        contas = self.tabela('contas')
+        for conta_id, user_id in sorted(deltas, key=lambda chave: (chave[0], str(chave[1]))):
+            if deltas[(conta_id, user_id)]:
+                conn.execute(
+                    contas.update()
+                    .where(contas.c.id == conta_id, _mesmo_usuario(contas.c.user_id, user_id))
+                    .values(saldo=contas.c.saldo + deltas[(conta_id, user_id)])
+                )
+
+    def _progresso_metas(self, conn, antigas: list, novas: list):
+        """Aplica a variação das transações ao valor_atual das metas da categoria e período"""
+        m = self.tabela('metas')
+        categorizadas = [
+            (t, sinal) for linhas, sinal in ((novas, 1), (antigas, -1)) for t in linhas if t.get('categoria_id')
+        ]
+        if not categorizadas:
+            return
+
+        # Uma consulta pelas metas de todas as categorias do comando, como o
+        # trigger por comando do Postgres, em vez de uma por transação
+        metas_por_categoria = {}
+        for meta in conn.execute(
+            select(m.c.id, m.c.categoria_id, m.c.user_id, m.c.data_inicio, m.c.data_fim)
+            .where(m.c.categoria_id.in_({t['categoria_id'] for t, _ in categorizadas}))
+        ):
+            metas_por_categoria.setdefault(meta.categoria_id, []).append(meta)
+
+        deltas = {}
+        for t, sinal in categorizadas:
+            data_transacao = _como_data(t['data_transacao'])
+            for meta in metas_por_categoria.get(t['categoria_id'], []):
+                if meta.user_id == t.get('user_id') and meta.data_inicio <= data_transacao <= meta.data_fim:
+                    deltas[meta.id] = deltas.get(meta.id, 0) + sinal * Decimal(str(t['valor']))
+        for meta_id in sorted(deltas):
+            if deltas[meta_id]:
+                conn.execute(
+                    m.update().where(m.c.id == meta_id)
+                    .values(valor_atual=func.coalesce(m.c.valor_atual, 0) + deltas[meta_id])
+                )
+
+    def _valor_atual_metas(self, conn, antigas: list, novas: list):
+        """Meta nova ou com categoria/período alterados: valor_atual calculado do zero"""
+        campos = ('categoria_id', 'data_inicio', 'data_fim', 'user_id')
+        anteriores = {a['id']: a for a in antigas}
+        for meta in novas:
+            anterior = anteriores.get(meta['id'])
+            if not meta.get('categoria_id'):
+                continue
+            if anterior and all(str(anterior.get(c)) == str(meta.get(c)) for c in campos):
+                continue
+            m = self.tabela('metas')
+            conn.execute(m.update().where(m.c.id == meta['id']).values(valor_atual=_soma_meta(self, meta)))
+
+def _como_data(valor) -> date:
+    return valor if isinstance(valor, date) else date.fromisoformat(str(valor)[:10])
+
+def _mesmo_usuario(coluna, user_id):
+    """user_id IS NOT DISTINCT FROM"""
+    return coluna.is_(None) if user_id is None else coluna == user_id
+
+def _soma_meta(client, meta: dict):
+    """Soma das transações da categoria da meta no período (subconsulta escalar)"""
+    t = client.tabela('transacoes')
+    return (
+        select(func.coalesce(func.sum(t.c.valor), 0))
+        .where(
+            t.c.categoria_id == meta['categoria_id'],
+            _mesmo_usuario(t.c.user_id, meta.get('user_id')),
+            t.c.data_transacao >= _como_data(meta['data_inicio']),
+            t.c.data_transacao <= _como_data(meta['data_fim']),
+        )
+        .scalar_subquery()
+    )
+
+# Implementações em SQLAlchemy Core das funções de supabase_setup.sql
+RPC_FUNCTIONS = {}
+
+def _rpc(nome):
+    def registrar(funcao):
+        RPC_FUNCTIONS[nome] = funcao
+        return funcao
+    return registrar
+
+_TABELAS_DIMENSAO = {
+    'categoria': 'categorias',
+    'forma_pagamento': 'formas_pagamento',
+    'tipo_gasto': 'tipos_gasto',
+    'periodicidade': 'periodicidades',
+}
+
+def _filtros_transacoes(t, p_mes=None, p_ano=None, p_user_id=None, p_tipo=None):
+    filtros = []
+    if p_mes is not None:
+        filtros.append(t.c.mes_referencia == p_mes)
+    if p_ano is not None:
+        filtros.append(t.c.ano_referencia == p_ano)
+    if p_user_id is not None:
+        filtros.append(t.c.user_id == p_user_id)
+    if p_tipo is not None:
+        filtros.append(t.c.tipo == p_tipo)
+    return filtros
+
+@_rpc('balanco_anual')
+def _balanco_anual(client, conn, p_ano, p_user_id=None):
+    t = client.tabela('transacoes')
+    query = (
+        select(
+            t.c.mes_referencia,
+            func.coalesce(func.sum(case((t.c.tipo == 'entrada', t.c.valor))), 0).label('entradas'),
+            func.coalesce(func.sum(case((t.c.tipo == 'saida', t.c.valor))), 0).label('saidas'),
+        )
+        .where(*_filtros_transacoes(t, p_ano=p_ano, p_user_id=p_user_id))
+        .group_by(t.c.mes_referencia)
+        .order_by(t.c.mes_referencia)
+    )
+    return [_linha_para_dict(l) for l in conn.execute(query)]
+
+@_rpc('resumo_transacoes')
+def _resumo_transacoes(client, conn, p_dimensao, p_mes=None, p_ano=None, p_tipo=None, p_user_id=None):
+    tabela = _TABELAS_DIMENSAO.get(p_dimensao)
+    if tabela is None:
+        raise Exception(f"Dimensão de resumo inválida: {p_dimensao}")
+    t, d = client.tabela('transacoes'), client.tabela(tabela)
+    total = func.sum(t.c.valor)
+    query = (
+        select(d.c.id, d.c.nome, total.label('total'))
+        .select_from(t.outerjoin(d, d.c.id == t.c[f'{p_dimensao}_id']))
+        .where(*_filtros_transacoes(t, p_mes, p_ano, p_user_id, p_tipo))
+        .group_by(d.c.id, d.c.nome)
+        .order_by(total.desc())
+    )
+    return [_linha_para_dict(l) for l in conn.execute(query)]
+
+@_rpc('resumo_mes_agrupado')
+def _resumo_mes_agrupado(client, conn, p_mes, p_ano, p_user_id=None):
+    t = client.tabela('transacoes')
+    origem, colunas, grupo = t, [t.c.tipo], [t.c.tipo]
+    for dimensao, tabela in _TABELAS_DIMENSAO.items():
+        d = client.tabela(tabela).alias(dimensao)
+        origem = origem.outerjoin(d, d.c.id == t.c[f'{dimensao}_id'])
+        colunas += [d.c.id.label(f'{dimensao}_id'), d.c.nome.label(dimensao)]
+        grupo += [d.c.id, d.c.nome]
+    query = (
+        select(*colunas, func.count().label('quantidade'), func.sum(t.c.valor).label('total'))
+        .select_from(origem)
+        .where(*_filtros_transacoes(t, p_mes, p_ano, p_user_id))
+        .group_by(*grupo)
+    )
+    return [_linha_para_dict(l) for l in conn.execute(query)]
+
+@_rpc('resumo_diario')
+def _resumo_diario(client, conn, p_inicio, p_fim, p_user_id=None):
+    t = client.tabela('transacoes')
+    filtros = [t.c.data_transacao >= date.fromisoformat(p_inicio), t.c.data_transacao < date.fromisoformat(p_fim)]
+    if p_user_id is not None:
+        filtros.append(t.c.user_id == p_user_id)
+    query = (
+        select(
+            t.c.data_transacao,
+            func.count().label('quantidade'),
+            func.coalesce(func.sum(case((t.c.tipo == 'entrada', t.c.valor))), 0).label('entradas'),
+            func.coalesce(func.sum(case((t.c.tipo == 'saida', t.c.valor))), 0).label('saidas'),
+        )
+        .where(*filtros)
+        .group_by(t.c.data_transacao)
+        .order_by(t.c.data_transacao)
+    )
+    return [_linha_para_dict(l) for l in conn.execute(query)]
+
+@_rpc('transacoes_pagina')
+def _transacoes_pagina(client, conn, p_limite, p_cursor_data=None, p_cursor_id=None,
+                       p_mes=None, p_ano=None, p_user_id=None):
+    t = client.tabela('transacoes')
+    filtros = _filtros_transacoes(t, p_mes, p_ano, p_user_id)
+    if p_cursor_data is not None:
+        cursor_data = date.fromisoformat(p_cursor_data)
+        filtros.append(or_(
+            t.c.data_transacao < cursor_data,
+            and_(t.c.data_transacao == cursor_data, t.c.id < p_cursor_id),
+        ))
+    query = select(t).where(*filtros).order_by(t.c.data_transacao.desc(), t.c.id.desc()).limit(p_limite)
+    return [_linha_para_dict(l) for l in conn.execute(query)]
+
+@_rpc('validador_dados')
+def _validador_dados(client, conn, p_tabelas, p_mes=None, p_ano=None, p_user_id=None, p_dia=None):
+    ultima, quantidade = None, 0
+    for tabela in p_tabelas:
+        t = client.tabela(tabela)
+        filtros = _filtros_transacoes(t, p_mes, p_ano) if tabela == 'transacoes' else []
+        if tabela == 'transacoes' and p_dia is not None:
+            filtros.append(t.c.data_transacao == _como_data(p_dia))
+        if p_user_id is not None:
+            filtros.append(or_(t.c.user_id == p_user_id, t.c.user_id.is_(None)))
+        linha = conn.execute(select(func.max(t.c.updated_at), func.count()).where(*filtros)).one()
+        if linha[0] is not None and (ultima is None or linha[0] > ultima):
+            ultima = linha[0]
+        quantidade += linha[1]
+    return [{'ultima_atualizacao': _para_json(ultima), 'quantidade': quantidade}]
+
+@_rpc('reconciliar_resumo_mensal')
+def _reconciliar_resumo_mensal(client, conn, p_corrigir=False):
+    # Sem resumo materializado no backend local: nada a reconciliar
+    return []
+
+@_rpc('recalcular_saldos')
+def _recalcular_saldos(client, conn):
+    c, t = client.tabela('contas'), client.tabela('transacoes')
+    movimento = (
+        select(t.c.conta_id, t.c.user_id,
+               func.sum(case((t.c.tipo == 'entrada', t.c.valor), else_=-t.c.valor)).label('total'))
+        .group_by(t.c.conta_id, t.c.user_id)
+        .subquery()
+    )
+    # Só as transações do mesmo dono da conta, como em atualizar_saldo_contas
+    query = (
+        select(c.c.id, c.c.nome, c.c.saldo, (func.coalesce(c.c.saldo_inicial, 0) + func.coalesce(movimento.c.total, 0)).label('novo'))
+        .select_from(c.outerjoin(movimento, and_(
+            movimento.c.conta_id == c.c.id,
+            or_(movimento.c.user_id == c.c.user_id, and_(movimento.c.user_id.is_(None), c.c.user_id.is_(None)))
+        )))
+    )
+    alteradas = []
+    for conta in conn.execute(query).all():
+        if conta.saldo != conta.novo:
+            conn.execute(c.update().where(c.c.id == conta.id).values(saldo=conta.novo))
+            alteradas.append({
+                'conta_id': conta.id, 'nome': conta.nome,
+                'saldo_anterior': _para_json(conta.saldo), 'saldo_recalculado': _para_json(conta.novo),
+            })
+    return alteradas
+
+@_rpc('recalcular_metas')
+def _recalcular_metas(client, conn):
+    m = client.tabela('metas')
+    alteradas = []
+    for meta in conn.execute(select(m).where(m.c.categoria_id.is_not(None))).mappings().all():
+        novo = conn.execute(select(_soma_meta(client, meta))).scalar()
+        if meta['valor_atual'] != novo:
+            conn.execute(m.update().where(m.c.id == meta['id']).values(valor_atual=novo))
+            alteradas.append({
+                'meta_id': meta['id'], 'nome': meta['nome'],
+                'valor_anterior': _para_json(meta['valor_atual']), 'valor_recalculado': _para_json(novo),
+            })
+    return alteradas
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_local_client(database_url: str) -> SQLAlchemyClient:
+    """Cliente local por URL do banco, criado no primeiro uso (engine e esquema)"""
+    with _clients_lock:
+        client = _clients.get(database_url)
+        if client is None:
+            client = _clients[database_url] = SQLAlchemyClient(database_url)
+        return client
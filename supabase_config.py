@@ -1,35 +1,161 @@
 import os
-from supabase import create_client, Client
-from dotenv import load_dotenv
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING
 
-# Carregar variáveis de ambiente
-load_dotenv()
+if TYPE_CHECKING:
+    from supabase import Client
+
+# Carregar variáveis de ambiente do .env. No Vercel elas já vêm do ambiente
+# da função, então nem o python-dotenv é importado no cold start
+if not os.getenv("VERCEL"):
+    from dotenv import load_dotenv
+    load_dotenv()
 
 # Configurações do Supabase
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
 
-# Cliente Supabase para operações administrativas (service role)
-supabase_admin: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+# Configurações do pool de clientes por token
+CLIENT_POOL_TTL = int(os.getenv("SUPABASE_CLIENT_POOL_TTL", "300"))
+CLIENT_POOL_MAX_SIZE = int(os.getenv("SUPABASE_CLIENT_POOL_MAX_SIZE", "256"))
+
+# Backend de armazenamento: "supabase" (PostgREST) ou "sqlalchemy" (banco
+# local em DATABASE_URL, sem round-trip HTTP; ver sqlalchemy_client.py)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase").lower()
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///financeiro.db")
+
+if STORAGE_BACKEND not in ("supabase", "sqlalchemy"):
+    raise ValueError(f"STORAGE_BACKEND inválido: {STORAGE_BACKEND}")
+
+# Clientes compartilhados (service role e anon key), criados na primeira
+# chamada a get_supabase_admin/get_supabase_client e não na importação: o
+# pacote supabase (httpx, gotrue, realtime, storage) custa centenas de ms
+# e a criação não é necessária em toda invocação
+_clientes: dict = {}
+_clientes_lock = threading.Lock()
+
+def criar_cliente(key: str) -> "Client":
+    """Cria um cliente Supabase, importando o pacote sob demanda"""
+    from supabase import create_client
+    return create_client(SUPABASE_URL, key)
 
-# Cliente Supabase para operações do usuário (anon key)
-supabase_client: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+def _cliente_compartilhado(nome: str, key: str) -> "Client":
+    client = _clientes.get(nome)
+    if client is None:
+        with _clientes_lock:
+            client = _clientes.get(nome)
+            if client is None:
+                client = _clientes[nome] = criar_cliente(key)
+    return client
+
+class ClientPool:
+    """
+    Pool de clientes Supabase por token de usuário.
+    Reaproveita o cliente (e a sessão HTTP keep-alive do PostgREST) entre
+    requisições e modelos, com expiração por TTL e limite de tamanho (LRU).
+    Seguro para workers Flask com threads.
+    """
+    
+    def __init__(self, ttl: int = CLIENT_POOL_TTL, max_size: int = CLIENT_POOL_MAX_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._clients = OrderedDict()  # token -> (cliente, expira_em)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, user_token: str) -> "Client":
+        """Retorna o cliente do token, criando-o se não estiver no pool"""
+        with self._lock:
+            self._evict_expired(time.monotonic())
+            entry = self._clients.get(user_token)
+            if entry:
+                self.hits += 1
+                self._clients.move_to_end(user_token)
+                return entry[0]
+            self.misses += 1
+        
+        # Criar fora do lock para não bloquear as demais threads durante o handshake
+        client = self._create(user_token)
+        
+        with self._lock:
+            entry = self._clients.get(user_token)
+            if entry:
+                # Outra thread criou o cliente enquanto este era criado
+                return entry[0]
+            self._clients[user_token] = (client, time.monotonic() + self.ttl)
+            while len(self._clients) > self.max_size:
+                self._clients.popitem(last=False)
+                self.evictions += 1
+        return client
+    
+    def clear(self):
+        """Remove todos os clientes do pool"""
+        with self._lock:
+            self.evictions += len(self._clients)
+            self._clients.clear()
+    
+    def stats(self) -> dict:
+        """Métricas do pool"""
+        with self._lock:
+            return {
+                "size": len(self._clients),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+    
+    def _evict_expired(self, agora: float):
+        expirados = [token for token, (_, expira_em) in self._clients.items() if expira_em <= agora]
+        for token in expirados:
+            del self._clients[token]
+        self.evictions += len(expirados)
+    
+    def _create(self, user_token: str) -> "Client":
+        client = criar_cliente(SUPABASE_ANON_KEY)
+        # Autenticar o PostgREST diretamente com o token do usuário (RLS), sem
+        # round-trip ao GoTrue; isso também inicializa agora a sessão HTTP
+        # compartilhada pelas threads
+        client.postgrest.auth(user_token)
+        return client
+
+client_pool = ClientPool()
 
 def get_supabase_client(user_token=None):
     """
     Retorna o cliente Supabase apropriado.
-    Se user_token for fornecido, configura o cliente para o usuário autenticado.
+    Se user_token for fornecido, retorna o cliente do pool para o usuário autenticado.
     """
+    if STORAGE_BACKEND == "sqlalchemy":
+        return get_local_client()
     if user_token:
-        client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-        client.auth.set_session(user_token)
-        return client
-    return supabase_client
+        return client_pool.get(user_token)
+    # Cliente Supabase para operações do usuário (anon key)
+    return _cliente_compartilhado("anon", SUPABASE_ANON_KEY)
 
 def get_supabase_admin():
     """
     Retorna o cliente Supabase com privilégios administrativos.
     """
-    return supabase_admin
+    if STORAGE_BACKEND == "sqlalchemy":
+        return get_local_client()
+    # Cliente Supabase para operações administrativas (service role)
+    return _cliente_compartilhado("admin", SUPABASE_SERVICE_KEY)
+
+def get_local_client():
+    """
+    Retorna o cliente do banco local (mesma interface de consultas do
+    cliente Supabase). Importado sob demanda: só o backend local usa SQLAlchemy.
+    """
+    from sqlalchemy_client import get_local_client as criar_cliente_local
+    return criar_cliente_local(DATABASE_URL)
 
+def get_pool_stats():
+    """
+    Retorna as métricas do pool de clientes (hits, misses, evictions).
+    """
+    return client_pool.stats()
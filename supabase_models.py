@@ -1,10 +1,34 @@
-from datetime import datetime, date
-from typing import Optional, Dict, Any
+from datetime import datetime, date, timedelta
+from typing import Optional, Dict, Any, List, Tuple, Iterator
 from supabase_config import get_supabase_admin, get_supabase_client
+from cache import lookup_cache
+from cronograma import invalidar_cronograma
+from metricas import registrar_consulta, registrar_cache
+import base64
+import json
+import math
+import time
 import uuid
 
+# Valor de postgrest.types.ReturnMethod.minimal (um str Enum); o literal evita
+# importar postgrest (e httpx) junto com os modelos no cold start
+RETORNO_MINIMO = "minimal"
+
 class SupabaseModel:
-    """Classe base para modelos que interagem com Supabase"""
+    """
+    Classe base (repositório genérico) para modelos que interagem com Supabase.
+    
+    As consultas recebem projeção explícita de colunas, filtros como tuplas
+    (operador, coluna, valor) - ex.: ('eq', 'user_id', user_id) ou
+    ('is_', 'user_id', 'null') - e ordenação como tuplas (coluna, desc).
+    """
+    
+    table_name: str = None
+    entidade: str = None          # nome no singular, usado nas mensagens de erro
+    entidade_plural: str = None
+    soft_delete: bool = False     # delete marca ativo = false em vez de excluir
+    cacheable: bool = False       # get_all passa pelo cache de tabelas de apoio
+    invalida: tuple = ()          # tabelas em cache alteradas por triggers desta tabela
     
     def __init__(self, user_token=None):
         self.client = get_supabase_client(user_token) if user_token else get_supabase_admin()
@@ -12,263 +36,650 @@ class SupabaseModel:
     def to_dict(self):
         """Converte o objeto para dicionário"""
         return {k: v for k, v in self.__dict__.items() if not k.startswith('_') and k != 'client'}
-
-class Conta:
-    def __init__(self, user_token=None):
-        self.client = get_supabase_client(user_token) if user_token else get_supabase_admin()
-        self.table_name = 'contas'
     
-    def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Criar nova conta"""
+    def _execute(self, query):
+        """Executa uma consulta PostgREST (ponto único de acesso à rede)"""
+        inicio = time.perf_counter()
         try:
-            result = self.client.table(self.table_name).insert(data).execute()
-            return result.data[0] if result.data else None
-        except Exception as e:
-            raise Exception(f"Erro ao criar conta: {str(e)}")
+            return query.execute()
+        finally:
+            registrar_consulta(time.perf_counter() - inicio)
     
-    def get_all(self, user_id: str) -> list:
-        """Buscar todas as contas do usuário"""
-        try:
-            result = self.client.table(self.table_name).select("*").eq('user_id', user_id).eq('ativo', True).execute()
-            return result.data
-        except Exception as e:
-            raise Exception(f"Erro ao buscar contas: {str(e)}")
+    @staticmethod
+    def _apply_filters(query, filters: List[Tuple[str, str, Any]] = None):
+        """Aplica filtros (operador, coluna, valor) a uma consulta; 'not_.is_' nega o operador"""
+        for operador, coluna, valor in filters or []:
+            for parte in operador.split('.')[:-1]:
+                query = getattr(query, parte)
+            query = getattr(query, operador.split('.')[-1])(coluna, valor)
+        return query
     
-    def get_by_id(self, conta_id: str, user_id: str) -> Dict[str, Any]:
-        """Buscar conta por ID"""
-        try:
-            result = self.client.table(self.table_name).select("*").eq('id', conta_id).eq('user_id', user_id).execute()
-            return result.data[0] if result.data else None
-        except Exception as e:
-            raise Exception(f"Erro ao buscar conta: {str(e)}")
+    def _select(self, columns: str = "*", filters=None, order=None, limit: int = None):
+        """Monta um SELECT com projeção de colunas, filtros e ordenação"""
+        query = self._apply_filters(self.client.table(self.table_name).select(columns), filters)
+        for coluna, desc in order or []:
+            query = query.order(coluna, desc=desc)
+        if limit is not None:
+            query = query.limit(limit)
+        return query
     
-    def update(self, conta_id: str, data: Dict[str, Any], user_id: str) -> Dict[str, Any]:
-        """Atualizar conta"""
-        try:
-            result = self.client.table(self.table_name).update(data).eq('id', conta_id).eq('user_id', user_id).execute()
-            return result.data[0] if result.data else None
-        except Exception as e:
-            raise Exception(f"Erro ao atualizar conta: {str(e)}")
+    def _cached(self, key: tuple, loader) -> list:
+        """Read-through no cache de tabelas de apoio, chaveado por tabela + key"""
+        if not self.cacheable:
+            return loader()
+        chave = (self.table_name,) + key
+        encontrado, rows = lookup_cache.get(chave)
+        registrar_cache(encontrado)
+        if not encontrado:
+            rows = loader()
+            lookup_cache.set(chave, rows)
+        # Cópias rasas, para que quem chama não altere as linhas em cache
+        return [dict(row) for row in rows]
     
-    def delete(self, conta_id: str, user_id: str) -> bool:
-        """Deletar conta (soft delete)"""
+    def _invalidate_cache(self):
+        """Descarta o cache desta tabela (e das que ela altera) após uma escrita"""
+        tabelas = set(self.invalida) | ({self.table_name} if self.cacheable else set())
+        if tabelas:
+            lookup_cache.invalidate(lambda key: key[0] in tabelas)
+    
+    def find(self, columns: str = "*", filters=None, order=None, limit: int = None) -> list:
+        """Buscar registros com projeção, filtros e ordenação"""
         try:
-            self.client.table(self.table_name).update({'ativo': False}).eq('id', conta_id).eq('user_id', user_id).execute()
-            return True
+            return self._execute(self._select(columns, filters, order, limit)).data
         except Exception as e:
-            raise Exception(f"Erro ao deletar conta: {str(e)}")
-
-class Categoria:
-    def __init__(self, user_token=None):
-        self.client = get_supabase_client(user_token) if user_token else get_supabase_admin()
-        self.table_name = 'categorias'
+            raise Exception(f"Erro ao buscar {self.entidade_plural}: {str(e)}")
     
     def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Criar nova categoria"""
+        """Criar novo registro"""
         try:
-            result = self.client.table(self.table_name).insert(data).execute()
+            result = self._execute(self.client.table(self.table_name).insert(data))
+            self._invalidate_cache()
             return result.data[0] if result.data else None
         except Exception as e:
-            raise Exception(f"Erro ao criar categoria: {str(e)}")
+            raise Exception(f"Erro ao criar {self.entidade}: {str(e)}")
     
-    def get_all(self, user_id: str, tipo: str = None) -> list:
-        """Buscar todas as categorias do usuário"""
-        try:
-            # Simplificando: buscar apenas categorias sem user_id (padrão) por enquanto
-            query = self.client.table(self.table_name).select("*").eq('ativo', True).is_('user_id', 'null')
-            
-            if tipo:
-                query = query.eq('tipo', tipo)
+    def create_many(self, rows: List[Dict[str, Any]], chunk_size: int = 500) -> Tuple[int, list]:
+        """
+        Inserir vários registros em chamadas multi-linha de até chunk_size linhas.
+        Se um lote falhar, suas linhas são reinseridas uma a uma para isolar as
+        inválidas, sem abortar o restante. Retorna (quantidade inserida, erros),
+        com erros como tuplas (posição em rows, mensagem).
+        """
+        inseridas, erros = 0, []
+        for inicio in range(0, len(rows), chunk_size):
+            lote = rows[inicio:inicio + chunk_size]
+            try:
+                self._execute(self.client.table(self.table_name).insert(lote, returning=RETORNO_MINIMO))
+                inseridas += len(lote)
+                continue
+            except Exception:
+                pass
             
-            result = query.execute()
-            return result.data
+            for posicao, row in enumerate(lote, inicio):
+                try:
+                    self._execute(self.client.table(self.table_name).insert(row, returning=RETORNO_MINIMO))
+                    inseridas += 1
+                except Exception as e:
+                    erros.append((posicao, f"Erro ao criar {self.entidade}: {str(e)}"))
+        
+        if inseridas:
+            self._invalidate_cache()
+        return inseridas, erros
+    
+    def upsert_many(self, rows: List[Dict[str, Any]], on_conflict: str,
+                    ignore_duplicates: bool = True) -> int:
+        """
+        Inserir vários registros em uma única chamada multi-linha, de forma
+        idempotente: linhas que já existem (pela chave on_conflict) são
+        ignoradas, ou atualizadas se ignore_duplicates for False.
+        """
+        try:
+            self._execute(self.client.table(self.table_name).upsert(
+                rows, returning=RETORNO_MINIMO,
+                ignore_duplicates=ignore_duplicates, on_conflict=on_conflict
+            ))
+            self._invalidate_cache()
+            return len(rows)
         except Exception as e:
-            raise Exception(f"Erro ao buscar categorias: {str(e)}")
+            raise Exception(f"Erro ao criar {self.entidade_plural}: {str(e)}")
     
-    def get_by_id(self, categoria_id: str, user_id: str) -> Dict[str, Any]:
-        """Buscar categoria por ID"""
+    def get_by_id(self, record_id: str, user_id: str = None, columns: str = "*") -> Dict[str, Any]:
+        """Buscar registro por ID"""
+        filters = [('eq', 'id', record_id)]
+        if user_id:
+            filters.append(('eq', 'user_id', user_id))
         try:
-            result = self.client.table(self.table_name).select("*").eq('id', categoria_id).execute()
+            result = self._execute(self._select(columns, filters))
             return result.data[0] if result.data else None
         except Exception as e:
-            raise Exception(f"Erro ao buscar categoria: {str(e)}")
+            raise Exception(f"Erro ao buscar {self.entidade}: {str(e)}")
     
-    def update(self, categoria_id: str, data: Dict[str, Any], user_id: str) -> Dict[str, Any]:
-        """Atualizar categoria"""
+    def update(self, record_id: str, data: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+        """Atualizar registro"""
         try:
-            result = self.client.table(self.table_name).update(data).eq('id', categoria_id).eq('user_id', user_id).execute()
+            query = self.client.table(self.table_name).update(data)
+            query = self._apply_filters(query, [('eq', 'id', record_id), ('eq', 'user_id', user_id)])
+            result = self._execute(query)
+            self._invalidate_cache()
             return result.data[0] if result.data else None
         except Exception as e:
-            raise Exception(f"Erro ao atualizar categoria: {str(e)}")
+            raise Exception(f"Erro ao atualizar {self.entidade}: {str(e)}")
     
-    def delete(self, categoria_id: str, user_id: str) -> bool:
-        """Deletar categoria (soft delete)"""
+    def delete(self, record_id: str, user_id: str) -> bool:
+        """Deletar registro (soft delete quando a tabela tem a coluna ativo)"""
         try:
-            self.client.table(self.table_name).update({'ativo': False}).eq('id', categoria_id).eq('user_id', user_id).execute()
+            table = self.client.table(self.table_name)
+            query = table.update({'ativo': False}) if self.soft_delete else table.delete()
+            query = self._apply_filters(query, [('eq', 'id', record_id), ('eq', 'user_id', user_id)])
+            self._execute(query)
+            self._invalidate_cache()
             return True
         except Exception as e:
-            raise Exception(f"Erro ao deletar categoria: {str(e)}")
+            raise Exception(f"Erro ao deletar {self.entidade}: {str(e)}")
 
-class FormaPagamento:
-    def __init__(self, user_token=None):
-        self.client = get_supabase_client(user_token) if user_token else get_supabase_admin()
-        self.table_name = 'formas_pagamento'
+class Conta(SupabaseModel):
+    table_name = 'contas'
+    entidade = 'conta'
+    entidade_plural = 'contas'
+    soft_delete = True
+    cacheable = True
     
-    def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Criar nova forma de pagamento"""
-        try:
-            result = self.client.table(self.table_name).insert(data).execute()
-            return result.data[0] if result.data else None
-        except Exception as e:
-            raise Exception(f"Erro ao criar forma de pagamento: {str(e)}")
+    # Colunas mantidas por trigger a cada escrita em transacoes: o cache de apoio
+    # é por processo e só é invalidado no worker que escreveu, então projeções
+    # com elas são sempre lidas do banco
+    COLUNAS_DINAMICAS = ('saldo',)
     
-    def get_all(self, user_id: str) -> list:
-        """Buscar todas as formas de pagamento do usuário"""
+    def get_all(self, user_id: str, columns: str = "*") -> list:
+        """Buscar todas as contas do usuário (com saldo, sem passar pelo cache)"""
+        filters = [('eq', 'user_id', user_id), ('eq', 'ativo', True)]
+        colunas = {c.strip() for c in columns.split(',')}
+        if '*' in colunas or colunas & set(self.COLUNAS_DINAMICAS):
+            return self.find(columns, filters)
+        return self._cached((user_id, columns), lambda: self.find(columns, filters))
+    
+    def recalcular_saldos(self) -> list:
+        """Recalcular o saldo de todas as contas a partir das transações (requer service role)"""
         try:
-            result = self.client.table(self.table_name).select("*").eq('ativo', True).is_('user_id', 'null').execute()
+            result = self._execute(self.client.rpc('recalcular_saldos', {}))
             return result.data
         except Exception as e:
-            raise Exception(f"Erro ao buscar formas de pagamento: {str(e)}")
+            raise Exception(f"Erro ao recalcular saldos: {str(e)}")
 
-class TipoGasto:
-    def __init__(self, user_token=None):
-        self.client = get_supabase_client(user_token) if user_token else get_supabase_admin()
-        self.table_name = 'tipos_gasto'
+class Categoria(SupabaseModel):
+    table_name = 'categorias'
+    entidade = 'categoria'
+    entidade_plural = 'categorias'
+    soft_delete = True
+    cacheable = True
     
-    def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Criar novo tipo de gasto"""
-        try:
-            result = self.client.table(self.table_name).insert(data).execute()
-            return result.data[0] if result.data else None
-        except Exception as e:
-            raise Exception(f"Erro ao criar tipo de gasto: {str(e)}")
+    def get_all(self, user_id: str, tipo: str = None, columns: str = "*") -> list:
+        """Buscar todas as categorias do usuário"""
+        # Simplificando: buscar apenas categorias sem user_id (padrão) por enquanto
+        filters = [('eq', 'ativo', True), ('is_', 'user_id', 'null')]
+        
+        if tipo:
+            filters.append(('eq', 'tipo', tipo))
+        
+        return self._cached((user_id, tipo, columns), lambda: self.find(columns, filters))
     
-    def get_all(self, user_id: str) -> list:
-        """Buscar todos os tipos de gasto do usuário"""
-        try:
-            result = self.client.table(self.table_name).select("*").eq('ativo', True).is_('user_id', 'null').execute()
-            return result.data
-        except Exception as e:
-            raise Exception(f"Erro ao buscar tipos de gasto: {str(e)}")
+    def get_by_id(self, categoria_id: str, user_id: str, columns: str = "*") -> Dict[str, Any]:
+        """Buscar categoria por ID (inclui as categorias padrão, sem user_id)"""
+        return super().get_by_id(categoria_id, None, columns)
 
-class Periodicidade:
-    def __init__(self, user_token=None):
-        self.client = get_supabase_client(user_token) if user_token else get_supabase_admin()
-        self.table_name = 'periodicidades'
+class FormaPagamento(SupabaseModel):
+    table_name = 'formas_pagamento'
+    entidade = 'forma de pagamento'
+    entidade_plural = 'formas de pagamento'
+    soft_delete = True
+    cacheable = True
     
-    def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Criar nova periodicidade"""
-        try:
-            result = self.client.table(self.table_name).insert(data).execute()
-            return result.data[0] if result.data else None
-        except Exception as e:
-            raise Exception(f"Erro ao criar periodicidade: {str(e)}")
+    def get_all(self, user_id: str, columns: str = "*") -> list:
+        """Buscar todas as formas de pagamento do usuário"""
+        return self._cached(
+            (user_id, columns),
+            lambda: self.find(columns, [('eq', 'ativo', True), ('is_', 'user_id', 'null')])
+        )
+
+class TipoGasto(SupabaseModel):
+    table_name = 'tipos_gasto'
+    entidade = 'tipo de gasto'
+    entidade_plural = 'tipos de gasto'
+    soft_delete = True
+    cacheable = True
     
-    def get_all(self, user_id: str) -> list:
+    def get_all(self, user_id: str, columns: str = "*") -> list:
+        """Buscar todos os tipos de gasto do usuário"""
+        return self._cached(
+            (user_id, columns),
+            lambda: self.find(columns, [('eq', 'ativo', True), ('is_', 'user_id', 'null')])
+        )
+
+class Periodicidade(SupabaseModel):
+    table_name = 'periodicidades'
+    entidade = 'periodicidade'
+    entidade_plural = 'periodicidades'
+    soft_delete = True
+    cacheable = True
+    
+    def get_all(self, user_id: str, columns: str = "*") -> list:
         """Buscar todas as periodicidades do usuário"""
-        try:
-            result = self.client.table(self.table_name).select("*").eq('ativo', True).is_('user_id', 'null').execute()
-            return result.data
-        except Exception as e:
-            raise Exception(f"Erro ao buscar periodicidades: {str(e)}")
+        return self._cached(
+            (user_id, columns),
+            lambda: self.find(columns, [('eq', 'ativo', True), ('is_', 'user_id', 'null')])
+        )
 
-class Transacao:
-    def __init__(self, user_token=None):
-        self.client = get_supabase_client(user_token) if user_token else get_supabase_admin()
-        self.table_name = 'transacoes'
+class Transacao(SupabaseModel):
+    table_name = 'transacoes'
+    entidade = 'transação'
+    entidade_plural = 'transações'
+    invalida = ('contas',)  # o saldo das contas é atualizado por trigger
     
-    def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Criar nova transação"""
+    # Projeções usadas pelas rotas mais acessadas
+    COLUNAS_TOTAIS = "tipo, valor"
+    COLUNAS_LISTAGEM = (
+        "id, tipo, descricao, valor, data_transacao, conta_id, categoria_id, "
+        "forma_pagamento_id, tipo_gasto_id, periodicidade_id"
+    )
+    
+    # Tabelas de apoio embutidas pelo PostgREST (via chaves estrangeiras <alias>_id)
+    # no modo expandido: alias -> (tabela, colunas)
+    EMBUTIDOS = {
+        'conta': ('contas', 'nome, logo_url'),
+        'categoria': ('categorias', 'nome, cor, icone'),
+        'forma_pagamento': ('formas_pagamento', 'nome, icone'),
+        'tipo_gasto': ('tipos_gasto', 'nome, cor'),
+        'periodicidade': ('periodicidades', 'nome'),
+    }
+    
+    @classmethod
+    def colunas_expandidas(cls, columns: str = "*") -> str:
+        """Projeção com os nomes, cores e ícones das tabelas de apoio em um único JOIN"""
+        embutidos = [f"{alias}:{tabela}({colunas})" for alias, (tabela, colunas) in cls.EMBUTIDOS.items()]
+        return ", ".join([columns] + embutidos)
+    
+    @classmethod
+    def achatar(cls, transacao: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Achata os recursos embutidos: {"categoria": {"nome", "cor"}} vira
+        {"categoria": nome, "categoria_cor": cor}, como em financial.Transacao.to_dict
+        """
+        for alias, (_, colunas) in cls.EMBUTIDOS.items():
+            embutido = transacao.pop(alias, None) or {}
+            for coluna in (c.strip() for c in colunas.split(',')):
+                chave = alias if coluna == 'nome' else f"{alias}_{coluna}"
+                transacao[chave] = embutido.get(coluna)
+        return transacao
+    
+    def get_all(self, user_id: str = None, mes: int = None, ano: int = None,
+                columns: str = "*", limit: int = None, expandir: bool = False) -> list:
+        """
+        Buscar todas as transações do usuário. Com expandir=True, cada
+        transação traz também os nomes (e cores/ícones) de conta, categoria,
+        forma de pagamento, tipo de gasto e periodicidade
+        """
+        filters = []
+        
+        # Por enquanto, buscar todas as transações (para testes)
+        # if user_id:
+        #     filters.append(('eq', 'user_id', user_id))
+        
+        if mes:
+            filters.append(('eq', 'mes_referencia', mes))
+        if ano:
+            filters.append(('eq', 'ano_referencia', ano))
+        
+        if expandir:
+            transacoes = self.find(self.colunas_expandidas(columns), filters, [('data_transacao', True)], limit)
+            return [self.achatar(t) for t in transacoes]
+        return self.find(columns, filters, [('data_transacao', True)], limit)
+    
+    def get_dia(self, user_id: str, dia: date, columns: str = "*", expandir: bool = False) -> list:
+        """Buscar as transações de um dia (detalhe do calendário)"""
+        filters = [('eq', 'data_transacao', dia.isoformat())]
+        
+        # Por enquanto, não filtrar por usuário (para testes), como em get_all
+        # filters.append(('eq', 'user_id', user_id))
+        
+        if expandir:
+            transacoes = self.find(self.colunas_expandidas(columns), filters, [('id', False)])
+            return [self.achatar(t) for t in transacoes]
+        return self.find(columns, filters, [('id', False)])
+    
+    def get_por_periodicidade(self, user_id: str, periodicidade_ids: list, inicio: date, fim: date,
+                              columns: str = "conta_id, tipo, valor, data_transacao") -> list:
+        """Buscar as transações das periodicidades informadas com data em [inicio, fim)"""
+        if not periodicidade_ids:
+            return []
+        filters = [
+            ('in_', 'periodicidade_id', periodicidade_ids),
+            ('gte', 'data_transacao', inicio.isoformat()),
+            ('lt', 'data_transacao', fim.isoformat()),
+        ]
+        
+        # Por enquanto, não filtrar por usuário (para testes), como em get_all
+        # filters.append(('eq', 'user_id', user_id))
+        
+        return self.find(columns, filters)
+    
+    def get_para_conciliacao(self, user_id: str, conta_id: str, dias: List[date],
+                             page_size: int = 1000) -> list:
+        """
+        Buscar as transações do usuário na conta (None = sem conta) nos dias
+        informados, para a conciliação da importação de extratos. Paginado
+        por id, pois o PostgREST limita o número de linhas por resposta.
+        """
+        filters = [
+            ('eq', 'conta_id', conta_id) if conta_id else ('is_', 'conta_id', 'null'),
+            ('in_', 'data_transacao', [dia.isoformat() for dia in dias]),
+            ('eq', 'user_id', user_id),
+        ]
+        
+        transacoes, ultimo_id = [], None
+        while True:
+            pagina = self.find(
+                "id, data_transacao, tipo, valor, id_externo",
+                filters + ([('gt', 'id', ultimo_id)] if ultimo_id else []),
+                [('id', False)], page_size
+            )
+            transacoes.extend(pagina)
+            if len(pagina) < page_size:
+                return transacoes
+            ultimo_id = pagina[-1]['id']
+    
+    def get_categorizadas(self, user_id: str, limit: int = 2000) -> list:
+        """Buscar as transações categorizadas mais recentes do usuário (histórico da categorização automática)"""
+        filters = [('eq', 'user_id', user_id), ('not_.is_', 'categoria_id', 'null')]
+        return self.find("descricao, tipo, categoria_id", filters, [('data_transacao', True)], limit)
+    
+    def get_page(self, user_id: str = None, mes: int = None, ano: int = None,
+                 limit: int = 100, cursor: str = None) -> Tuple[list, Optional[str]]:
+        """
+        Buscar uma página de transações por keyset em (data_transacao, id).
+        Retorna os itens e o cursor da próxima página (None na última).
+        """
+        params = {'p_limite': limit + 1, 'p_mes': mes, 'p_ano': ano}
+        if cursor:
+            params['p_cursor_data'], params['p_cursor_id'] = self.decode_cursor(cursor)
+        
+        # Por enquanto, não filtrar por usuário (para testes), como em get_all
+        # if user_id:
+        #     params['p_user_id'] = user_id
+        
         try:
-            result = self.client.table(self.table_name).insert(data).execute()
-            return result.data[0] if result.data else None
+            result = self._execute(self.client.rpc('transacoes_pagina', params))
         except Exception as e:
-            raise Exception(f"Erro ao criar transação: {str(e)}")
+            raise Exception(f"Erro ao buscar transações: {str(e)}")
+        
+        # Uma linha a mais indica que existe próxima página
+        items = result.data[:limit]
+        next_cursor = self.encode_cursor(items[-1]) if len(result.data) > limit else None
+        return items, next_cursor
+    
+    def iter_all(self, user_id: str = None, mes: int = None, ano: int = None,
+                 page_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Percorrer todas as transações página a página, com memória limitada a uma página"""
+        cursor = None
+        while True:
+            items, cursor = self.get_page(user_id, mes, ano, page_size, cursor)
+            yield from items
+            if cursor is None:
+                return
+    
+    @staticmethod
+    def encode_cursor(transacao: Dict[str, Any]) -> str:
+        """Cursor opaco a partir de (data_transacao, id) da última transação da página"""
+        chave = json.dumps([transacao['data_transacao'], transacao['id']])
+        return base64.urlsafe_b64encode(chave.encode()).decode()
+    
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[str, str]:
+        """Decodifica um cursor de paginação; ValueError se for inválido"""
+        try:
+            data_transacao, transacao_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return date.fromisoformat(data_transacao).isoformat(), str(uuid.UUID(transacao_id))
+        except Exception:
+            raise ValueError("Cursor de paginação inválido")
     
-    def get_all(self, user_id: str = None, mes: int = None, ano: int = None) -> list:
-        """Buscar todas as transações do usuário"""
+    def get_balanco_anual(self, user_id: str = None, ano: int = None) -> list:
+        """Buscar entradas e saídas do ano agregadas por mês em uma única consulta"""
         try:
-            query = self.client.table(self.table_name).select("*")
+            params = {'p_ano': ano}
             
-            # Por enquanto, buscar todas as transações (para testes)
+            # Por enquanto, não filtrar por usuário (para testes), como em get_all
             # if user_id:
-            #     query = query.eq('user_id', user_id)
-            
-            if mes:
-                query = query.eq('mes_referencia', mes)
-            if ano:
-                query = query.eq('ano_referencia', ano)
+            #     params['p_user_id'] = user_id
             
-            result = query.order('data_transacao', desc=True).execute()
+            result = self._execute(self.client.rpc('balanco_anual', params))
             return result.data
         except Exception as e:
-            raise Exception(f"Erro ao buscar transações: {str(e)}")
+            raise Exception(f"Erro ao buscar balanço anual: {str(e)}")
+
+class Meta(SupabaseModel):
+    table_name = 'metas'
+    entidade = 'meta'
+    entidade_plural = 'metas'
     
-    def get_by_id(self, transacao_id: str, user_id: str) -> Dict[str, Any]:
-        """Buscar transação por ID"""
-        try:
-            result = self.client.table(self.table_name).select("*").eq('id', transacao_id).eq('user_id', user_id).execute()
-            return result.data[0] if result.data else None
-        except Exception as e:
-            raise Exception(f"Erro ao buscar transação: {str(e)}")
+    def get_all(self, user_id: str, columns: str = "*") -> list:
+        """Buscar todas as metas do usuário"""
+        return self.find(columns, [('eq', 'user_id', user_id)])
     
-    def update(self, transacao_id: str, data: Dict[str, Any], user_id: str) -> Dict[str, Any]:
-        """Atualizar transação"""
+    def get_ativas(self, user_id: str, columns: str = "id, nome, valor_objetivo, valor_atual, data_fim, status") -> list:
+        """Buscar as metas ativas do usuário"""
+        return self.find(columns, [('eq', 'user_id', user_id), ('eq', 'status', 'ativa')])
+    
+    @staticmethod
+    def com_progresso(meta: Dict[str, Any], hoje: date = None) -> Dict[str, Any]:
+        """
+        Acrescenta à meta o progresso (% do objetivo), o ritmo (valor por dia
+        desde data_inicio e o necessário até data_fim) e a data prevista de
+        conclusão no ritmo atual. valor_atual é mantido pelos triggers de transacoes
+        """
+        hoje = hoje or date.today()
+        objetivo = float(meta.get("valor_objetivo") or 0)
+        atual = float(meta.get("valor_atual") or 0)
+        inicio = date.fromisoformat(str(meta["data_inicio"])[:10])
+        fim = date.fromisoformat(str(meta["data_fim"])[:10])
+        restante = max(objetivo - atual, 0)
+        
+        dias_decorridos = max((min(hoje, fim) - inicio).days + 1, 1)
+        dias_restantes = max((fim - hoje).days + 1, 0)
+        ritmo = atual / dias_decorridos if hoje >= inicio else 0.0
+        
+        # Sem previsão se o objetivo já foi atingido ou ainda não há ritmo
+        data_prevista = None
+        if restante > 0 and ritmo > 0:
+            data_prevista = hoje + timedelta(days=math.ceil(restante / ritmo))
+        
+        meta["progresso"] = round(atual / objetivo * 100, 2) if objetivo > 0 else 0
+        meta["ritmo_diario"] = round(ritmo, 2)
+        meta["ritmo_necessario_diario"] = round(restante / dias_restantes, 2) if dias_restantes else None
+        meta["data_conclusao_prevista"] = data_prevista.isoformat() if data_prevista else None
+        meta["no_prazo"] = restante == 0 or (data_prevista is not None and data_prevista <= fim)
+        return meta
+    
+    def recalcular(self) -> list:
+        """Recalcular o valor_atual das metas a partir das transações (requer service role)"""
         try:
-            result = self.client.table(self.table_name).update(data).eq('id', transacao_id).eq('user_id', user_id).execute()
-            return result.data[0] if result.data else None
+            result = self._execute(self.client.rpc('recalcular_metas', {}))
+            return result.data
         except Exception as e:
-            raise Exception(f"Erro ao atualizar transação: {str(e)}")
+            raise Exception(f"Erro ao recalcular metas: {str(e)}")
+
+class Parcelamento(SupabaseModel):
+    table_name = 'parcelamentos'
+    entidade = 'parcelamento'
+    entidade_plural = 'parcelamentos'
+    
+    def get_all(self, user_id: str, columns: str = "*") -> list:
+        """Buscar todos os parcelamentos do usuário"""
+        return self.find(columns, [('eq', 'user_id', user_id)])
+    
+    def get_ativos(self, user_id: str) -> list:
+        """Parcelamentos ativos, com as colunas usadas pelo cronograma"""
+        return self.find(
+            "id, descricao, valor_total, parcelas_total, parcelas_pagas, data_primeira_parcela, "
+            "conta_id, categoria_id, status, updated_at",
+            [('eq', 'user_id', user_id), ('eq', 'status', 'ativo')]
+        )
     
-    def delete(self, transacao_id: str, user_id: str) -> bool:
-        """Deletar transação"""
+    def update(self, record_id: str, data: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+        parcelamento = super().update(record_id, data, user_id)
+        invalidar_cronograma(record_id)
+        return parcelamento
+    
+    def delete(self, record_id: str, user_id: str) -> bool:
+        removido = super().delete(record_id, user_id)
+        invalidar_cronograma(record_id)
+        return removido
+
+class ResumoTransacoes(SupabaseModel):
+    """Agregações de transações calculadas no Postgres (GROUP BY com JOIN nas tabelas de apoio)"""
+    
+    # Dimensão de agrupamento -> rótulo para transações sem vínculo
+    DIMENSOES = {
+        'categoria': 'Sem categoria',
+        'forma_pagamento': 'Sem forma',
+        'tipo_gasto': 'Sem tipo',
+        'periodicidade': 'Sem periodicidade',
+    }
+    
+    def por_dimensao(self, dimensao: str, user_id: str = None, mes: int = None,
+                     ano: int = None, tipo: str = None) -> list:
+        """Total das transações agrupado por dimensão, com nome e ID de cada grupo"""
+        if dimensao not in self.DIMENSOES:
+            raise Exception(f"Dimensão de resumo inválida: {dimensao}")
+        
         try:
-            self.client.table(self.table_name).delete().eq('id', transacao_id).eq('user_id', user_id).execute()
-            return True
+            params = {'p_dimensao': dimensao, 'p_mes': mes, 'p_ano': ano, 'p_tipo': tipo}
+            
+            # Por enquanto, não filtrar por usuário (para testes), como em Transacao.get_all
+            # if user_id:
+            #     params['p_user_id'] = user_id
+            
+            result = self._execute(self.client.rpc('resumo_transacoes', params))
+            return [
+                {
+                    dimensao: linha["nome"] or self.DIMENSOES[dimensao],
+                    f"{dimensao}_id": linha["id"],
+                    "total": float(linha["total"] or 0)
+                }
+                for linha in result.data
+            ]
         except Exception as e:
-            raise Exception(f"Erro ao deletar transação: {str(e)}")
-
-class Meta:
-    def __init__(self, user_token=None):
-        self.client = get_supabase_client(user_token) if user_token else get_supabase_admin()
-        self.table_name = 'metas'
+            raise Exception(f"Erro ao buscar resumo por {dimensao}: {str(e)}")
     
-    def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Criar nova meta"""
+    def painel(self, user_id: str = None, mes: int = None, ano: int = None,
+               secoes: list = None) -> Dict[str, Any]:
+        """Totais do mês e resumos por dimensão a partir de uma única consulta agrupada"""
+        secoes = secoes or ['totais'] + list(self.DIMENSOES)
+        dimensoes = [d for d in self.DIMENSOES if d in secoes]
+        
         try:
-            result = self.client.table(self.table_name).insert(data).execute()
-            return result.data[0] if result.data else None
+            params = {'p_mes': mes, 'p_ano': ano}
+            
+            # Por enquanto, não filtrar por usuário (para testes), como em Transacao.get_all
+            # if user_id:
+            #     params['p_user_id'] = user_id
+            
+            result = self._execute(self.client.rpc('resumo_mes_agrupado', params))
         except Exception as e:
-            raise Exception(f"Erro ao criar meta: {str(e)}")
+            raise Exception(f"Erro ao buscar resumo do painel: {str(e)}")
+        
+        totais = {"entradas": 0.0, "saidas": 0.0, "total_transacoes": 0}
+        grupos = {dimensao: {} for dimensao in dimensoes}
+        
+        # Uma única passada sobre os grupos retornados
+        for linha in result.data:
+            valor = float(linha["total"] or 0)
+            if linha["tipo"] == "entrada":
+                totais["entradas"] += valor
+            elif linha["tipo"] == "saida":
+                totais["saidas"] += valor
+            totais["total_transacoes"] += linha["quantidade"]
+            
+            for dimensao in dimensoes:
+                # Apenas saídas têm tipo de gasto
+                if dimensao == 'tipo_gasto' and linha["tipo"] != "saida":
+                    continue
+                chave = linha[f"{dimensao}_id"]
+                grupo = grupos[dimensao].get(chave)
+                if grupo is None:
+                    grupo = grupos[dimensao][chave] = {
+                        dimensao: linha[dimensao] or self.DIMENSOES[dimensao],
+                        f"{dimensao}_id": chave,
+                        "total": 0.0
+                    }
+                grupo["total"] += valor
+        
+        painel = {}
+        if 'totais' in secoes:
+            totais["resultado_mensal"] = totais["entradas"] - totais["saidas"]
+            painel['totais'] = totais
+        for dimensao in dimensoes:
+            painel[dimensao] = sorted(grupos[dimensao].values(), key=lambda g: g["total"], reverse=True)
+        return painel
     
-    def get_all(self, user_id: str) -> list:
-        """Buscar todas as metas do usuário"""
+    def por_dia(self, user_id: str, inicio: date, fim: date) -> list:
+        """Quantidade, entradas, saídas e saldo por dia de data_transacao em [inicio, fim)"""
         try:
-            result = self.client.table(self.table_name).select("*").eq('user_id', user_id).execute()
-            return result.data
+            params = {'p_inicio': inicio.isoformat(), 'p_fim': fim.isoformat()}
+            
+            # Por enquanto, não filtrar por usuário (para testes), como em Transacao.get_all
+            # if user_id:
+            #     params['p_user_id'] = user_id
+            
+            result = self._execute(self.client.rpc('resumo_diario', params))
+            dias = []
+            for linha in result.data:
+                entradas = float(linha["entradas"] or 0)
+                saidas = float(linha["saidas"] or 0)
+                dias.append({
+                    "data": linha["data_transacao"],
+                    "quantidade": linha["quantidade"],
+                    "entradas": entradas,
+                    "saidas": saidas,
+                    "saldo": round(entradas - saidas, 2),
+                })
+            return dias
         except Exception as e:
-            raise Exception(f"Erro ao buscar metas: {str(e)}")
+            raise Exception(f"Erro ao buscar resumo diário: {str(e)}")
 
-class Parcelamento:
-    def __init__(self, user_token=None):
-        self.client = get_supabase_client(user_token) if user_token else get_supabase_admin()
-        self.table_name = 'parcelamentos'
+class Validador(SupabaseModel):
+    """Validador de GET condicional: última atualização e contagem de linhas por escopo"""
     
-    def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Criar novo parcelamento"""
+    def get(self, tabelas: List[str], user_id: str = None, mes: int = None, ano: int = None,
+            dia: date = None) -> Dict[str, Any]:
+        """Buscar max(updated_at) e quantidade de linhas das tabelas em uma única consulta"""
         try:
-            result = self.client.table(self.table_name).insert(data).execute()
-            return result.data[0] if result.data else None
+            params = {'p_tabelas': list(tabelas), 'p_mes': mes, 'p_ano': ano}
+            if dia:
+                params['p_dia'] = dia.isoformat()
+            
+            # Por enquanto, não filtrar por usuário (para testes), como em Transacao.get_all
+            # if user_id:
+            #     params['p_user_id'] = user_id
+            
+            result = self._execute(self.client.rpc('validador_dados', params))
+            return result.data[0] if result.data else {'ultima_atualizacao': None, 'quantidade': 0}
         except Exception as e:
-            raise Exception(f"Erro ao criar parcelamento: {str(e)}")
+            raise Exception(f"Erro ao buscar validador: {str(e)}")
+
+class ResumoMensal(SupabaseModel):
+    """
+    Resumo mensal materializado, mantido pelos triggers de transacoes.
+    A reconciliação é restrita ao service role: instanciar sem token.
+    """
+    table_name = 'resumo_mensal'
+    entidade = 'resumo mensal'
+    entidade_plural = 'resumos mensais'
     
-    def get_all(self, user_id: str) -> list:
-        """Buscar todos os parcelamentos do usuário"""
+    def reconciliar(self, corrigir: bool = False) -> list:
+        """Comparar o resumo com as transações; com corrigir=True, reconstruí-lo"""
         try:
-            result = self.client.table(self.table_name).select("*").eq('user_id', user_id).execute()
+            result = self._execute(self.client.rpc('reconciliar_resumo_mensal', {'p_corrigir': corrigir}))
             return result.data
         except Exception as e:
-            raise Exception(f"Erro ao buscar parcelamentos: {str(e)}")
+            raise Exception(f"Erro ao reconciliar resumo mensal: {str(e)}")
 
 # Classe para autenticação
 class Auth:
@@ -301,3 +301,716 @@ INSERT INTO periodicidades (user_id, nome) VALUES
 (NULL, 'Variável')
 ON CONFLICT DO NOTHING;
 
+-- Função de paginação por keyset: próxima página de transações após o cursor
+-- (data_transacao, id), na mesma ordem da listagem (mais recentes primeiro)
+CREATE OR REPLACE FUNCTION transacoes_pagina(
+    p_limite INTEGER,
+    p_cursor_data DATE DEFAULT NULL,
+    p_cursor_id UUID DEFAULT NULL,
+    p_mes INTEGER DEFAULT NULL,
+    p_ano INTEGER DEFAULT NULL,
+    p_user_id UUID DEFAULT NULL
+)
+RETURNS SETOF transacoes AS $$
+    SELECT *
+    FROM transacoes t
+    WHERE (p_mes IS NULL OR t.mes_referencia = p_mes)
+      AND (p_ano IS NULL OR t.ano_referencia = p_ano)
+      AND (p_user_id IS NULL OR t.user_id = p_user_id)
+      AND (p_cursor_data IS NULL OR (t.data_transacao, t.id) < (p_cursor_data, p_cursor_id))
+    ORDER BY t.data_transacao DESC, t.id DESC
+    LIMIT p_limite;
+$$ LANGUAGE sql STABLE;
+
+-- Função de validador para GET condicional (ETag/Last-Modified): última
+-- atualização e quantidade de linhas das tabelas no escopo (mês, ano, dia,
+-- usuário). Removida antes de recriar: um parâmetro novo criaria uma
+-- sobrecarga, ambígua para o PostgREST
+DROP FUNCTION IF EXISTS validador_dados(TEXT[], INTEGER, INTEGER, UUID);
+CREATE OR REPLACE FUNCTION validador_dados(
+    p_tabelas TEXT[],
+    p_mes INTEGER DEFAULT NULL,
+    p_ano INTEGER DEFAULT NULL,
+    p_user_id UUID DEFAULT NULL,
+    p_dia DATE DEFAULT NULL
+)
+RETURNS TABLE (ultima_atualizacao TIMESTAMP WITH TIME ZONE, quantidade BIGINT) AS $$
+DECLARE
+    tabela TEXT;
+    filtro TEXT;
+    parcial RECORD;
+BEGIN
+    quantidade := 0;
+
+    FOREACH tabela IN ARRAY p_tabelas LOOP
+        IF tabela NOT IN ('contas', 'categorias', 'formas_pagamento', 'tipos_gasto',
+                          'periodicidades', 'transacoes', 'metas', 'parcelamentos') THEN
+            RAISE EXCEPTION 'Tabela inválida para validador: %', tabela;
+        END IF;
+
+        filtro := CASE WHEN tabela = 'transacoes'
+            THEN '($1 IS NULL OR mes_referencia = $1) AND ($2 IS NULL OR ano_referencia = $2)
+                  AND ($4::date IS NULL OR data_transacao = $4)'
+            ELSE 'TRUE'
+        END;
+
+        EXECUTE format(
+            'SELECT MAX(updated_at) AS ultima, COUNT(*) AS total FROM %I
+             WHERE %s AND ($3 IS NULL OR user_id = $3 OR user_id IS NULL)',
+            tabela, filtro
+        ) INTO parcial USING p_mes, p_ano, p_user_id, p_dia;
+
+        ultima_atualizacao := GREATEST(ultima_atualizacao, parcial.ultima);
+        quantidade := quantidade + parcial.total;
+    END LOOP;
+
+    RETURN NEXT;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Duplicatas de (user_id, nome) deixadas pelo /seed-data antigo (não
+-- idempotente) impediriam a criação dos índices únicos abaixo: em cada chave
+-- fica o registro mais antigo, as chaves estrangeiras que apontam para as
+-- duplicatas passam a apontar para ele e as duplicatas são removidas
+DO $$
+DECLARE
+    tabela TEXT;
+    referencia RECORD;
+    duplicatas TEXT;
+    removidas BIGINT;
+BEGIN
+    FOREACH tabela IN ARRAY ARRAY['contas', 'categorias', 'formas_pagamento', 'tipos_gasto', 'periodicidades'] LOOP
+        duplicatas := format(
+            'SELECT id, manter FROM ('
+            '    SELECT id, first_value(id) OVER (PARTITION BY user_id, nome ORDER BY created_at, id) AS manter'
+            '    FROM %I WHERE user_id IS NOT NULL'
+            ') d WHERE id <> manter', tabela);
+
+        FOR referencia IN
+            SELECT c.conrelid::regclass AS tabela_referencia, a.attname AS coluna
+            FROM pg_constraint c
+            JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1]
+            WHERE c.contype = 'f' AND c.confrelid = tabela::regclass
+        LOOP
+            EXECUTE format('UPDATE %s r SET %I = d.manter FROM (%s) d WHERE r.%I = d.id',
+                           referencia.tabela_referencia, referencia.coluna, duplicatas, referencia.coluna);
+        END LOOP;
+
+        EXECUTE format('DELETE FROM %I t USING (%s) d WHERE t.id = d.id', tabela, duplicatas);
+        GET DIAGNOSTICS removidas = ROW_COUNT;
+        IF removidas > 0 THEN
+            RAISE NOTICE '%: % registro(s) duplicado(s) de (user_id, nome) mesclado(s)', tabela, removidas;
+        END IF;
+    END LOOP;
+END;
+$$;
+
+-- Chaves únicas por usuário e nome, usadas pelo upsert idempotente do /seed-data
+CREATE UNIQUE INDEX IF NOT EXISTS contas_user_id_nome_key ON contas (user_id, nome);
+CREATE UNIQUE INDEX IF NOT EXISTS categorias_user_id_nome_key ON categorias (user_id, nome);
+CREATE UNIQUE INDEX IF NOT EXISTS formas_pagamento_user_id_nome_key ON formas_pagamento (user_id, nome);
+CREATE UNIQUE INDEX IF NOT EXISTS tipos_gasto_user_id_nome_key ON tipos_gasto (user_id, nome);
+CREATE UNIQUE INDEX IF NOT EXISTS periodicidades_user_id_nome_key ON periodicidades (user_id, nome);
+
+-- Tabela de resumo mensal materializado: totais das transações por usuário,
+-- mês e dimensões, mantida incrementalmente pelos triggers abaixo. As rotas de
+-- resumo e balanço leem desta tabela, então o custo não cresce com o número
+-- de transações. (NULLS NOT DISTINCT requer Postgres 15+)
+CREATE TABLE IF NOT EXISTS resumo_mensal (
+    user_id UUID REFERENCES auth.users(id) ON DELETE CASCADE,
+    ano_referencia INTEGER NOT NULL,
+    mes_referencia INTEGER NOT NULL,
+    tipo VARCHAR(20) NOT NULL,
+    categoria_id UUID,
+    forma_pagamento_id UUID,
+    tipo_gasto_id UUID,
+    periodicidade_id UUID,
+    quantidade BIGINT NOT NULL DEFAULT 0,
+    total DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS resumo_mensal_chave ON resumo_mensal (
+    user_id, ano_referencia, mes_referencia, tipo,
+    categoria_id, forma_pagamento_id, tipo_gasto_id, periodicidade_id
+) NULLS NOT DISTINCT;
+
+ALTER TABLE resumo_mensal ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Usuários podem ver seu próprio resumo mensal" ON resumo_mensal
+    FOR SELECT USING (auth.uid() = user_id);
+
+-- Aplica as transações inseridas/removidas de um comando ao resumo mensal.
+-- Triggers por comando com tabelas de transição: um lote multi-linha gera
+-- um único upsert agrupado, e não um por linha
+CREATE OR REPLACE FUNCTION atualizar_resumo_mensal()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO resumo_mensal AS r (user_id, ano_referencia, mes_referencia, tipo, categoria_id,
+                                        forma_pagamento_id, tipo_gasto_id, periodicidade_id, quantidade, total)
+        SELECT user_id, ano_referencia, mes_referencia, tipo, categoria_id,
+               forma_pagamento_id, tipo_gasto_id, periodicidade_id, COUNT(*), SUM(valor)
+        FROM novas
+        GROUP BY user_id, ano_referencia, mes_referencia, tipo, categoria_id,
+                 forma_pagamento_id, tipo_gasto_id, periodicidade_id
+        ON CONFLICT (user_id, ano_referencia, mes_referencia, tipo, categoria_id,
+                     forma_pagamento_id, tipo_gasto_id, periodicidade_id)
+        DO UPDATE SET quantidade = r.quantidade + EXCLUDED.quantidade,
+                      total = r.total + EXCLUDED.total,
+                      updated_at = NOW();
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO resumo_mensal AS r (user_id, ano_referencia, mes_referencia, tipo, categoria_id,
+                                        forma_pagamento_id, tipo_gasto_id, periodicidade_id, quantidade, total)
+        SELECT user_id, ano_referencia, mes_referencia, tipo, categoria_id,
+               forma_pagamento_id, tipo_gasto_id, periodicidade_id, -COUNT(*), -SUM(valor)
+        FROM antigas
+        GROUP BY user_id, ano_referencia, mes_referencia, tipo, categoria_id,
+                 forma_pagamento_id, tipo_gasto_id, periodicidade_id
+        ON CONFLICT (user_id, ano_referencia, mes_referencia, tipo, categoria_id,
+                     forma_pagamento_id, tipo_gasto_id, periodicidade_id)
+        DO UPDATE SET quantidade = r.quantidade + EXCLUDED.quantidade,
+                      total = r.total + EXCLUDED.total,
+                      updated_at = NOW();
+    ELSE
+        INSERT INTO resumo_mensal AS r (user_id, ano_referencia, mes_referencia, tipo, categoria_id,
+                                        forma_pagamento_id, tipo_gasto_id, periodicidade_id, quantidade, total)
+        SELECT user_id, ano_referencia, mes_referencia, tipo, categoria_id,
+               forma_pagamento_id, tipo_gasto_id, periodicidade_id, SUM(sinal), SUM(sinal * valor)
+        FROM (
+            SELECT n.*, 1 AS sinal FROM novas n
+            UNION ALL
+            SELECT a.*, -1 AS sinal FROM antigas a
+        ) delta
+        GROUP BY user_id, ano_referencia, mes_referencia, tipo, categoria_id,
+                 forma_pagamento_id, tipo_gasto_id, periodicidade_id
+        ON CONFLICT (user_id, ano_referencia, mes_referencia, tipo, categoria_id,
+                     forma_pagamento_id, tipo_gasto_id, periodicidade_id)
+        DO UPDATE SET quantidade = r.quantidade + EXCLUDED.quantidade,
+                      total = r.total + EXCLUDED.total,
+                      updated_at = NOW();
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS resumo_mensal_transacoes_insert ON transacoes;
+CREATE TRIGGER resumo_mensal_transacoes_insert AFTER INSERT ON transacoes
+    REFERENCING NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_mensal();
+
+DROP TRIGGER IF EXISTS resumo_mensal_transacoes_update ON transacoes;
+CREATE TRIGGER resumo_mensal_transacoes_update AFTER UPDATE ON transacoes
+    REFERENCING OLD TABLE AS antigas NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_mensal();
+
+DROP TRIGGER IF EXISTS resumo_mensal_transacoes_delete ON transacoes;
+CREATE TRIGGER resumo_mensal_transacoes_delete AFTER DELETE ON transacoes
+    REFERENCING OLD TABLE AS antigas
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_mensal();
+
+-- Reconciliação do resumo mensal com as transações: retorna as chaves
+-- divergentes e, com p_corrigir, reconstrói o resumo a partir dos dados brutos
+CREATE OR REPLACE FUNCTION reconciliar_resumo_mensal(p_corrigir BOOLEAN DEFAULT false)
+RETURNS TABLE (
+    user_id UUID,
+    ano_referencia INTEGER,
+    mes_referencia INTEGER,
+    tipo VARCHAR,
+    categoria_id UUID,
+    forma_pagamento_id UUID,
+    tipo_gasto_id UUID,
+    periodicidade_id UUID,
+    quantidade_resumo BIGINT,
+    quantidade_real BIGINT,
+    total_resumo DECIMAL,
+    total_real DECIMAL
+) AS $$
+#variable_conflict use_column
+BEGIN
+    CREATE TEMP TABLE divergencias ON COMMIT DROP AS
+    SELECT COALESCE(r.user_id, t.user_id) AS user_id,
+           COALESCE(r.ano_referencia, t.ano_referencia) AS ano_referencia,
+           COALESCE(r.mes_referencia, t.mes_referencia) AS mes_referencia,
+           COALESCE(r.tipo, t.tipo) AS tipo,
+           COALESCE(r.categoria_id, t.categoria_id) AS categoria_id,
+           COALESCE(r.forma_pagamento_id, t.forma_pagamento_id) AS forma_pagamento_id,
+           COALESCE(r.tipo_gasto_id, t.tipo_gasto_id) AS tipo_gasto_id,
+           COALESCE(r.periodicidade_id, t.periodicidade_id) AS periodicidade_id,
+           COALESCE(r.quantidade, 0) AS quantidade_resumo,
+           COALESCE(t.quantidade, 0) AS quantidade_real,
+           COALESCE(r.total, 0) AS total_resumo,
+           COALESCE(t.total, 0) AS total_real
+    FROM (SELECT * FROM resumo_mensal WHERE quantidade <> 0 OR total <> 0) r
+    FULL OUTER JOIN (
+        SELECT x.user_id, x.ano_referencia, x.mes_referencia, x.tipo, x.categoria_id,
+               x.forma_pagamento_id, x.tipo_gasto_id, x.periodicidade_id,
+               COUNT(*) AS quantidade, SUM(x.valor) AS total
+        FROM transacoes x
+        GROUP BY x.user_id, x.ano_referencia, x.mes_referencia, x.tipo, x.categoria_id,
+                 x.forma_pagamento_id, x.tipo_gasto_id, x.periodicidade_id
+    ) t ON r.user_id IS NOT DISTINCT FROM t.user_id
+       AND r.ano_referencia = t.ano_referencia
+       AND r.mes_referencia = t.mes_referencia
+       AND r.tipo = t.tipo
+       AND r.categoria_id IS NOT DISTINCT FROM t.categoria_id
+       AND r.forma_pagamento_id IS NOT DISTINCT FROM t.forma_pagamento_id
+       AND r.tipo_gasto_id IS NOT DISTINCT FROM t.tipo_gasto_id
+       AND r.periodicidade_id IS NOT DISTINCT FROM t.periodicidade_id
+    WHERE COALESCE(r.quantidade, 0) <> COALESCE(t.quantidade, 0)
+       OR COALESCE(r.total, 0) <> COALESCE(t.total, 0);
+
+    IF p_corrigir THEN
+        LOCK TABLE transacoes IN SHARE MODE;
+        DELETE FROM resumo_mensal;
+        INSERT INTO resumo_mensal (user_id, ano_referencia, mes_referencia, tipo, categoria_id,
+                                   forma_pagamento_id, tipo_gasto_id, periodicidade_id, quantidade, total)
+        SELECT x.user_id, x.ano_referencia, x.mes_referencia, x.tipo, x.categoria_id,
+               x.forma_pagamento_id, x.tipo_gasto_id, x.periodicidade_id, COUNT(*), SUM(x.valor)
+        FROM transacoes x
+        GROUP BY x.user_id, x.ano_referencia, x.mes_referencia, x.tipo, x.categoria_id,
+                 x.forma_pagamento_id, x.tipo_gasto_id, x.periodicidade_id;
+    END IF;
+
+    RETURN QUERY SELECT * FROM divergencias;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+REVOKE EXECUTE ON FUNCTION reconciliar_resumo_mensal(BOOLEAN) FROM PUBLIC, anon, authenticated;
+
+-- Backfill do resumo mensal com as transações existentes
+SELECT * FROM reconciliar_resumo_mensal(true);
+
+-- Função de balanço anual: entradas e saídas agregadas por mês em uma única consulta
+-- (lê do resumo mensal materializado)
+CREATE OR REPLACE FUNCTION balanco_anual(p_ano INTEGER, p_user_id UUID DEFAULT NULL)
+RETURNS TABLE (mes_referencia INTEGER, entradas DECIMAL, saidas DECIMAL) AS $$
+    SELECT t.mes_referencia,
+           COALESCE(SUM(t.total) FILTER (WHERE t.tipo = 'entrada'), 0) AS entradas,
+           COALESCE(SUM(t.total) FILTER (WHERE t.tipo = 'saida'), 0) AS saidas
+    FROM resumo_mensal t
+    WHERE t.ano_referencia = p_ano
+      AND (p_user_id IS NULL OR t.user_id = p_user_id)
+    GROUP BY t.mes_referencia
+    HAVING SUM(t.quantidade) > 0
+    ORDER BY t.mes_referencia;
+$$ LANGUAGE sql STABLE;
+
+-- Função de resumo: total das transações agrupado por uma dimensão (categoria,
+-- forma de pagamento, tipo de gasto ou periodicidade), já com o nome resolvido
+-- (lê do resumo mensal materializado)
+CREATE OR REPLACE FUNCTION resumo_transacoes(
+    p_dimensao TEXT,
+    p_mes INTEGER DEFAULT NULL,
+    p_ano INTEGER DEFAULT NULL,
+    p_tipo TEXT DEFAULT NULL,
+    p_user_id UUID DEFAULT NULL
+)
+RETURNS TABLE (id UUID, nome VARCHAR, total DECIMAL) AS $$
+DECLARE
+    tabela TEXT;
+BEGIN
+    tabela := CASE p_dimensao
+        WHEN 'categoria' THEN 'categorias'
+        WHEN 'forma_pagamento' THEN 'formas_pagamento'
+        WHEN 'tipo_gasto' THEN 'tipos_gasto'
+        WHEN 'periodicidade' THEN 'periodicidades'
+    END;
+
+    IF tabela IS NULL THEN
+        RAISE EXCEPTION 'Dimensão de resumo inválida: %', p_dimensao;
+    END IF;
+
+    RETURN QUERY EXECUTE format(
+        'SELECT d.id, d.nome::VARCHAR, SUM(t.total)::DECIMAL
+         FROM resumo_mensal t
+         LEFT JOIN %I d ON d.id = t.%I
+         WHERE ($1 IS NULL OR t.mes_referencia = $1)
+           AND ($2 IS NULL OR t.ano_referencia = $2)
+           AND ($3 IS NULL OR t.tipo = $3)
+           AND ($4 IS NULL OR t.user_id = $4)
+         GROUP BY d.id, d.nome
+         HAVING SUM(t.quantidade) > 0
+         ORDER BY 3 DESC',
+        tabela, p_dimensao || '_id'
+    ) USING p_mes, p_ano, p_tipo, p_user_id;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Função do painel: transações do mês agrupadas por todas as dimensões de uma vez,
+-- para que cada resumo do painel seja montado em uma única passada
+-- (lê do resumo mensal materializado)
+CREATE OR REPLACE FUNCTION resumo_mes_agrupado(p_mes INTEGER, p_ano INTEGER, p_user_id UUID DEFAULT NULL)
+RETURNS TABLE (
+    tipo VARCHAR,
+    categoria_id UUID,
+    categoria VARCHAR,
+    forma_pagamento_id UUID,
+    forma_pagamento VARCHAR,
+    tipo_gasto_id UUID,
+    tipo_gasto VARCHAR,
+    periodicidade_id UUID,
+    periodicidade VARCHAR,
+    quantidade BIGINT,
+    total DECIMAL
+) AS $$
+    SELECT t.tipo,
+           c.id, c.nome,
+           f.id, f.nome,
+           tg.id, tg.nome,
+           p.id, p.nome,
+           SUM(t.quantidade)::BIGINT,
+           SUM(t.total)
+    FROM resumo_mensal t
+    LEFT JOIN categorias c ON c.id = t.categoria_id
+    LEFT JOIN formas_pagamento f ON f.id = t.forma_pagamento_id
+    LEFT JOIN tipos_gasto tg ON tg.id = t.tipo_gasto_id
+    LEFT JOIN periodicidades p ON p.id = t.periodicidade_id
+    WHERE t.mes_referencia = p_mes
+      AND t.ano_referencia = p_ano
+      AND (p_user_id IS NULL OR t.user_id = p_user_id)
+    GROUP BY t.tipo, c.id, c.nome, f.id, f.nome, tg.id, tg.nome, p.id, p.nome
+    HAVING SUM(t.quantidade) > 0;
+$$ LANGUAGE sql STABLE;
+
+-- Saldo das contas mantido incrementalmente: saldo = saldo_inicial + soma das
+-- transações da conta (entradas somam, saídas subtraem). Na primeira execução,
+-- o saldo atual vira o saldo inicial, pois até aqui ele não era atualizado
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'contas' AND column_name = 'saldo_inicial'
+    ) THEN
+        ALTER TABLE contas ADD COLUMN saldo_inicial DECIMAL(10, 2) DEFAULT 0.00;
+        UPDATE contas SET saldo_inicial = COALESCE(saldo, 0);
+    END IF;
+END;
+$$;
+
+-- Conta nova: o saldo informado na criação é o saldo inicial
+CREATE OR REPLACE FUNCTION definir_saldo_inicial()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.saldo_inicial := COALESCE(NEW.saldo, 0);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS definir_saldo_inicial_contas ON contas;
+CREATE TRIGGER definir_saldo_inicial_contas BEFORE INSERT ON contas
+    FOR EACH ROW EXECUTE FUNCTION definir_saldo_inicial();
+
+-- Aplica ao saldo das contas a variação causada por um comando em transacoes.
+-- Roda na mesma transação da escrita; as contas afetadas são travadas em ordem
+-- de id para que escritas concorrentes não se bloqueiem mutuamente. A função é
+-- SECURITY DEFINER, então só altera contas do mesmo dono da transação: sem
+-- isso, uma transação com o conta_id de outro usuário mudaria o saldo dele
+CREATE OR REPLACE FUNCTION atualizar_saldo_contas()
+RETURNS TRIGGER AS $$
+DECLARE
+    deltas JSONB;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT jsonb_agg(jsonb_build_object('conta_id', conta_id, 'user_id', user_id, 'delta', delta)) INTO deltas
+        FROM (
+            SELECT conta_id, user_id, SUM(CASE WHEN tipo = 'entrada' THEN valor ELSE -valor END) AS delta
+            FROM novas
+            WHERE conta_id IS NOT NULL
+            GROUP BY conta_id, user_id
+        ) d;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT jsonb_agg(jsonb_build_object('conta_id', conta_id, 'user_id', user_id, 'delta', delta)) INTO deltas
+        FROM (
+            SELECT conta_id, user_id, -SUM(CASE WHEN tipo = 'entrada' THEN valor ELSE -valor END) AS delta
+            FROM antigas
+            WHERE conta_id IS NOT NULL
+            GROUP BY conta_id, user_id
+        ) d;
+    ELSE
+        SELECT jsonb_agg(jsonb_build_object('conta_id', conta_id, 'user_id', user_id, 'delta', delta)) INTO deltas
+        FROM (
+            SELECT conta_id, user_id, SUM(sinal * CASE WHEN tipo = 'entrada' THEN valor ELSE -valor END) AS delta
+            FROM (
+                SELECT n.conta_id, n.user_id, n.tipo, n.valor, 1 AS sinal FROM novas n
+                UNION ALL
+                SELECT a.conta_id, a.user_id, a.tipo, a.valor, -1 AS sinal FROM antigas a
+            ) mudancas
+            WHERE conta_id IS NOT NULL
+            GROUP BY conta_id, user_id
+            HAVING SUM(sinal * CASE WHEN tipo = 'entrada' THEN valor ELSE -valor END) <> 0
+        ) d;
+    END IF;
+
+    IF deltas IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    PERFORM 1 FROM contas c
+    JOIN jsonb_to_recordset(deltas) AS d(conta_id UUID, user_id UUID, delta DECIMAL)
+        ON c.id = d.conta_id AND c.user_id IS NOT DISTINCT FROM d.user_id
+    ORDER BY c.id
+    FOR UPDATE OF c;
+
+    UPDATE contas c
+    SET saldo = c.saldo + d.delta
+    FROM jsonb_to_recordset(deltas) AS d(conta_id UUID, user_id UUID, delta DECIMAL)
+    WHERE c.id = d.conta_id AND c.user_id IS NOT DISTINCT FROM d.user_id;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS saldo_contas_transacoes_insert ON transacoes;
+CREATE TRIGGER saldo_contas_transacoes_insert AFTER INSERT ON transacoes
+    REFERENCING NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_saldo_contas();
+
+DROP TRIGGER IF EXISTS saldo_contas_transacoes_update ON transacoes;
+CREATE TRIGGER saldo_contas_transacoes_update AFTER UPDATE ON transacoes
+    REFERENCING OLD TABLE AS antigas NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_saldo_contas();
+
+DROP TRIGGER IF EXISTS saldo_contas_transacoes_delete ON transacoes;
+CREATE TRIGGER saldo_contas_transacoes_delete AFTER DELETE ON transacoes
+    REFERENCING OLD TABLE AS antigas
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_saldo_contas();
+
+-- Recalcula o saldo de todas as contas a partir das transações do mesmo dono
+-- (backfill ou correção), retornando as contas cujo saldo mudou
+CREATE OR REPLACE FUNCTION recalcular_saldos()
+RETURNS TABLE (conta_id UUID, nome VARCHAR, saldo_anterior DECIMAL, saldo_recalculado DECIMAL) AS $$
+#variable_conflict use_column
+BEGIN
+    LOCK TABLE transacoes IN SHARE MODE;
+    PERFORM 1 FROM contas ORDER BY id FOR UPDATE;
+
+    RETURN QUERY
+    WITH recalculado AS (
+        SELECT c.id,
+               c.saldo AS saldo_anterior,
+               COALESCE(c.saldo_inicial, 0) + COALESCE(SUM(
+                   CASE WHEN t.tipo = 'entrada' THEN t.valor ELSE -t.valor END
+               ), 0) AS saldo_novo
+        FROM contas c
+        LEFT JOIN transacoes t ON t.conta_id = c.id AND t.user_id IS NOT DISTINCT FROM c.user_id
+        GROUP BY c.id
+    ),
+    alteradas AS (
+        UPDATE contas c
+        SET saldo = r.saldo_novo
+        FROM recalculado r
+        WHERE c.id = r.id AND c.saldo IS DISTINCT FROM r.saldo_novo
+        RETURNING c.id, c.nome, r.saldo_anterior, r.saldo_novo
+    )
+    SELECT a.id, a.nome, a.saldo_anterior, a.saldo_novo FROM alteradas a;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+REVOKE EXECUTE ON FUNCTION recalcular_saldos() FROM PUBLIC, anon, authenticated;
+
+-- Backfill dos saldos: saldo inicial mais as transações já existentes
+SELECT * FROM recalcular_saldos();
+
+-- Índices para os padrões de acesso das rotas (verificados com explain_check.py)
+-- Transações do mês, mais recentes primeiro (Transacao.get_all, transacoes_pagina);
+-- com e sem filtro de usuário, e id no fim para o cursor (data_transacao, id)
+CREATE INDEX IF NOT EXISTS transacoes_usuario_mes_data_idx
+    ON transacoes (user_id, ano_referencia, mes_referencia, data_transacao DESC, id DESC);
+CREATE INDEX IF NOT EXISTS transacoes_mes_data_idx
+    ON transacoes (ano_referencia, mes_referencia, data_transacao DESC, id DESC);
+CREATE INDEX IF NOT EXISTS transacoes_data_idx
+    ON transacoes (data_transacao DESC, id DESC);
+
+-- Chaves estrangeiras usadas por recalcular_saldos e pelos ON DELETE CASCADE
+CREATE INDEX IF NOT EXISTS transacoes_conta_id_idx ON transacoes (conta_id);
+CREATE INDEX IF NOT EXISTS transacoes_categoria_id_idx ON transacoes (categoria_id);
+
+-- Metas e parcelamentos por usuário
+CREATE INDEX IF NOT EXISTS metas_user_id_idx ON metas (user_id);
+CREATE INDEX IF NOT EXISTS parcelamentos_user_id_idx ON parcelamentos (user_id);
+
+-- Tabelas de apoio: apenas registros ativos, do usuário ou globais (user_id IS NULL)
+CREATE INDEX IF NOT EXISTS contas_ativas_user_id_idx ON contas (user_id) WHERE ativo = true;
+CREATE INDEX IF NOT EXISTS categorias_ativas_user_id_idx ON categorias (user_id, tipo) WHERE ativo = true;
+CREATE INDEX IF NOT EXISTS categorias_globais_idx ON categorias (tipo) WHERE ativo = true AND user_id IS NULL;
+CREATE INDEX IF NOT EXISTS formas_pagamento_globais_idx ON formas_pagamento (nome) WHERE ativo = true AND user_id IS NULL;
+CREATE INDEX IF NOT EXISTS tipos_gasto_globais_idx ON tipos_gasto (nome) WHERE ativo = true AND user_id IS NULL;
+CREATE INDEX IF NOT EXISTS periodicidades_globais_idx ON periodicidades (nome) WHERE ativo = true AND user_id IS NULL;
+
+-- Resumo mensal sem filtro de usuário (a chave única já cobre user_id, ano, mês)
+CREATE INDEX IF NOT EXISTS resumo_mensal_mes_idx ON resumo_mensal (ano_referencia, mes_referencia);
+
+-- Progresso das metas: valor_atual = soma das transações da categoria da meta,
+-- do mesmo usuário, com data entre data_inicio e data_fim. Mantido
+-- incrementalmente pelos comandos em transacoes (como o saldo das contas);
+-- metas sem categoria mantêm o valor_atual informado
+CREATE INDEX IF NOT EXISTS transacoes_categoria_data_idx ON transacoes (categoria_id, data_transacao);
+CREATE INDEX IF NOT EXISTS metas_categoria_id_idx ON metas (categoria_id) WHERE categoria_id IS NOT NULL;
+
+-- Meta nova ou com categoria/período alterados: valor_atual calculado do zero
+CREATE OR REPLACE FUNCTION calcular_valor_atual_meta()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.categoria_id IS NOT NULL THEN
+        SELECT COALESCE(SUM(t.valor), 0) INTO NEW.valor_atual
+        FROM transacoes t
+        WHERE t.categoria_id = NEW.categoria_id
+          AND t.user_id IS NOT DISTINCT FROM NEW.user_id
+          AND t.data_transacao BETWEEN NEW.data_inicio AND NEW.data_fim;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS valor_atual_metas_insert ON metas;
+CREATE TRIGGER valor_atual_metas_insert BEFORE INSERT ON metas
+    FOR EACH ROW EXECUTE FUNCTION calcular_valor_atual_meta();
+
+DROP TRIGGER IF EXISTS valor_atual_metas_update ON metas;
+CREATE TRIGGER valor_atual_metas_update
+    BEFORE UPDATE OF categoria_id, data_inicio, data_fim, user_id ON metas
+    FOR EACH ROW EXECUTE FUNCTION calcular_valor_atual_meta();
+
+-- Aplica ao valor_atual das metas a variação causada por um comando em
+-- transacoes; as metas afetadas são travadas em ordem de id
+CREATE OR REPLACE FUNCTION atualizar_progresso_metas()
+RETURNS TRIGGER AS $$
+DECLARE
+    deltas JSONB;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT jsonb_object_agg(id, delta) INTO deltas
+        FROM (
+            SELECT m.id, SUM(t.valor) AS delta
+            FROM novas t
+            JOIN metas m ON m.categoria_id = t.categoria_id
+                        AND m.user_id IS NOT DISTINCT FROM t.user_id
+                        AND t.data_transacao BETWEEN m.data_inicio AND m.data_fim
+            GROUP BY m.id
+        ) d;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT jsonb_object_agg(id, delta) INTO deltas
+        FROM (
+            SELECT m.id, -SUM(t.valor) AS delta
+            FROM antigas t
+            JOIN metas m ON m.categoria_id = t.categoria_id
+                        AND m.user_id IS NOT DISTINCT FROM t.user_id
+                        AND t.data_transacao BETWEEN m.data_inicio AND m.data_fim
+            GROUP BY m.id
+        ) d;
+    ELSE
+        SELECT jsonb_object_agg(id, delta) INTO deltas
+        FROM (
+            SELECT m.id, SUM(t.sinal * t.valor) AS delta
+            FROM (
+                SELECT n.user_id, n.categoria_id, n.data_transacao, n.valor, 1 AS sinal FROM novas n
+                UNION ALL
+                SELECT a.user_id, a.categoria_id, a.data_transacao, a.valor, -1 AS sinal FROM antigas a
+            ) t
+            JOIN metas m ON m.categoria_id = t.categoria_id
+                        AND m.user_id IS NOT DISTINCT FROM t.user_id
+                        AND t.data_transacao BETWEEN m.data_inicio AND m.data_fim
+            GROUP BY m.id
+            HAVING SUM(t.sinal * t.valor) <> 0
+        ) d;
+    END IF;
+
+    IF deltas IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    PERFORM 1 FROM metas
+    WHERE id IN (SELECT key::UUID FROM jsonb_each_text(deltas))
+    ORDER BY id
+    FOR UPDATE;
+
+    UPDATE metas m
+    SET valor_atual = COALESCE(m.valor_atual, 0) + d.value::DECIMAL
+    FROM jsonb_each_text(deltas) d
+    WHERE m.id = d.key::UUID;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS progresso_metas_transacoes_insert ON transacoes;
+CREATE TRIGGER progresso_metas_transacoes_insert AFTER INSERT ON transacoes
+    REFERENCING NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_progresso_metas();
+
+DROP TRIGGER IF EXISTS progresso_metas_transacoes_update ON transacoes;
+CREATE TRIGGER progresso_metas_transacoes_update AFTER UPDATE ON transacoes
+    REFERENCING OLD TABLE AS antigas NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_progresso_metas();
+
+DROP TRIGGER IF EXISTS progresso_metas_transacoes_delete ON transacoes;
+CREATE TRIGGER progresso_metas_transacoes_delete AFTER DELETE ON transacoes
+    REFERENCING OLD TABLE AS antigas
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_progresso_metas();
+
+-- Recalcula o valor_atual de todas as metas com categoria (backfill ou
+-- correção), retornando as metas cujo valor mudou
+CREATE OR REPLACE FUNCTION recalcular_metas()
+RETURNS TABLE (meta_id UUID, nome VARCHAR, valor_anterior DECIMAL, valor_recalculado DECIMAL) AS $$
+#variable_conflict use_column
+BEGIN
+    LOCK TABLE transacoes IN SHARE MODE;
+    PERFORM 1 FROM metas WHERE categoria_id IS NOT NULL ORDER BY id FOR UPDATE;
+
+    RETURN QUERY
+    WITH recalculado AS (
+        SELECT m.id,
+               m.valor_atual AS valor_anterior,
+               COALESCE(SUM(t.valor), 0) AS valor_novo
+        FROM metas m
+        LEFT JOIN transacoes t ON t.categoria_id = m.categoria_id
+                              AND t.user_id IS NOT DISTINCT FROM m.user_id
+                              AND t.data_transacao BETWEEN m.data_inicio AND m.data_fim
+        WHERE m.categoria_id IS NOT NULL
+        GROUP BY m.id
+    ),
+    alteradas AS (
+        UPDATE metas m
+        SET valor_atual = r.valor_novo
+        FROM recalculado r
+        WHERE m.id = r.id AND m.valor_atual IS DISTINCT FROM r.valor_novo
+        RETURNING m.id, m.nome, r.valor_anterior, r.valor_novo
+    )
+    SELECT a.id, a.nome, a.valor_anterior, a.valor_novo FROM alteradas a;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+REVOKE EXECUTE ON FUNCTION recalcular_metas() FROM PUBLIC, anon, authenticated;
+
+-- Backfill das metas existentes
+SELECT * FROM recalcular_metas();
+
+-- Totais por dia de um intervalo [p_inicio, p_fim) de data_transacao, para o
+-- calendário: uma consulta agrupada em vez de todas as transações do mês
+CREATE OR REPLACE FUNCTION resumo_diario(p_inicio DATE, p_fim DATE, p_user_id UUID DEFAULT NULL)
+RETURNS TABLE (data_transacao DATE, quantidade BIGINT, entradas DECIMAL, saidas DECIMAL) AS $$
+    SELECT t.data_transacao,
+           COUNT(*),
+           COALESCE(SUM(t.valor) FILTER (WHERE t.tipo = 'entrada'), 0),
+           COALESCE(SUM(t.valor) FILTER (WHERE t.tipo = 'saida'), 0)
+    FROM transacoes t
+    WHERE t.data_transacao >= p_inicio
+      AND t.data_transacao < p_fim
+      AND (p_user_id IS NULL OR t.user_id = p_user_id)
+    GROUP BY t.data_transacao
+    ORDER BY t.data_transacao;
+$$ LANGUAGE sql STABLE;
+
+-- Importação de extratos (OFX/CSV): id_externo identifica o lançamento no
+-- extrato (FITID do OFX, coluna de id ou hash do CSV) e impede que o mesmo
+-- lançamento seja importado duas vezes na mesma conta
+ALTER TABLE transacoes ADD COLUMN IF NOT EXISTS id_externo VARCHAR(255);
+
+CREATE UNIQUE INDEX IF NOT EXISTS transacoes_conta_id_externo_key
+    ON transacoes (conta_id, id_externo) WHERE id_externo IS NOT NULL;
+
+-- Conciliação da importação: transações da conta nas datas de um lote,
+-- paginadas por id (Transacao.get_para_conciliacao)
+CREATE INDEX IF NOT EXISTS transacoes_conta_data_idx ON transacoes (conta_id, data_transacao, id);
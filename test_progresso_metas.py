@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Testa que o progresso das metas acompanha as transações criadas pela API,
+com a app Flask completa sobre o backend local (sqlalchemy_client.py)
+"""
+
+import supabase_models
+from sqlalchemy_client import SQLAlchemyClient
+
+def test_progresso_metas(tmp_path, monkeypatch):
+    """Uma saída na categoria da meta, criada por POST /transacoes, move a meta e o saldo"""
+
+    client = SQLAlchemyClient(f"sqlite:///{tmp_path / 'financeiro.db'}")
+    monkeypatch.setattr(supabase_models, "get_supabase_admin", lambda: client)
+    monkeypatch.setattr(supabase_models, "get_supabase_client", lambda user_token=None: client)
+    from main import app
+
+    with app.test_client() as api:
+        conta = api.post("/api/contas", json={"nome": "Conta Teste", "saldo": 100}).get_json()
+        categoria = api.post("/api/categorias", json={"nome": "Água", "tipo": "Despesa"}).get_json()
+        api.post("/api/metas", json={
+            "nome": "Conta de água", "valor_objetivo": 200, "categoria_id": categoria["id"],
+            "data_inicio": "2025-01-01", "data_fim": "2025-12-31"
+        })
+
+        resposta = api.post("/api/transacoes", json={
+            "tipo": "saida", "descricao": "Conta de água", "valor": 50,
+            "data_transacao": "2025-03-10", "conta_id": conta["id"], "categoria_id": categoria["id"]
+        })
+        assert resposta.status_code == 201
+
+        resposta = api.post("/api/transacoes/lote", json=[{
+            "tipo": "saida", "descricao": "Conta de água", "valor": 30,
+            "data_transacao": "2025-04-10", "conta_id": conta["id"], "categoria_id": categoria["id"]
+        }])
+        assert resposta.status_code == 201
+
+        meta = next(m for m in api.get("/api/metas").get_json() if m["nome"] == "Conta de água")
+        assert meta["valor_atual"] == 80
+        assert meta["progresso"] == 40
+
+        conta = next(c for c in api.get("/api/contas").get_json() if c["nome"] == "Conta Teste")
+        assert conta["saldo"] == 20